@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Match, Notification
+from .models import Match, MatchChange, MatchingCandidate, Notification
 
 
 @admin.register(Match)
@@ -41,3 +41,22 @@ class NotificationAdmin(admin.ModelAdmin):
         }),
     )
 
+
+@admin.register(MatchChange)
+class MatchChangeAdmin(admin.ModelAdmin):
+    """매칭 변경 이력 Admin"""
+    list_display = ('id', 'user', 'match_id', 'other_user_id', 'change_type', 'created_at')
+    list_filter = ('change_type', 'created_at')
+    search_fields = ('user__user__username', 'match_id')
+    raw_id_fields = ('user',)
+    readonly_fields = ('created_at',)
+
+
+@admin.register(MatchingCandidate)
+class MatchingCandidateAdmin(admin.ModelAdmin):
+    """매칭 후보 읽기 모델 Admin (User / UserLocation 저장 시 자동 갱신)"""
+    list_display = ('user', 'gender', 'age', 'height', 'latitude_e6', 'longitude_e6', 'encoded_exactly', 'updated_at')
+    list_filter = ('gender', 'encoded_exactly')
+    search_fields = ('user__user__username',)
+    raw_id_fields = ('user',)
+    readonly_fields = ('updated_at',)
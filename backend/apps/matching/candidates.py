@@ -0,0 +1,280 @@
+"""
+매칭 후보 읽기 모델 (MatchingCandidate)
+
+반경 조회마다 users / user_locations를 JOIN하고 후보마다 성격/관심사 JSON 목록을 디코딩하는 대신,
+매칭 동의 ON + 서비스 활성화 + 위치가 있는 사용자를 1행씩 담은 좁은 테이블(matching_candidates)만 읽습니다.
+- 성별/나이/키 필터링(1단계)은 SQL 조건으로 처리 (성별별 부분 인덱스, 필요한 컬럼은 INCLUDE)
+- MBTI/성격/관심사 점수(2단계)는 비트마스크로 계산 (check_match_criteria와 같은 점수)
+- User 객체는 최종 매칭 가능한 사용자만 로딩
+
+읽기 모델은 User / UserLocation 저장과 같은 트랜잭션에서 sync_matching_candidates로 갱신되며,
+MATCHING_READ_MODEL=True일 때 find_matchable_users와 샤드 반경 조회가 이 테이블을 사용합니다.
+처음 켤 때는 python manage.py rebuild_matching_candidates로 기존 사용자를 채워주세요.
+"""
+import operator
+from functools import reduce
+
+import redis
+from django.db import transaction
+from django.db.models import Q
+
+from apps.users.models import COORDINATE_SCALE, User, location_region
+from apps.users.location_buffer import get_buffered_locations, is_write_behind_enabled
+from apps.users.presence import live_user_ids
+from apps.users.vocabulary import encode_interests, encode_personality, mbti_code
+from apps.matching.models import MatchingCandidate
+from apps.matching.utils import bounding_box_e6, calculate_distance_km, check_match_criteria
+
+
+# check_match_criteria와 동일
+PRIORITY_WEIGHTS = {1: 50.0, 2: 30.0, 3: 20.0}
+MATCH_SCORE_THRESHOLD = 50.0
+
+CANDIDATE_FIELDS = [
+    'latitude_e6', 'longitude_e6', 'region', 'recorded_at',
+    'gender', 'age', 'height', 'mbti', 'personality_mask', 'interest_mask', 'encoded_exactly',
+]
+
+
+def _candidate_row(user, location):
+    """User + UserLocation → MatchingCandidate (저장하지 않음)"""
+    personality_mask, personality_known = encode_personality(user.personality)
+    interest_mask, interest_known = encode_interests(user.interests)
+    mbti = mbti_code(user.mbti)
+    return MatchingCandidate(
+        user_id=user.id,
+        latitude_e6=location.latitude_e6,
+        longitude_e6=location.longitude_e6,
+        region=location_region(location.latitude_e6, location.longitude_e6),
+        recorded_at=location.recorded_at,
+        gender=user.gender,
+        age=user.age,
+        height=user.height,
+        mbti=mbti,
+        personality_mask=personality_mask,
+        interest_mask=interest_mask,
+        encoded_exactly=personality_known and interest_known and (mbti is not None or not user.mbti),
+    )
+
+
+def sync_matching_candidates(user_ids):
+    """
+    사용자들의 매칭 후보 행을 현재 User / UserLocation 기준으로 갱신
+
+    매칭 후보 조건(매칭 동의 ON + 서비스 활성화 + 위치 있음)을 만족하면 upsert, 아니면 삭제합니다.
+    User / UserLocation을 저장한 트랜잭션 안에서 호출해야 읽기 모델이 원본과 어긋나지 않습니다.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+
+    rows = [
+        _candidate_row(user, user.location)
+        for user in User.objects.filter(
+            id__in=user_ids,
+            matching_consent=True,
+            service_active=True,
+            location__isnull=False,
+        ).select_related('location')
+    ]
+    MatchingCandidate.objects.filter(user_id__in=user_ids).exclude(
+        user_id__in=[row.user_id for row in rows]
+    ).delete()
+    if rows:
+        MatchingCandidate.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=CANDIDATE_FIELDS + ['updated_at'],
+        )
+
+
+def rebuild_matching_candidates(batch_size=1000):
+    """
+    전체 사용자의 매칭 후보 행을 다시 만듦 (읽기 모델을 처음 켤 때 / 선택 항목 목록을 바꾼 뒤)
+
+    Returns:
+        int: 매칭 후보 수
+    """
+    user_ids = list(User.objects.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(user_ids), batch_size):
+        with transaction.atomic():
+            sync_matching_candidates(user_ids[start:start + batch_size])
+    # 사용자 삭제는 CASCADE로 처리되지만, 혹시 남은 행도 정리
+    MatchingCandidate.objects.exclude(user_id__in=User.objects.values('id')).delete()
+    return MatchingCandidate.objects.count()
+
+
+def priority_weights(ideal_type):
+    """중요 항목 순위 → {항목: 가중치} (check_match_criteria의 get_weight_for_item과 같이 앞 순위 우선)"""
+    weights = {}
+    for rank, item in enumerate((ideal_type.priority_1, ideal_type.priority_2, ideal_type.priority_3), start=1):
+        if item and item not in weights:
+            weights[item] = PRIORITY_WEIGHTS[rank]
+    return weights
+
+
+def _preferences(ideal_type):
+    """이상형 프로필 → 점수 계산에 쓰는 값 (반경 조회 1회당 한 번만 계산)"""
+    weights = priority_weights(ideal_type)
+    preferred_mbti = ideal_type.preferred_mbti or []
+    return {
+        'weights': weights,
+        'mbti_codes': {mbti_code(mbti) for mbti in preferred_mbti} - {None},
+        'has_mbti': bool(preferred_mbti),
+        'personality_mask': encode_personality(ideal_type.preferred_personality)[0],
+        'personality_total': len(set(ideal_type.preferred_personality or [])),
+        'interest_mask': encode_interests(ideal_type.preferred_interests)[0],
+        'interest_total': len(set(ideal_type.preferred_interests or [])),
+    }
+
+
+def _f1_score(matches, ideal_total, candidate_total):
+    """check_match_criteria의 F1 Score와 같은 계산 (일치 개수 / 각 목록의 항목 수로)"""
+    if matches == 0 or ideal_total == 0 or candidate_total == 0:
+        return 0.0
+    precision = matches / ideal_total
+    recall = matches / candidate_total
+    return 2 * (precision * recall) / (precision + recall)
+
+
+def score_candidate(preferences, candidate):
+    """
+    비트마스크로 이상형 점수 계산 (단계 2, 필터링은 SQL 조건으로 이미 통과한 후보)
+
+    encoded_exactly인 후보에 대해 check_match_criteria와 같은 점수를 반환합니다.
+    """
+    weights = preferences['weights']
+    score = 0.0
+
+    mbti_weight = weights.get('mbti', 0.0)
+    if mbti_weight > 0 and preferences['has_mbti'] and candidate.mbti in preferences['mbti_codes']:
+        score += mbti_weight
+
+    personality_weight = weights.get('personality', 0.0)
+    if personality_weight > 0 and preferences['personality_total']:
+        matches = (preferences['personality_mask'] & candidate.personality_mask).bit_count()
+        score += _f1_score(matches, preferences['personality_total'], candidate.personality_mask.bit_count()) * personality_weight
+
+    interest_weight = weights.get('interests', 0.0)
+    if interest_weight > 0 and preferences['interest_total']:
+        matches = (preferences['interest_mask'] & candidate.interest_mask).bit_count()
+        score += _f1_score(matches, preferences['interest_total'], candidate.interest_mask.bit_count()) * interest_weight
+
+    return min(score, 100.0)
+
+
+def preferred_genders(ideal_type, user_gender):
+    """선호 성별 목록 (check_match_criteria의 성별 필터링과 동일)"""
+    if ideal_type.preferred_gender in ('M', 'F'):
+        return [ideal_type.preferred_gender]
+    if ideal_type.preferred_gender:
+        return ['M', 'F']
+    return {'M': ['F'], 'F': ['M']}.get(user_gender, [])
+
+
+def search_candidates(current_user, ideal_type, latitude, longitude, radius_km):
+    """
+    읽기 모델에서 반경 내 매칭 가능한 후보 찾기 (User 객체를 로딩하지 않음)
+
+    Returns:
+        list: [{'user_id', 'latitude', 'longitude', 'distance_km', 'distance_m', 'match_score'}, ...]
+    """
+    genders = preferred_genders(ideal_type, current_user.gender)
+    if not genders:
+        print('   ❌ 선호 성별 조건을 만족할 수 없음')
+        return []
+
+    # 성별 조건을 OR로 나눠야 성별별 부분 인덱스를 사용 (gender IN (...)은 부분 인덱스 조건과 맞지 않음)
+    min_lat_e6, max_lat_e6, min_lon_e6, max_lon_e6 = bounding_box_e6(latitude, longitude, radius_km)
+    candidates = MatchingCandidate.objects.filter(
+        reduce(operator.or_, [Q(gender=gender) for gender in genders]),
+        latitude_e6__range=(min_lat_e6, max_lat_e6),
+        longitude_e6__range=(min_lon_e6, max_lon_e6),
+    ).exclude(user_id=current_user.id)
+    # 나이/키 범위 필터링 (check_match_criteria와 같이 범위가 설정된 경우만)
+    if ideal_type.age_min and ideal_type.age_max:
+        candidates = candidates.filter(age__range=(ideal_type.age_min, ideal_type.age_max))
+    if ideal_type.height_min and ideal_type.height_max:
+        candidates = candidates.filter(height__range=(ideal_type.height_min, ideal_type.height_max))
+    candidates = list(candidates.only(*CANDIDATE_FIELDS))
+
+    # 최근 PRESENCE_WINDOW_SECONDS 안에 확인된 사용자만
+    live_ids = live_user_ids(candidate.user_id for candidate in candidates)
+    candidates = [candidate for candidate in candidates if candidate.user_id in live_ids]
+    print(f'   반경 근처 접속 중인 매칭 후보: {len(candidates)}명')
+
+    # write-behind 모드면 Redis 버퍼의 최신 위치로 거리 계산
+    if is_write_behind_enabled():
+        try:
+            buffered = get_buffered_locations(candidate.user_id for candidate in candidates)
+        except redis.RedisError as e:
+            print(f'⚠️ 위치 버퍼 조회 실패, 읽기 모델 위치로 계산: {str(e)}')
+            buffered = {}
+        for candidate in candidates:
+            location = buffered.get(candidate.user_id)
+            if location is None:
+                continue
+            if candidate.recorded_at is None or location.recorded_at >= candidate.recorded_at:
+                candidate.latitude_e6 = location.latitude_e6
+                candidate.longitude_e6 = location.longitude_e6
+
+    in_radius = []
+    for candidate in candidates:
+        distance_km = calculate_distance_km(latitude, longitude, *candidate.degrees)
+        if distance_km <= radius_km:
+            in_radius.append((candidate, distance_km))
+
+    # 목록에 없는 값이 있는 후보는 원본 프로필로 점수 계산
+    inexact_users = User.objects.in_bulk(
+        [candidate.user_id for candidate, _distance_km in in_radius if not candidate.encoded_exactly]
+    )
+
+    preferences = _preferences(ideal_type)
+    matchable = []
+    for candidate, distance_km in in_radius:
+        if candidate.encoded_exactly:
+            match_score = score_candidate(preferences, candidate)
+        elif candidate.user_id in inexact_users:
+            match_score = check_match_criteria(ideal_type, inexact_users[candidate.user_id], current_user.gender)
+        else:
+            continue
+        if match_score >= MATCH_SCORE_THRESHOLD:
+            matchable.append({
+                'user_id': candidate.user_id,
+                'latitude': candidate.latitude_e6 / COORDINATE_SCALE,
+                'longitude': candidate.longitude_e6 / COORDINATE_SCALE,
+                'distance_km': distance_km,
+                'distance_m': distance_km * 1000,
+                'match_score': match_score,
+            })
+    return matchable
+
+
+def find_matchable_candidates(current_user, ideal_type, latitude, longitude, radius_km):
+    """
+    읽기 모델로 find_matchable_users와 같은 결과 계산
+
+    Returns:
+        list: 매칭 가능한 사용자 리스트 ({'user', 'distance_km', 'distance_m', 'match_score'}, 점수 → 거리 순)
+    """
+    matchable = search_candidates(current_user, ideal_type, latitude, longitude, radius_km)
+    users = User.objects.select_related('user', 'location').in_bulk(
+        [candidate['user_id'] for candidate in matchable]
+    )
+
+    matchable_users = [
+        {
+            'user': users[candidate['user_id']],
+            'distance_km': candidate['distance_km'],
+            'distance_m': candidate['distance_m'],
+            'match_score': candidate['match_score'],
+        }
+        for candidate in matchable
+        if candidate['user_id'] in users
+    ]
+    matchable_users.sort(key=lambda x: (-x['match_score'], x['distance_km']))
+
+    print(f'   최종 매칭 가능: {len(matchable_users)}명')
+
+    return matchable_users
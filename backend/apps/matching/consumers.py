@@ -0,0 +1,190 @@
+"""
+매칭 WebSocket Consumer
+
+기기당 하나의 연결로 HTTP 폴링(위치 업데이트 + match_check + matchable_count)을 대체합니다.
+
+    ws://<host>/ws/matching/?token=<access token>
+
+클라이언트 → 서버
+    {"type": "location", "latitude": 37.5665, "longitude": 126.9780}
+    {"type": "ping"}
+
+서버 → 클라이언트
+    {"type": "location.saved", "updated_at": "..."}
+    {"type": "match.created", "match": {...MatchSerializer...}}
+    {"type": "match.removed", "match_id": 34, "other_user_id": 12}
+    {"type": "count", "matchable_count": 3, "radius": 0.05}   (위치 처리 후, 또는 스윕/다른 요청에서 인원 수가 바뀌면)
+    {"type": "pong"}
+    {"type": "error", "error": "..."}
+"""
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+
+from apps.users.models import User
+from apps.users.presence import mark_user_seen
+from apps.users.serializers import UserLocationSerializer
+from apps.users.utils import save_user_location
+from apps.matching.events import USER_GROUP, is_precomputed_mode
+from apps.matching.models import Match
+from apps.matching.serializers import MatchSerializer
+from apps.matching.utils import reconcile_matches
+from apps.matching.views import find_matchable_users_for_mode, has_fresh_sweep_count, save_matchable_count
+
+
+class MatchingConsumer(AsyncJsonWebsocketConsumer):
+    """위치 스트림 수신 + 매칭 생성/삭제, 매칭 가능 인원 수 변경 전송"""
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        profile = await self._get_profile(user)
+        if profile is None or not user.email_verified:
+            await self.close(code=4403)
+            return
+
+        self.profile_id = profile.id
+        self.group_name = USER_GROUP.format(user_id=profile.id)
+        self.last_count = None
+
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        print(f'🔌 매칭 WebSocket 연결: {user.username}')
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        message_type = content.get('type')
+        if message_type == 'location':
+            await self._handle_location(content)
+        elif message_type == 'ping':
+            # 움직이지 않아 위치를 보내지 않는 동안에도 접속 상태 유지
+            await sync_to_async(mark_user_seen)(self.profile_id)
+            await self.send_json({'type': 'pong'})
+        else:
+            await self.send_json({'type': 'error', 'error': f'알 수 없는 메시지 유형입니다: {message_type}'})
+
+    # ------------------------------------------------------------------
+    # channel layer 그룹 이벤트 (events.push_match_events, events.push_count_events)
+    # ------------------------------------------------------------------
+
+    async def match_created(self, event):
+        match_data = await self._serialize_match(event['match_id'])
+        if match_data is not None:
+            await self.send_json({'type': 'match.created', 'match': match_data})
+
+    async def match_removed(self, event):
+        await self.send_json({
+            'type': 'match.removed',
+            'match_id': event['match_id'],
+            'other_user_id': event['other_user_id'],
+        })
+
+    async def count_changed(self, event):
+        # 다른 반경으로 계산한 인원 수(matchable_count API의 radius 파라미터)는 전송하지 않음
+        if event['radius'] == settings.MATCHING_COUNT_RADIUS_KM:
+            await self._send_count(event['matchable_count'])
+
+    # ------------------------------------------------------------------
+    # 위치 스트림
+    # ------------------------------------------------------------------
+
+    async def _handle_location(self, content):
+        serializer = UserLocationSerializer(data=content)
+        if not serializer.is_valid():
+            await self.send_json({
+                'type': 'error',
+                'error': '입력 데이터가 유효하지 않습니다.',
+                'errors': serializer.errors,
+            })
+            return
+
+        result = await self._process_location(
+            serializer.validated_data['latitude'],
+            serializer.validated_data['longitude'],
+        )
+        if 'error' in result:
+            await self.send_json({'type': 'error', 'error': result['error']})
+            return
+
+        await self.send_json({'type': 'location.saved', 'updated_at': result['updated_at']})
+
+        await self._send_count(result['matchable_count'])
+
+    async def _send_count(self, matchable_count):
+        """매칭 가능 인원 수가 바뀌었을 때만 전송"""
+        if matchable_count != self.last_count:
+            self.last_count = matchable_count
+            await self.send_json({
+                'type': 'count',
+                'matchable_count': matchable_count,
+                'radius': settings.MATCHING_COUNT_RADIUS_KM,
+            })
+
+    @database_sync_to_async
+    def _process_location(self, latitude, longitude):
+        """
+        위치 저장 → 매칭 갱신 → 매칭 가능 인원 수 계산
+
+        위치 업데이트 API와 같은 조건(매칭 동의, useruser 제외)을 확인합니다.
+        매칭 생성/삭제 이벤트는 reconcile_matches → publish_match_changes를 통해 그룹으로 전송됩니다.
+        """
+        current_user = User.objects.select_related('user', 'ideal_type_profile').get(id=self.profile_id)
+        if not current_user.matching_consent:
+            return {'error': '매칭 동의가 OFF 상태입니다. 위치 업데이트를 하려면 매칭 동의를 ON으로 설정해주세요.'}
+        if current_user.user.username == 'useruser':
+            return {'error': 'useruser의 위치는 고정되어 있습니다. (업데이트되지 않음)'}
+
+        location, _created = save_user_location(current_user, latitude, longitude)
+        latitude, longitude = location.degrees
+
+        # precomputed 모드에서는 매칭 워커가 이벤트를 받아 계산
+        if not is_precomputed_mode():
+            reconcile_matches(
+                current_user,
+                latitude,
+                longitude,
+                settings.MATCHING_RADIUS_KM,
+                matchable_users=find_matchable_users_for_mode(
+                    current_user,
+                    latitude,
+                    longitude,
+                    settings.MATCHING_RADIUS_KM,
+                ),
+            )
+
+        count_radius = settings.MATCHING_COUNT_RADIUS_KM
+        if is_precomputed_mode() and has_fresh_sweep_count(current_user, count_radius):
+            matchable_count = current_user.matchable_count
+        else:
+            matchable_count = len(find_matchable_users_for_mode(
+                current_user,
+                latitude,
+                longitude,
+                count_radius,
+                load_users=False,
+            ))
+            save_matchable_count(current_user, matchable_count, count_radius)
+
+        return {
+            'updated_at': location.updated_at.isoformat(),
+            'matchable_count': matchable_count,
+        }
+
+    @database_sync_to_async
+    def _get_profile(self, user):
+        try:
+            return user.profile
+        except User.DoesNotExist:
+            return None
+
+    @database_sync_to_async
+    def _serialize_match(self, match_id):
+        match = Match.objects.select_related('user1__user', 'user2__user').filter(id=match_id).first()
+        return MatchSerializer(match).data if match else None
@@ -0,0 +1,291 @@
+"""
+매칭 이벤트 발행/소비
+
+- 위치 업데이트 시 "user moved" 이벤트를 Redis Stream에 발행합니다.
+  (지역 샤딩을 사용하면 위치를 담당하는 샤드의 Stream으로 발행)
+- 매칭 워커(run_matching_worker)가 이벤트를 소비해 이동한 사용자 기준으로 매칭을 계산합니다.
+- 생성된 매칭은 양쪽 사용자의 pickup 목록에 기록되어 match_check에서 가져갑니다.
+- 매칭이 생성/삭제되면 양쪽 사용자의 알림 채널로 발행되어 롱폴링 중인 요청을 깨우고,
+  WebSocket으로 연결된 사용자에게는 channel layer 그룹으로 바로 전송합니다.
+- 매칭 가능 인원 수(matchable_count)가 바뀌어도 WebSocket 그룹으로 전송합니다.
+"""
+import time
+
+import redis
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+
+from apps.matching.models import MatchChange
+from apps.matching.redis_client import get_redis
+
+
+USER_MOVED_STREAM = 'matching:user_moved'
+USER_MOVED_GROUP = 'matching-workers'
+USER_MOVED_STREAM_MAXLEN = 100000
+
+PICKUP_KEY = 'matching:pickup:{user_id}'
+PICKUP_TTL_SECONDS = 60 * 60 * 24  # 하루 동안 가져가지 않으면 만료
+
+# 사용자별 매칭 변경 알림 (Redis pub/sub, 롱폴링 match_check가 구독)
+NOTIFY_CHANNEL = 'matching:notify:{user_id}'
+
+# 사용자별 WebSocket 그룹 (Channels, MatchingConsumer가 구독)
+USER_GROUP = 'matching_user_{user_id}'
+
+
+def is_precomputed_mode():
+    """match_check가 미리 계산된 결과를 읽는 모드인지 여부"""
+    return settings.MATCHING_MODE == 'precomputed'
+
+
+def user_moved_stream(shard=None):
+    """샤드별 "user moved" Stream 이름 (샤딩을 사용하지 않으면 공용 Stream)"""
+    if shard is None:
+        return USER_MOVED_STREAM
+    return f'{USER_MOVED_STREAM}:{shard}'
+
+
+def publish_user_moved(user_id, latitude=None, longitude=None):
+    """
+    "user moved" 이벤트 발행
+
+    precomputed 모드가 아니면 소비할 워커가 없으므로 발행하지 않습니다.
+    Redis 장애가 위치 업데이트 실패로 이어지지 않도록 예외는 로그만 남깁니다.
+    """
+    if not is_precomputed_mode():
+        return None
+
+    # 순환 import 방지 (sharding → utils → events)
+    from apps.matching.sharding import is_sharding_enabled, shard_for
+
+    stream = USER_MOVED_STREAM
+    if is_sharding_enabled() and latitude is not None and longitude is not None:
+        stream = user_moved_stream(shard_for(latitude, longitude))
+    try:
+        return get_redis().xadd(
+            stream,
+            {'user_id': user_id, 'ts': time.time()},
+            maxlen=USER_MOVED_STREAM_MAXLEN,
+            approximate=True,
+        )
+    except redis.RedisError as e:
+        print(f'⚠️ user moved 이벤트 발행 실패 (user_id: {user_id}): {str(e)}')
+        return None
+
+
+def ensure_user_moved_group(shard=None):
+    """소비자 그룹 생성 (이미 있으면 무시)"""
+    try:
+        get_redis().xgroup_create(user_moved_stream(shard), USER_MOVED_GROUP, id='0', mkstream=True)
+    except redis.ResponseError as e:
+        if 'BUSYGROUP' not in str(e):
+            raise
+
+
+def read_user_moved(consumer, *, shard=None, count=100, block_ms=5000):
+    """
+    소비자 그룹으로 "user moved" 이벤트 읽기
+
+    Returns:
+        list: [(event_id, user_id), ...]
+    """
+    response = get_redis().xreadgroup(
+        USER_MOVED_GROUP,
+        consumer,
+        {user_moved_stream(shard): '>'},
+        count=count,
+        block=block_ms,
+    )
+    events = []
+    for _stream, entries in response or []:
+        for event_id, fields in entries:
+            events.append((event_id, int(fields['user_id'])))
+    return events
+
+
+def claim_stale_user_moved(consumer, *, shard=None, min_idle_ms=60000, count=100):
+    """
+    다른(또는 중단된) 소비자가 읽고 ack하지 않은 채 min_idle_ms 이상 지난 이벤트를 가져옴 (XAUTOCLAIM)
+
+    워커가 처리 중에 종료되었거나 계산에 실패해 ack하지 않은 이벤트를 다시 처리하기 위해 사용합니다.
+
+    Returns:
+        list: [(event_id, user_id), ...] (Stream에서 이미 삭제된 이벤트는 ack하고 제외)
+    """
+    stream = user_moved_stream(shard)
+    client = get_redis()
+    events = []
+    start_id = '0-0'
+    while True:
+        response = client.xautoclaim(
+            stream, USER_MOVED_GROUP, consumer, min_idle_time=min_idle_ms, start_id=start_id, count=count,
+        )
+        start_id, entries = response[0], response[1]
+        trimmed = [event_id for event_id, fields in entries if not fields]
+        if trimmed:
+            client.xack(stream, USER_MOVED_GROUP, *trimmed)
+        events.extend((event_id, int(fields['user_id'])) for event_id, fields in entries if fields)
+        # 한 번에 너무 많이 가져오지 않도록 count만큼 모이면 중단 (나머지는 다음 주기)
+        if start_id == '0-0' or len(events) >= count:
+            return events
+
+
+def ack_user_moved(event_ids, shard=None):
+    """처리 완료한 이벤트 ack"""
+    if event_ids:
+        get_redis().xack(user_moved_stream(shard), USER_MOVED_GROUP, *event_ids)
+
+
+def publish_match_changes(created=(), deleted=()):
+    """
+    매칭 생성/삭제 결과 기록
+
+    - 양쪽 사용자 각각에 대해 변경 이력(MatchChange)을 남겨 변경분 조회 API(match_changes)가 사용합니다.
+    - 매칭이 생기거나 없어진 양쪽 사용자에게 알림 채널(NOTIFY_CHANNEL)로 알려
+      롱폴링 중인 match_check 요청이 바로 응답하도록 합니다. (모든 모드)
+    - precomputed 모드에서는 새로 생성된 매칭을 양쪽 사용자의 pickup 목록에 추가해,
+      다음 match_check 요청에서 양쪽 모두 새 매칭으로 받게 됩니다.
+
+    Args:
+        created: 생성된 Match 객체 목록
+        deleted: 삭제된 매칭의 (match_id, user1_id, user2_id) 목록
+    """
+    if not created and not deleted:
+        return
+
+    changes = []
+    for match in created:
+        for user_id, other_user_id in ((match.user1_id, match.user2_id), (match.user2_id, match.user1_id)):
+            changes.append(MatchChange(
+                user_id=user_id,
+                match_id=match.id,
+                other_user_id=other_user_id,
+                change_type=MatchChange.CHANGE_CREATED,
+            ))
+    for match_id, user1_id, user2_id in deleted:
+        for user_id, other_user_id in ((user1_id, user2_id), (user2_id, user1_id)):
+            changes.append(MatchChange(
+                user_id=user_id,
+                match_id=match_id,
+                other_user_id=other_user_id,
+                change_type=MatchChange.CHANGE_DELETED,
+            ))
+    MatchChange.objects.bulk_create(changes, batch_size=1000)
+
+    # 트랜잭션 안에서 호출되면 커밋 후에 알림 (알림을 받은 요청이 커밋 전 상태를 읽지 않도록)
+    created, deleted = list(created), list(deleted)
+    transaction.on_commit(lambda: _notify_match_changes(created, deleted))
+
+
+def _notify_match_changes(created, deleted):
+    """pickup 기록 + 알림 채널 발행 + WebSocket 전송"""
+    try:
+        pipe = get_redis().pipeline()
+        if is_precomputed_mode():
+            for match in created:
+                for user_id in (match.user1_id, match.user2_id):
+                    key = PICKUP_KEY.format(user_id=user_id)
+                    pipe.rpush(key, match.id)
+                    pipe.expire(key, PICKUP_TTL_SECONDS)
+
+        notified_user_ids = set()
+        for match in created:
+            notified_user_ids.update((match.user1_id, match.user2_id))
+        for _match_id, user1_id, user2_id in deleted:
+            notified_user_ids.update((user1_id, user2_id))
+        for user_id in notified_user_ids:
+            pipe.publish(NOTIFY_CHANNEL.format(user_id=user_id), 'changed')
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f'⚠️ 매칭 변경 기록 실패: {str(e)}')
+
+    push_match_events(created=created, deleted=deleted)
+
+
+def push_match_events(created=(), deleted=()):
+    """
+    WebSocket으로 연결된 양쪽 사용자에게 매칭 생성/삭제 이벤트 전송 (channel layer 그룹)
+
+    연결이 없는 사용자의 그룹은 비어 있으므로 전송해도 무시됩니다.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    group_send = async_to_sync(channel_layer.group_send)
+    try:
+        for match in created:
+            for user_id, other_user_id in ((match.user1_id, match.user2_id), (match.user2_id, match.user1_id)):
+                group_send(USER_GROUP.format(user_id=user_id), {
+                    'type': 'match.created',
+                    'match_id': match.id,
+                    'other_user_id': other_user_id,
+                })
+        for match_id, user1_id, user2_id in deleted:
+            for user_id, other_user_id in ((user1_id, user2_id), (user2_id, user1_id)):
+                group_send(USER_GROUP.format(user_id=user_id), {
+                    'type': 'match.removed',
+                    'match_id': match_id,
+                    'other_user_id': other_user_id,
+                })
+    except Exception as e:
+        print(f'⚠️ 매칭 이벤트 전송 실패: {str(e)}')
+
+
+def publish_count_changes(counts, radius_km):
+    """
+    매칭 가능 인원 수 변경 전송
+
+    트랜잭션 안에서 호출되면 커밋 후에 전송합니다. (publish_match_changes와 동일)
+
+    Args:
+        counts: {user_id: matchable_count} (값이 바뀐 사용자만)
+        radius_km: 인원 수를 계산한 반경 (km 단위)
+    """
+    if not counts:
+        return
+    counts = dict(counts)
+    transaction.on_commit(lambda: push_count_events(counts, radius_km))
+
+
+def push_count_events(counts, radius_km):
+    """
+    WebSocket으로 연결된 사용자에게 매칭 가능 인원 수 변경 이벤트 전송 (channel layer 그룹)
+
+    움직이지 않아 위치를 보내지 않는 사용자도 다른 사용자의 이동/전체 스윕으로 바뀐 인원 수를 받습니다.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    group_send = async_to_sync(channel_layer.group_send)
+    try:
+        for user_id, matchable_count in counts.items():
+            group_send(USER_GROUP.format(user_id=user_id), {
+                'type': 'count.changed',
+                'matchable_count': matchable_count,
+                'radius': radius_km,
+            })
+    except Exception as e:
+        print(f'⚠️ 매칭 가능 인원 수 전송 실패: {str(e)}')
+
+
+def pop_match_pickups(user_id):
+    """
+    사용자의 pickup 목록을 읽고 비움
+
+    Redis를 사용할 수 없으면 빈 목록을 반환합니다. (match_check는 저장된 최근 매칭으로 응답, pickup은 복구 후 전달)
+
+    Returns:
+        list: 새 매칭 ID 목록 (오래된 순)
+    """
+    key = PICKUP_KEY.format(user_id=user_id)
+    try:
+        pipe = get_redis().pipeline(transaction=True)
+        pipe.lrange(key, 0, -1)
+        pipe.delete(key)
+        match_ids, _ = pipe.execute()
+    except redis.RedisError as e:
+        print(f'⚠️ 매칭 pickup 조회 실패 (user_id: {user_id}): {str(e)}')
+        return []
+    return [int(match_id) for match_id in match_ids]
@@ -0,0 +1,172 @@
+"""
+증분(incremental) 매칭 후보 계산
+
+같은 위치에 머무는 사용자가 반복해서 폴링하면 주변 후보는 거의 바뀌지 않습니다.
+사용자별로 마지막으로 평가한 후보 목록과 커서(마지막 평가 시각)를 캐시에 저장해 두고,
+다음 요청에서는 커서 이후 변경된(User / UserLocation updated_at 기준) 후보만 다시 평가합니다.
+요청자 본인의 위치, 프로필, 이상형(IdealTypeProfile)이 바뀌면 후보 전체를 다시 계산합니다.
+write-behind 모드(LOCATION_WRITE_MODE=write_behind)에서는 기존 후보를 매번 버퍼의 최신 위치로 다시 평가합니다.
+
+MATCHING_MODE=incremental 일 때 match_check와 matchable_count에서 사용합니다.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.users.models import User, IdealTypeProfile, location_regions_for_box
+from apps.users.location_buffer import is_write_behind_enabled, overlay_buffered_locations
+from apps.users.presence import live_user_ids
+from apps.matching.utils import bounding_box, bounding_box_e6, evaluate_candidate, find_matchable_users
+
+
+STATE_KEY = 'matching:incremental:{user_id}:{radius_km}'
+
+# updated_at은 저장 시점에 찍히고 커밋은 그 이후이므로,
+# 커서 직전에 저장되었지만 아직 커밋되지 않은 변경을 놓치지 않도록 여유를 둠
+CURSOR_SLACK = timedelta(seconds=2)
+
+
+def is_incremental_mode():
+    """match_check / matchable_count가 증분 계산을 사용하는지 여부"""
+    return settings.MATCHING_MODE == 'incremental'
+
+
+def _state_key(current_user, radius_km):
+    return STATE_KEY.format(user_id=current_user.id, radius_km=radius_km)
+
+
+def _state_signature(current_user, ideal_type, latitude, longitude):
+    """이 값이 바뀌면 저장된 후보 목록 전체를 다시 계산해야 함"""
+    return (
+        round(float(latitude), 6),
+        round(float(longitude), 6),
+        current_user.gender,
+        current_user.updated_at,
+        ideal_type.updated_at,
+    )
+
+
+def find_matchable_users_incremental(current_user, latitude, longitude, radius_km=0.5, *, load_users=True):
+    """
+    find_matchable_users의 증분 버전
+
+    Args:
+        current_user: User 객체 (현재 사용자)
+        latitude, longitude: 현재 위치
+        radius_km: 반경 (km 단위)
+        load_users: False면 개수만 필요할 때처럼 'user' 객체를 로딩하지 않음
+
+    Returns:
+        list: find_matchable_users와 같은 형식 (load_users=False면 'user' 대신 'user_id')
+    """
+    try:
+        ideal_type = current_user.ideal_type_profile
+    except IdealTypeProfile.DoesNotExist:
+        return []
+
+    now = timezone.now()
+    key = _state_key(current_user, radius_km)
+    signature = _state_signature(current_user, ideal_type, latitude, longitude)
+    state = cache.get(key)
+    loaded_users = {}
+
+    full_refresh_interval = timedelta(seconds=settings.MATCHING_INCREMENTAL_FULL_REFRESH_SECONDS)
+    if (
+        state is None
+        or state['signature'] != signature
+        or now - state['full_at'] > full_refresh_interval
+    ):
+        # 전체 계산 (첫 요청, 이동, 본인 프로필/이상형 변경, 또는 주기적 전체 갱신)
+        # 주기적 전체 갱신은 탈퇴처럼 updated_at 변경으로 잡히지 않는 변화를 반영하기 위함
+        full_at = now
+        print(f'🔄 증분 매칭: 전체 계산 ({current_user.user.username})')
+        matchable_users = find_matchable_users(current_user, latitude, longitude, radius_km=radius_km)
+        loaded_users = {matchable['user'].id: matchable['user'] for matchable in matchable_users}
+        candidates = {
+            matchable['user'].id: {
+                'distance_km': matchable['distance_km'],
+                'match_score': matchable['match_score'],
+            }
+            for matchable in matchable_users
+        }
+    else:
+        full_at = state['full_at']
+        candidates = state['candidates']
+        min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+        min_lat_e6, max_lat_e6, min_lon_e6, max_lon_e6 = bounding_box_e6(latitude, longitude, radius_km)
+
+        # 커서 이후 변경된 사용자 중, 지금 반경 근처에 있거나 기존 후보였던 사용자만 다시 평가
+        changed = Q(updated_at__gt=state['cursor']) | Q(location__updated_at__gt=state['cursor'])
+        if is_write_behind_enabled():
+            # 버퍼에만 기록된 이동은 DB updated_at에 나타나지 않으므로 기존 후보는 항상 버퍼 위치로 다시 평가
+            changed |= Q(id__in=list(candidates))
+        changed_users = list(User.objects.filter(changed).filter(
+            Q(
+                location__region__in=location_regions_for_box(min_lat, max_lat, min_lon, max_lon),
+                location__latitude_e6__range=(min_lat_e6, max_lat_e6),
+                location__longitude_e6__range=(min_lon_e6, max_lon_e6),
+            ) | Q(id__in=list(candidates))
+        ).exclude(id=current_user.id).select_related('user', 'location'))
+
+        eligible_users = [
+            candidate for candidate in changed_users
+            if candidate.matching_consent and candidate.service_active and hasattr(candidate, 'location')
+        ]
+        # write-behind 모드면 Redis 버퍼의 최신 위치로 거리 계산 (find_matchable_users와 동일)
+        overlay_buffered_locations(eligible_users)
+        eligible_ids = {candidate.id for candidate in eligible_users}
+
+        changed_count = 0
+        for candidate in changed_users:
+            changed_count += 1
+            candidates.pop(candidate.id, None)
+            if candidate.id not in eligible_ids:
+                continue
+            matchable = evaluate_candidate(current_user, ideal_type, candidate, latitude, longitude, radius_km)
+            if matchable:
+                loaded_users[candidate.id] = candidate
+                candidates[candidate.id] = {
+                    'distance_km': matchable['distance_km'],
+                    'match_score': matchable['match_score'],
+                }
+        print(f'🔁 증분 매칭: 변경된 후보 {changed_count}명 재평가 ({current_user.user.username})')
+
+    cache.set(
+        key,
+        {
+            'signature': signature,
+            'cursor': now - CURSOR_SLACK,
+            'full_at': full_at,
+            'candidates': candidates,
+        },
+        timeout=settings.MATCHING_INCREMENTAL_FULL_REFRESH_SECONDS,
+    )
+
+    # 저장된 후보 중 지금 접속 중인 사용자만 (접속이 끊긴 후보는 다시 접속하면 그대로 포함)
+    live_ids = live_user_ids(candidates)
+    matchable_users = [
+        {
+            'user_id': user_id,
+            'distance_km': info['distance_km'],
+            'distance_m': info['distance_km'] * 1000,
+            'match_score': info['match_score'],
+        }
+        for user_id, info in candidates.items()
+        if user_id in live_ids
+    ]
+
+    if load_users and matchable_users:
+        missing_ids = [m['user_id'] for m in matchable_users if m['user_id'] not in loaded_users]
+        users = {**User.objects.select_related('user', 'location').in_bulk(missing_ids), **loaded_users}
+        matchable_users = [
+            {**matchable, 'user': users[matchable['user_id']]}
+            for matchable in matchable_users
+            if matchable['user_id'] in users
+        ]
+
+    # 점수 높은 순 → 거리 가까운 순으로 정렬
+    matchable_users.sort(key=lambda x: (-x['match_score'], x['distance_km']))
+    return matchable_users
@@ -0,0 +1,24 @@
+"""
+매칭 변경 이력 정리
+
+보관 기간(MATCHING_CHANGE_RETENTION_DAYS)이 지난 MatchChange를 삭제합니다.
+그보다 오래된 커서로 변경분을 조회하면 현재 매칭 전체를 다시 받습니다(reset).
+
+    python manage.py prune_match_changes
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.matching.utils import prune_match_changes
+
+
+class Command(BaseCommand):
+    help = '보관 기간이 지난 매칭 변경 이력을 삭제합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='보관 기간 (일, 기본값: MATCHING_CHANGE_RETENTION_DAYS)')
+
+    def handle(self, *args, **options):
+        retention_days = options['days'] or settings.MATCHING_CHANGE_RETENTION_DAYS
+        deleted_count = prune_match_changes(retention_days)
+        self.stdout.write(f'✅ 매칭 변경 이력 {deleted_count}건 삭제 (보관 기간: {retention_days}일)')
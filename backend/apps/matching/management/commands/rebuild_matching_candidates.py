@@ -0,0 +1,23 @@
+"""
+매칭 후보 읽기 모델 재생성
+
+전체 사용자의 matching_candidates 행을 User / UserLocation 기준으로 다시 만듭니다.
+MATCHING_READ_MODEL을 처음 켜기 전, 또는 선택 항목 목록(apps.users.vocabulary)을 바꾼 뒤 실행합니다.
+이후에는 User / UserLocation 저장 시 자동으로 갱신됩니다.
+
+    python manage.py rebuild_matching_candidates
+"""
+from django.core.management.base import BaseCommand
+
+from apps.matching.candidates import rebuild_matching_candidates
+
+
+class Command(BaseCommand):
+    help = '매칭 후보 읽기 모델(matching_candidates)을 다시 만듭니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='한 트랜잭션에서 처리할 사용자 수')
+
+    def handle(self, *args, **options):
+        candidate_count = rebuild_matching_candidates(batch_size=options['batch_size'])
+        self.stdout.write(f'✅ 매칭 후보 {candidate_count}명 갱신')
@@ -0,0 +1,71 @@
+"""
+전체 매칭 스윕
+
+매칭 동의 사용자 전체를 주기적으로 한 번에 계산해 Match 테이블과 matchable_count를 갱신합니다.
+MATCHING_MODE=precomputed 일 때 match_check / matchable_count가 스윕 결과를 제공합니다.
+
+    python manage.py run_matching_sweep            # MATCHING_SWEEP_INTERVAL_SECONDS 주기로 반복
+    python manage.py run_matching_sweep --once     # 1회만 실행
+    python manage.py run_matching_sweep --workers 8  # 샤드를 8개 프로세스로 병렬 계산
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.matching.sweep import run_sharded_sweep, run_sweep
+
+
+class Command(BaseCommand):
+    help = '매칭 동의 사용자 전체에 대해 매칭과 매칭 가능 인원 수를 주기적으로 계산합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='1회만 실행하고 종료')
+        parser.add_argument('--interval', type=int, default=None, help='스윕 주기 (초, 기본값: MATCHING_SWEEP_INTERVAL_SECONDS)')
+        parser.add_argument('--radius', type=float, default=None, help='매칭 반경 (km, 기본값: MATCHING_RADIUS_KM)')
+        parser.add_argument('--count-radius', type=float, default=None, help='매칭 가능 인원 수 반경 (km, 기본값: MATCHING_COUNT_RADIUS_KM)')
+        parser.add_argument('--workers', type=int, default=1, help='워커 프로세스 수 (2 이상이면 샤드 스윕)')
+        parser.add_argument('--shards', type=int, default=None, help='샤드 수 (기본값: 워커 수 x 4)')
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or settings.MATCHING_SWEEP_INTERVAL_SECONDS
+        radius_km = options['radius'] or settings.MATCHING_RADIUS_KM
+        count_radius_km = options['count_radius'] or settings.MATCHING_COUNT_RADIUS_KM
+
+        self.stdout.write(
+            f'🚀 매칭 스윕 시작 (매칭 반경: {radius_km * 1000:.0f}m, '
+            f'카운트 반경: {count_radius_km * 1000:.0f}m, 주기: {interval}초)'
+        )
+
+        while True:
+            close_old_connections()
+            started = time.monotonic()
+            try:
+                if options['workers'] > 1:
+                    stats = run_sharded_sweep(
+                        radius_km,
+                        count_radius_km,
+                        workers=options['workers'],
+                        shard_count=options['shards'],
+                    )
+                else:
+                    stats = run_sweep(radius_km, count_radius_km)
+            except Exception as e:
+                self.stderr.write(f'❌ 매칭 스윕 실패: {str(e)}')
+            else:
+                self.stdout.write(
+                    f'✅ 사용자 {stats["users"]}명 / 근접 쌍 {stats["pairs"]}개, '
+                    f'새 매칭 {stats["created"]}개, 삭제 {stats["deleted"]}개, '
+                    f'카운트 갱신 {stats["counted"]}명 ({stats["elapsed_ms"]:.0f}ms)'
+                )
+                for shard in stats.get('shards', []):
+                    self.stdout.write(
+                        f'   샤드 {shard["shard"]} (행 {shard["rows"][0]}~{shard["rows"][1]}): '
+                        f'사용자 {shard["users"]}명 (+halo {shard["halo_users"]}명), '
+                        f'근접 쌍 {shard["pairs"]}개, {shard["elapsed_ms"]:.0f}ms'
+                    )
+
+            if options['once']:
+                return
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
@@ -0,0 +1,112 @@
+"""
+매칭 워커
+
+위치 업데이트 시 발행된 "user moved" 이벤트를 소비해 이동한 사용자 기준으로 매칭을 계산합니다.
+MATCHING_MODE=precomputed 일 때 사용합니다.
+
+    python manage.py run_matching_worker --consumer worker-1
+    python manage.py run_matching_worker --shard seoul   # 지역 샤딩 (MATCHING_SHARD_MAP)
+
+계산에 성공한 사용자의 이벤트만 ack합니다. 실패했거나 워커가 중단되어 ack되지 않은 이벤트는
+시작 시와 --reclaim-interval초마다 --reclaim-idle-ms 이상 대기 중인 것을 가져와(XAUTOCLAIM) 다시 처리합니다.
+"""
+import socket
+import threading
+import time
+
+import redis
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.matching.events import (
+    ack_user_moved,
+    claim_stale_user_moved,
+    ensure_user_moved_group,
+    read_user_moved,
+)
+from apps.matching.sharding import serve_shard_rpc
+from apps.matching.utils import evaluate_moved_user
+
+
+REDIS_RETRY_MAX_SECONDS = 30  # Redis 오류 시 재시도 대기 시간 최대값
+
+
+class Command(BaseCommand):
+    help = '"user moved" 이벤트를 소비해 매칭을 미리 계산합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--consumer', default=socket.gethostname(), help='소비자 이름 (워커마다 달라야 함)')
+        parser.add_argument('--batch-size', type=int, default=100, help='한 번에 읽을 이벤트 수')
+        parser.add_argument('--block-ms', type=int, default=5000, help='이벤트 대기 시간 (ms)')
+        parser.add_argument('--radius', type=float, default=None, help='매칭 반경 (km, 기본값: MATCHING_RADIUS_KM)')
+        parser.add_argument('--shard', default=None, help='담당 샤드 이름 (지역 샤딩 사용 시)')
+        parser.add_argument('--reclaim-interval', type=int, default=60, help='ack되지 않은 이벤트 재처리 주기 (초)')
+        parser.add_argument('--reclaim-idle-ms', type=int, default=60000, help='재처리할 이벤트의 최소 대기 시간 (ms)')
+
+    def handle(self, *args, **options):
+        consumer = options['consumer']
+        radius_km = options['radius'] or settings.MATCHING_RADIUS_KM
+        shard = options['shard']
+
+        ensure_user_moved_group(shard)
+        if shard is not None:
+            # 다른 샤드에서 넘어오는 반경 조회 요청은 별도 스레드에서 처리
+            threading.Thread(target=serve_shard_rpc, args=(shard,), daemon=True).start()
+        self.stdout.write(
+            f'🚀 매칭 워커 시작: {consumer} (반경: {radius_km * 1000:.0f}m'
+            f'{f", 샤드: {shard}" if shard else ""})'
+        )
+
+        retry_seconds = 1
+        next_reclaim = 0.0  # 시작 시 바로 재처리
+        while True:
+            try:
+                if time.monotonic() >= next_reclaim:
+                    stale = claim_stale_user_moved(
+                        consumer, shard=shard, min_idle_ms=options['reclaim_idle_ms'], count=options['batch_size'],
+                    )
+                    next_reclaim = time.monotonic() + options['reclaim_interval']
+                    if stale:
+                        self.stdout.write(f'♻️ ack되지 않은 이벤트 {len(stale)}건 재처리')
+                        self._process(stale, radius_km, shard)
+
+                events = read_user_moved(consumer, shard=shard, count=options['batch_size'], block_ms=options['block_ms'])
+                if events:
+                    self._process(events, radius_km, shard)
+                retry_seconds = 1
+            except redis.RedisError as e:
+                # ack하지 못한 이벤트는 pending으로 남아 재처리 주기에 다시 가져옴
+                self.stderr.write(f'❌ Redis 오류, {retry_seconds}초 후 재시도: {str(e)}')
+                time.sleep(retry_seconds)
+                retry_seconds = min(retry_seconds * 2, REDIS_RETRY_MAX_SECONDS)
+
+    def _process(self, events, radius_km, shard):
+        """이벤트 배치 처리 후 계산에 성공한 사용자의 이벤트만 ack"""
+        close_old_connections()
+        started = time.monotonic()
+
+        # 같은 배치 안에서 여러 번 이동한 사용자는 한 번만 계산 (항상 DB의 최신 위치 사용)
+        event_ids_by_user = {}
+        for event_id, user_id in events:
+            event_ids_by_user.setdefault(user_id, []).append(event_id)
+
+        new_count = 0
+        acked = []
+        for user_id, event_ids in event_ids_by_user.items():
+            try:
+                result = evaluate_moved_user(user_id, radius_km, shard=shard)
+            except Exception as e:
+                # ack하지 않음 → pending으로 남아 --reclaim-interval 후 다시 처리
+                self.stderr.write(f'❌ 매칭 계산 실패 (user_id: {user_id}): {str(e)}')
+                continue
+            acked.extend(event_ids)
+            if result:
+                new_count += len(result[0])
+
+        ack_user_moved(acked, shard)
+        self.stdout.write(
+            f'✅ 이벤트 {len(events)}건 / 사용자 {len(event_ids_by_user)}명 처리 '
+            f'(실패 {len(events) - len(acked)}건), '
+            f'새 매칭 {new_count}개 ({(time.monotonic() - started) * 1000:.0f}ms)'
+        )
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0004_match_match_score'),
+        ('users', '0007_user_users_updated_047d73_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('match_id', models.BigIntegerField(verbose_name='매칭 ID')),
+                ('other_user_id', models.BigIntegerField(verbose_name='상대방 사용자 ID')),
+                ('change_type', models.CharField(choices=[('created', '생성'), ('deleted', '삭제')], max_length=10, verbose_name='변경 유형')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='변경 시간')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_changes', to='users.user', verbose_name='사용자')),
+            ],
+            options={
+                'verbose_name': '매칭 변경 이력',
+                'verbose_name_plural': '매칭 변경 이력들',
+                'db_table': 'match_changes',
+                'indexes': [models.Index(fields=['user', 'id'], name='match_chang_user_id_7e66b2_idx'), models.Index(fields=['created_at'], name='match_chang_created_d261b8_idx')],
+            },
+        ),
+    ]
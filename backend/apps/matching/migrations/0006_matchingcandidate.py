@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0005_matchchange'),
+        ('users', '0011_userlocation_region'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchingCandidate',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='matching_candidate', serialize=False, to='users.user', verbose_name='사용자')),
+                ('latitude', models.FloatField(verbose_name='위도')),
+                ('longitude', models.FloatField(verbose_name='경도')),
+                ('region', models.IntegerField(verbose_name='지역')),
+                ('recorded_at', models.DateTimeField(blank=True, null=True, verbose_name='위치 측정 시간')),
+                ('gender', models.CharField(max_length=1, verbose_name='성별')),
+                ('age', models.SmallIntegerField(verbose_name='나이')),
+                ('height', models.SmallIntegerField(verbose_name='키(cm)')),
+                ('mbti', models.SmallIntegerField(blank=True, null=True, verbose_name='MBTI 번호')),
+                ('personality_mask', models.IntegerField(default=0, verbose_name='성격 비트마스크')),
+                ('interest_mask', models.IntegerField(default=0, verbose_name='관심사 비트마스크')),
+                ('encoded_exactly', models.BooleanField(default=True, verbose_name='비트마스크로 표현 가능')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='업데이트 시간')),
+            ],
+            options={
+                'verbose_name': '매칭 후보',
+                'verbose_name_plural': '매칭 후보들',
+                'db_table': 'matching_candidates',
+                'indexes': [models.Index(condition=models.Q(('gender', 'M')), fields=['latitude', 'longitude'], include=('user', 'region', 'recorded_at', 'age', 'height', 'mbti', 'personality_mask', 'interest_mask', 'encoded_exactly'), name='matching_candidates_m_idx'), models.Index(condition=models.Q(('gender', 'F')), fields=['latitude', 'longitude'], include=('user', 'region', 'recorded_at', 'age', 'height', 'mbti', 'personality_mask', 'interest_mask', 'encoded_exactly'), name='matching_candidates_f_idx')],
+            },
+        ),
+    ]
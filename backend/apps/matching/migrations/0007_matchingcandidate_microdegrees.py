@@ -0,0 +1,65 @@
+from django.db import migrations, models
+
+
+CANDIDATE_INDEX_INCLUDE = (
+    'user', 'region', 'recorded_at', 'age', 'height', 'mbti', 'personality_mask', 'interest_mask', 'encoded_exactly',
+)
+
+
+class Migration(migrations.Migration):
+    """매칭 후보 좌표를 float에서 마이크로도 정수로 변경 (user_locations와 같은 표현)"""
+
+    dependencies = [
+        ('matching', '0006_matchingcandidate'),
+        ('users', '0012_location_microdegrees'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(model_name='matchingcandidate', name='matching_candidates_m_idx'),
+        migrations.RemoveIndex(model_name='matchingcandidate', name='matching_candidates_f_idx'),
+        migrations.AddField(
+            model_name='matchingcandidate',
+            name='latitude_e6',
+            field=models.IntegerField(null=True, verbose_name='위도 (마이크로도)'),
+        ),
+        migrations.AddField(
+            model_name='matchingcandidate',
+            name='longitude_e6',
+            field=models.IntegerField(null=True, verbose_name='경도 (마이크로도)'),
+        ),
+        migrations.RunSQL(
+            'UPDATE matching_candidates SET latitude_e6 = round(latitude * 1000000)::integer, '
+            'longitude_e6 = round(longitude * 1000000)::integer',
+            'UPDATE matching_candidates SET latitude = latitude_e6 / 1000000.0, longitude = longitude_e6 / 1000000.0',
+        ),
+        migrations.RemoveField(model_name='matchingcandidate', name='latitude'),
+        migrations.RemoveField(model_name='matchingcandidate', name='longitude'),
+        migrations.AlterField(
+            model_name='matchingcandidate',
+            name='latitude_e6',
+            field=models.IntegerField(verbose_name='위도 (마이크로도)'),
+        ),
+        migrations.AlterField(
+            model_name='matchingcandidate',
+            name='longitude_e6',
+            field=models.IntegerField(verbose_name='경도 (마이크로도)'),
+        ),
+        migrations.AddIndex(
+            model_name='matchingcandidate',
+            index=models.Index(
+                condition=models.Q(('gender', 'M')),
+                fields=['latitude_e6', 'longitude_e6'],
+                include=CANDIDATE_INDEX_INCLUDE,
+                name='matching_candidates_m_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='matchingcandidate',
+            index=models.Index(
+                condition=models.Q(('gender', 'F')),
+                fields=['latitude_e6', 'longitude_e6'],
+                include=CANDIDATE_INDEX_INCLUDE,
+                name='matching_candidates_f_idx',
+            ),
+        ),
+    ]
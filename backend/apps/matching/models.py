@@ -1,6 +1,6 @@
 from django.db import models
 from django.core.exceptions import ValidationError
-from apps.users.models import User
+from apps.users.models import MicrodegreeCoordinates, User
 
 
 class Match(models.Model):
@@ -114,3 +114,103 @@ class Notification(models.Model):
         if self.fcm_token:
             return f"{self.user.user.username}의 푸시 토큰({self.device_type})"
         return f"{self.user.user.username}의 알림 - {self.match}"
+
+
+class MatchChange(models.Model):
+    """매칭 변경 이력 모델
+
+    매칭이 생성/삭제될 때마다 양쪽 사용자 각각에 대해 1행씩 기록합니다.
+    id가 단조 증가하는 시퀀스(커서) 역할을 하며, 클라이언트는 마지막으로 받은 id 이후의 변경만 조회합니다.
+    삭제된 매칭도 이력에 남아야 하므로 Match를 FK가 아닌 ID로 저장합니다.
+    """
+    CHANGE_CREATED = 'created'
+    CHANGE_DELETED = 'deleted'
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='match_changes',
+        verbose_name='사용자'
+    )
+    match_id = models.BigIntegerField(verbose_name='매칭 ID')
+    other_user_id = models.BigIntegerField(verbose_name='상대방 사용자 ID')
+    change_type = models.CharField(
+        max_length=10,
+        choices=[(CHANGE_CREATED, '생성'), (CHANGE_DELETED, '삭제')],
+        verbose_name='변경 유형'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='변경 시간')
+
+    class Meta:
+        db_table = 'match_changes'
+        verbose_name = '매칭 변경 이력'
+        verbose_name_plural = '매칭 변경 이력들'
+        indexes = [
+            models.Index(fields=['user', 'id']),
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: 매칭 {self.match_id} {self.change_type}"
+
+
+# 반경 조회가 읽는 컬럼 (부분 인덱스에 INCLUDE)
+CANDIDATE_INDEX_INCLUDE = [
+    'user', 'region', 'recorded_at', 'age', 'height', 'mbti', 'personality_mask', 'interest_mask', 'encoded_exactly',
+]
+
+
+class MatchingCandidate(MicrodegreeCoordinates, models.Model):
+    """매칭 후보 읽기 모델
+
+    매칭 동의 ON + 서비스 활성화 + 위치가 있는 사용자만 1행씩 저장하는 좁은 테이블입니다.
+    반경 조회가 users / user_locations JOIN과 JSON 목록 디코딩 없이 이 테이블만 읽도록
+    좌표는 마이크로도 정수, 성격/관심사는 비트마스크, MBTI는 번호로 저장합니다. (apps.users.vocabulary 참고)
+    User / UserLocation 저장과 같은 트랜잭션에서 갱신됩니다. (apps.matching.candidates.sync_matching_candidates)
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='matching_candidate',
+        verbose_name='사용자'
+    )
+    latitude_e6 = models.IntegerField(verbose_name='위도 (마이크로도)')
+    longitude_e6 = models.IntegerField(verbose_name='경도 (마이크로도)')
+    region = models.IntegerField(verbose_name='지역')
+    recorded_at = models.DateTimeField(null=True, blank=True, verbose_name='위치 측정 시간')
+    
+    gender = models.CharField(max_length=1, verbose_name='성별')
+    age = models.SmallIntegerField(verbose_name='나이')
+    height = models.SmallIntegerField(verbose_name='키(cm)')
+    mbti = models.SmallIntegerField(null=True, blank=True, verbose_name='MBTI 번호')
+    personality_mask = models.IntegerField(default=0, verbose_name='성격 비트마스크')
+    interest_mask = models.IntegerField(default=0, verbose_name='관심사 비트마스크')
+    # 성격/관심사/MBTI 중 목록에 없는 값이 있으면 False (점수 계산 시 원본 프로필로 계산)
+    encoded_exactly = models.BooleanField(default=True, verbose_name='비트마스크로 표현 가능')
+    
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='업데이트 시간')
+
+    class Meta:
+        db_table = 'matching_candidates'
+        verbose_name = '매칭 후보'
+        verbose_name_plural = '매칭 후보들'
+        # 반경 조회는 항상 선호 성별 조건이 붙으므로 성별별 부분 인덱스로 나누고,
+        # 점수 계산에 필요한 컬럼을 INCLUDE해 테이블을 읽지 않고(index-only scan) 후보를 가져옴
+        indexes = [
+            models.Index(
+                fields=['latitude_e6', 'longitude_e6'],
+                include=CANDIDATE_INDEX_INCLUDE,
+                condition=models.Q(gender='M'),
+                name='matching_candidates_m_idx',
+            ),
+            models.Index(
+                fields=['latitude_e6', 'longitude_e6'],
+                include=CANDIDATE_INDEX_INCLUDE,
+                condition=models.Q(gender='F'),
+                name='matching_candidates_f_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}의 매칭 후보 ({self.latitude}, {self.longitude})"
@@ -0,0 +1,25 @@
+"""
+매칭용 Redis 클라이언트
+"""
+from functools import lru_cache
+
+import redis
+import redis.asyncio
+from django.conf import settings
+
+
+@lru_cache(maxsize=1)
+def get_redis():
+    """
+    매칭 이벤트/결과 저장에 사용하는 Redis 클라이언트 (프로세스당 1개, 커넥션 풀 공유)
+    """
+    return redis.Redis.from_url(settings.MATCHING_REDIS_URL, decode_responses=True)
+
+
+def get_async_redis():
+    """
+    async 뷰(롱폴링 등)에서 사용하는 Redis 클라이언트
+
+    이벤트 루프에 묶이므로 요청마다 만들고 사용 후 aclose() 합니다.
+    """
+    return redis.asyncio.Redis.from_url(settings.MATCHING_REDIS_URL, decode_responses=True)
@@ -0,0 +1,10 @@
+"""
+WebSocket URL configuration for matching app.
+"""
+from django.urls import path
+
+from . import consumers
+
+websocket_urlpatterns = [
+    path('ws/matching/', consumers.MatchingConsumer.as_asgi()),
+]
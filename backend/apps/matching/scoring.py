@@ -0,0 +1,189 @@
+"""
+DB 점수 계산 (MATCHING_SQL_SCORING)
+
+반경 근처 후보를 모두 User 객체로 로딩해 check_match_criteria로 점수를 매기는 대신,
+성별/나이/키 필터링과 MBTI 일치, 성격/관심사 F1 점수(priority_1..3 가중치)를 SQL 한 문장에서 계산하고
+50점 이상인 후보만 점수 → 거리 순으로 MATCHING_SQL_LIMIT명까지 가져옵니다.
+
+성격/관심사는 users.personality_ids / interest_ids(정수 ID 배열, GIN 인덱스)로 비교합니다.
+점수가 0보다 크려면 선호 MBTI이거나 가중치가 있는 목록과 겹치는 항목이 있어야 하므로,
+이 조건(= ANY / &&)으로 GIN 인덱스에서 후보를 먼저 추린 뒤 점수를 계산합니다.
+
+거리는 DB에 저장된 위치로 계산합니다. (write-behind 모드에서는 최대 LOCATION_FLUSH_INTERVAL_SECONDS 이전 위치)
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from apps.users.models import COORDINATE_SCALE, User, UserLocation, location_regions_for_box
+from apps.users.presence import all_live_user_ids
+from apps.matching.candidates import MATCH_SCORE_THRESHOLD, preferred_genders, priority_weights
+from apps.matching.utils import EARTH_RADIUS_KM, bounding_box, bounding_box_e6
+
+
+def _f1_score_sql(column, name):
+    """
+    정수 ID 배열 컬럼의 F1 Score × 가중치 SQL (check_match_criteria의 calculate_f1_score와 같은 식)
+
+    배열은 중복 없이 저장되므로 cardinality가 set 크기, 교집합 원소 수가 일치 개수입니다.
+    """
+    precision = f'(matches / %({name}_total)s)'
+    recall = f'(matches / cardinality({column}))'
+    return f'''
+        COALESCE((
+            SELECT 2 * ({precision} * {recall}) / ({precision} + {recall}) * %({name}_weight)s
+            FROM (
+                SELECT count(*)::float8 AS matches
+                FROM unnest({column}) AS item
+                WHERE item = ANY(%({name}_ids)s::integer[])
+            ) overlap
+            WHERE matches > 0
+        ), 0)'''
+
+
+def _distance_km_sql(lat_column, lon_column):
+    """마이크로도 컬럼과 기준 위치 사이의 Haversine 거리 (km) SQL (calculate_distance_km과 같은 식)"""
+    lat = f'radians({lat_column} / {float(COORDINATE_SCALE)})'
+    lon = f'radians({lon_column} / {float(COORDINATE_SCALE)})'
+    return f'''
+        {EARTH_RADIUS_KM} * 2 * asin(sqrt(
+            power(sin(({lat} - radians(%(latitude)s)) / 2), 2)
+            + cos(radians(%(latitude)s)) * cos({lat}) * power(sin(({lon} - radians(%(longitude)s)) / 2), 2)
+        ))'''
+
+
+SCORED_CANDIDATES_SQL = f'''
+    SELECT user_id, distance_km, match_score
+    FROM (
+        SELECT
+            u.id AS user_id,
+            {_distance_km_sql('l.latitude_e6', 'l.longitude_e6')} AS distance_km,
+            LEAST(
+                CASE WHEN u.mbti = ANY(%(mbti)s::varchar[]) THEN %(mbti_weight)s ELSE 0 END
+                + {_f1_score_sql('u.personality_ids', 'personality')}
+                + {_f1_score_sql('u.interest_ids', 'interest')},
+                100
+            ) AS match_score
+        FROM {User._meta.db_table} u
+        JOIN {UserLocation._meta.db_table} l ON l.user_id = u.id
+        WHERE u.matching_consent
+          AND u.service_active
+          AND u.id <> %(user_id)s
+          AND u.gender = ANY(%(genders)s::varchar[])
+          AND (%(age_min)s::integer IS NULL OR u.age BETWEEN %(age_min)s AND %(age_max)s)
+          AND (%(height_min)s::integer IS NULL OR u.height BETWEEN %(height_min)s AND %(height_max)s)
+          AND l.region = ANY(%(regions)s::integer[])
+          AND l.latitude_e6 BETWEEN %(min_lat_e6)s AND %(max_lat_e6)s
+          AND l.longitude_e6 BETWEEN %(min_lon_e6)s AND %(max_lon_e6)s
+          AND {{live_condition}}
+          AND (
+              u.mbti = ANY(%(mbti)s::varchar[])
+              OR u.personality_ids && %(personality_ids)s::integer[]
+              OR u.interest_ids && %(interest_ids)s::integer[]
+          )
+    ) scored
+    WHERE distance_km <= %(radius_km)s AND match_score >= %(threshold)s
+    ORDER BY match_score DESC, distance_km
+    LIMIT %(limit)s
+'''
+
+
+def _score_params(ideal_type):
+    """이상형 프로필 → 점수 계산 파라미터 (가중치가 없거나 목록이 비어 있는 항목은 점수에서 제외)"""
+    weights = priority_weights(ideal_type)
+
+    mbti_weight = weights.get('mbti', 0.0)
+    preferred_mbti = [mbti for mbti in (ideal_type.preferred_mbti or []) if isinstance(mbti, str) and mbti]
+    personality_weight = weights.get('personality', 0.0) if ideal_type.preferred_personality else 0.0
+    interest_weight = weights.get('interests', 0.0) if ideal_type.preferred_interests else 0.0
+
+    return {
+        'mbti': preferred_mbti if mbti_weight > 0 else [],
+        'mbti_weight': mbti_weight,
+        'personality_ids': ideal_type.preferred_personality_ids if personality_weight > 0 else [],
+        'personality_weight': personality_weight,
+        'personality_total': float(len(ideal_type.preferred_personality_ids) or 1),
+        'interest_ids': ideal_type.preferred_interest_ids if interest_weight > 0 else [],
+        'interest_weight': interest_weight,
+        'interest_total': float(len(ideal_type.preferred_interest_ids) or 1),
+    }
+
+
+def search_scored_candidates(current_user, ideal_type, latitude, longitude, radius_km, limit):
+    """
+    반경 내 매칭 가능한 후보를 DB에서 점수 계산까지 마쳐서 가져오기
+
+    Returns:
+        list: [(user_id, distance_km, match_score), ...] (점수 → 거리 순, 최대 limit명)
+    """
+    genders = preferred_genders(ideal_type, current_user.gender)
+    params = _score_params(ideal_type)
+    if not genders or not (params['mbti'] or params['personality_ids'] or params['interest_ids']):
+        # 선호 성별이 없거나 점수를 받을 수 있는 항목이 없으면 50점을 넘을 수 없음
+        return []
+
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    min_lat_e6, max_lat_e6, min_lon_e6, max_lon_e6 = bounding_box_e6(latitude, longitude, radius_km)
+    has_age_range = bool(ideal_type.age_min and ideal_type.age_max)
+    has_height_range = bool(ideal_type.height_min and ideal_type.height_max)
+    params.update({
+        'latitude': float(latitude),
+        'longitude': float(longitude),
+        'radius_km': float(radius_km),
+        'user_id': current_user.id,
+        'genders': genders,
+        'age_min': ideal_type.age_min if has_age_range else None,
+        'age_max': ideal_type.age_max if has_age_range else None,
+        'height_min': ideal_type.height_min if has_height_range else None,
+        'height_max': ideal_type.height_max if has_height_range else None,
+        'regions': location_regions_for_box(min_lat, max_lat, min_lon, max_lon),
+        'min_lat_e6': min_lat_e6,
+        'max_lat_e6': max_lat_e6,
+        'min_lon_e6': min_lon_e6,
+        'max_lon_e6': max_lon_e6,
+        'threshold': MATCH_SCORE_THRESHOLD,
+        'limit': limit,
+    })
+
+    # 최근 PRESENCE_WINDOW_SECONDS 안에 확인된 사용자만 (Redis를 사용할 수 없으면 위치 갱신 시각으로 판단)
+    live_ids = all_live_user_ids()
+    if live_ids is None:
+        live_condition = 'l.updated_at >= %(live_since)s'
+        params['live_since'] = timezone.now() - timedelta(seconds=settings.PRESENCE_WINDOW_SECONDS)
+    else:
+        live_condition = 'u.id = ANY(%(live_ids)s::bigint[])'
+        params['live_ids'] = live_ids
+
+    with connection.cursor() as cursor:
+        cursor.execute(SCORED_CANDIDATES_SQL.format(live_condition=live_condition), params)
+        return cursor.fetchall()
+
+
+def find_matchable_users_scored(current_user, ideal_type, latitude, longitude, radius_km):
+    """
+    DB 점수 계산으로 find_matchable_users와 같은 형태의 결과 계산 (최대 MATCHING_SQL_LIMIT명)
+
+    Returns:
+        list: 매칭 가능한 사용자 리스트 ({'user', 'distance_km', 'distance_m', 'match_score'}, 점수 → 거리 순)
+    """
+    rows = search_scored_candidates(
+        current_user, ideal_type, latitude, longitude, radius_km, settings.MATCHING_SQL_LIMIT,
+    )
+    users = User.objects.select_related('user', 'location').in_bulk([user_id for user_id, _distance_km, _score in rows])
+
+    matchable_users = [
+        {
+            'user': users[user_id],
+            'distance_km': distance_km,
+            'distance_m': distance_km * 1000,
+            'match_score': match_score,
+        }
+        for user_id, distance_km, match_score in rows
+        if user_id in users
+    ]
+
+    print(f'   최종 매칭 가능 (DB 점수 계산): {len(matchable_users)}명')
+
+    return matchable_users
@@ -0,0 +1,311 @@
+"""
+지역 샤딩
+
+여러 도시에서 운영하면 모든 서버가 전체 사용자를 조회/스캔하게 됩니다.
+geohash 접두사 단위의 지역을 매칭 워커 그룹(샤드)에 할당하고(MATCHING_SHARD_MAP),
+- 위치 이벤트는 위치를 담당하는 샤드의 Stream으로 발행하고 (events.publish_user_moved)
+- 반경 조회(find_matchable_users)는 담당 샤드에 Redis로 요청해 계산합니다.
+
+반경이 샤드 경계를 넘으면 걸치는 샤드 모두에 요청을 나눠 보내고(handoff),
+각 샤드는 자기 지역에 있는 후보만 돌려주므로 결과를 그대로 합치면 됩니다.
+지역을 나눠 새 샤드에 할당하면 노드를 추가할 수 있습니다.
+
+로컬에서는 샤드별로 워커를 하나씩 띄워 테스트할 수 있습니다.
+
+    MATCHING_SHARD_MAP=wydm:seoul,wy7:busan python manage.py run_matching_worker --shard seoul
+    MATCHING_SHARD_MAP=wydm:seoul,wy7:busan python manage.py run_matching_worker --shard busan
+    MATCHING_SHARD_MAP=wydm:seoul,wy7:busan python manage.py run_matching_worker --shard default
+"""
+import json
+import math
+import time
+import uuid
+
+import redis
+from django.conf import settings
+
+from apps.users.models import User, IdealTypeProfile, location_regions_for_box
+from apps.users.location_buffer import overlay_buffered_locations
+from apps.users.presence import filter_live_users
+from apps.matching.redis_client import get_redis
+from apps.matching.utils import bounding_box, bounding_box_e6, evaluate_candidate
+from apps.matching.candidates import search_candidates
+
+
+DEFAULT_SHARD = 'default'
+
+RPC_QUEUE_KEY = 'matching:shard:{shard}:rpc'
+RPC_REPLY_KEY = 'matching:shard:reply:{request_id}'
+RPC_REPLY_TTL_SECONDS = 60
+RPC_RETRY_MAX_SECONDS = 30  # Redis 오류 시 재시도 대기 시간 최대값
+
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def geohash_encode(latitude, longitude, precision=12):
+    """위도/경도를 geohash 문자열로 변환"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True  # 짝수 번째 비트는 경도
+
+    while len(geohash) < precision:
+        value_range, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (value_range[0] + value_range[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            value_range[0] = mid
+        else:
+            bits = bits << 1
+            value_range[1] = mid
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(geohash)
+
+
+def is_sharding_enabled():
+    """샤드 맵이 설정되어 있는지 여부"""
+    return bool(settings.MATCHING_SHARD_MAP)
+
+
+def shard_for(latitude, longitude):
+    """위치를 담당하는 샤드 이름 (가장 긴 geohash 접두사 기준)"""
+    shard_map = settings.MATCHING_SHARD_MAP
+    if not shard_map:
+        return DEFAULT_SHARD
+    geohash = geohash_encode(float(latitude), float(longitude), max(len(prefix) for prefix in shard_map))
+    for length in range(len(geohash), 0, -1):
+        shard = shard_map.get(geohash[:length])
+        if shard:
+            return shard
+    return DEFAULT_SHARD
+
+
+def shards_for_radius(latitude, longitude, radius_km):
+    """
+    반경 조회가 걸치는 샤드 목록
+
+    샤드 지역(geohash 칸)은 반경보다 훨씬 크므로, 반경의 경계 사각형 꼭짓점/변 중점/중심만 확인합니다.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    latitude, longitude = float(latitude), float(longitude)
+    shards = []
+    for lat in (min_lat, latitude, max_lat):
+        for lon in (min_lon, longitude, max_lon):
+            shard = shard_for(lat, lon)
+            if shard not in shards:
+                shards.append(shard)
+    return shards
+
+
+def find_matchable_users_in_shard(current_user, latitude, longitude, radius_km, shard):
+    """
+    샤드 지역 안에 있는 후보만 대상으로 매칭 가능한 사용자 찾기
+
+    Returns:
+        list: [{'user_id', 'distance_km', 'match_score'}, ...] (Redis로 주고받을 수 있는 형태)
+    """
+    try:
+        ideal_type = current_user.ideal_type_profile
+    except IdealTypeProfile.DoesNotExist:
+        return []
+
+    if settings.MATCHING_READ_MODEL:
+        return [
+            {
+                'user_id': candidate['user_id'],
+                'distance_km': candidate['distance_km'],
+                'match_score': candidate['match_score'],
+            }
+            for candidate in search_candidates(current_user, ideal_type, latitude, longitude, radius_km)
+            if shard_for(candidate['latitude'], candidate['longitude']) == shard
+        ]
+
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    min_lat_e6, max_lat_e6, min_lon_e6, max_lon_e6 = bounding_box_e6(latitude, longitude, radius_km)
+    candidate_users = User.objects.filter(
+        matching_consent=True,
+        service_active=True,
+        location__region__in=location_regions_for_box(min_lat, max_lat, min_lon, max_lon),
+        location__latitude_e6__range=(min_lat_e6, max_lat_e6),
+        location__longitude_e6__range=(min_lon_e6, max_lon_e6),
+    ).exclude(id=current_user.id).select_related('user', 'location')
+
+    matchable_users = []
+    for candidate in overlay_buffered_locations(filter_live_users(candidate_users)):
+        if shard_for(*candidate.location.degrees) != shard:
+            continue
+        matchable = evaluate_candidate(current_user, ideal_type, candidate, latitude, longitude, radius_km)
+        if matchable:
+            matchable_users.append({
+                'user_id': candidate.id,
+                'distance_km': matchable['distance_km'],
+                'match_score': matchable['match_score'],
+            })
+    return matchable_users
+
+
+def request_shards(shards, current_user, latitude, longitude, radius_km):
+    """
+    다른 샤드들에 반경 조회 요청
+
+    요청을 모두 먼저 보낸 뒤 응답을 하나의 마감 시각(MATCHING_SHARD_RPC_TIMEOUT_SECONDS)까지 기다리므로,
+    샤드 경계를 넘는 조회도 샤드 수와 관계없이 최대 한 번의 대기 시간만 걸립니다.
+
+    Returns:
+        dict: {샤드 이름: 계산 결과} (응답 시간 초과/Redis 오류로 응답을 못 받은 샤드는 빠짐)
+    """
+    reply_shards = {}
+    results = {}
+    try:
+        client = get_redis()
+        pipe = client.pipeline()
+        # 응답을 기다리는 마감 시각 (이후에는 호출한 쪽이 직접 계산하므로 샤드는 처리하지 않음)
+        expires_at = time.time() + settings.MATCHING_SHARD_RPC_TIMEOUT_SECONDS
+        for shard in shards:
+            request_id = uuid.uuid4().hex
+            reply_shards[RPC_REPLY_KEY.format(request_id=request_id)] = shard
+            pipe.rpush(RPC_QUEUE_KEY.format(shard=shard), json.dumps({
+                'request_id': request_id,
+                'user_id': current_user.id,
+                'latitude': float(latitude),
+                'longitude': float(longitude),
+                'radius_km': radius_km,
+                'expires_at': expires_at,
+            }))
+        pipe.execute()
+
+        deadline = time.monotonic() + settings.MATCHING_SHARD_RPC_TIMEOUT_SECONDS
+        pending = list(reply_shards)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            # BLPOP timeout은 초 단위 정수 (0은 무기한 대기이므로 최소 1초)
+            response = client.blpop(pending, timeout=max(1, math.ceil(remaining)))
+            if response is None:
+                break
+            reply_key, payload = response
+            pending.remove(reply_key)
+            results[reply_shards[reply_key]] = json.loads(payload)
+    except redis.RedisError as e:
+        print(f'⚠️ 샤드 요청 중 Redis 오류: {str(e)}')
+    return results
+
+
+def serve_shard_rpc(shard, stop_event=None, block_seconds=5):
+    """
+    샤드로 들어온 반경 조회 요청 처리 (매칭 워커의 별도 스레드에서 실행)
+
+    이벤트 처리 중인 워커끼리 서로의 응답을 기다리며 멈추지 않도록 이벤트 루프와 분리합니다.
+    응답 마감 시각(expires_at)이 지난 요청은 계산하지 않고 버립니다.
+    Redis 오류가 나도 스레드가 멈추지 않도록 대기 후 재시도합니다.
+    (멈추면 다른 샤드의 요청이 모두 MATCHING_SHARD_RPC_TIMEOUT_SECONDS를 기다린 뒤 직접 계산하게 됨)
+    """
+    from django.db import close_old_connections
+
+    print(f'🛰️ 샤드 요청 처리 시작 ({shard})')
+    queue_key = RPC_QUEUE_KEY.format(shard=shard)
+    retry_seconds = 1
+    try:
+        while stop_event is None or not stop_event.is_set():
+            try:
+                client = get_redis()
+                response = client.blpop(queue_key, timeout=block_seconds)
+                retry_seconds = 1
+                if response is None:
+                    continue
+                _key, payload = response
+                request = json.loads(payload)
+                if time.time() > request.get('expires_at', float('inf')):
+                    # 샤드가 멈춰 있는 동안 쌓인 요청: 호출한 쪽이 이미 직접 계산했으므로 건너뜀
+                    continue
+
+                close_old_connections()
+                result = _serve_shard_request(request, shard)
+
+                reply_key = RPC_REPLY_KEY.format(request_id=request['request_id'])
+                pipe = client.pipeline()
+                pipe.rpush(reply_key, json.dumps(result))
+                pipe.expire(reply_key, RPC_REPLY_TTL_SECONDS)
+                pipe.execute()
+            except redis.RedisError as e:
+                print(f'⚠️ 샤드 요청 처리 중 Redis 오류 ({shard}), {retry_seconds}초 후 재시도: {str(e)}')
+                time.sleep(retry_seconds)
+                retry_seconds = min(retry_seconds * 2, RPC_RETRY_MAX_SECONDS)
+    except BaseException as e:
+        print(f'❌ 샤드 요청 처리 스레드 비정상 종료 ({shard}): {e!r}')
+        raise
+    finally:
+        print(f'🛑 샤드 요청 처리 종료 ({shard})')
+
+
+def _serve_shard_request(request, shard):
+    """샤드 요청 1건 계산 (실패하면 빈 결과)"""
+    try:
+        current_user = User.objects.select_related('user', 'ideal_type_profile').get(id=request['user_id'])
+        return find_matchable_users_in_shard(
+            current_user,
+            request['latitude'],
+            request['longitude'],
+            request['radius_km'],
+            shard,
+        )
+    except User.DoesNotExist:
+        return []
+    except Exception as e:
+        print(f'❌ 샤드 요청 처리 실패 ({shard}, user_id: {request["user_id"]}): {str(e)}')
+        return []
+
+
+def find_matchable_users_routed(current_user, latitude, longitude, radius_km=0.5, local_shard=None):
+    """
+    find_matchable_users의 샤드 라우팅 버전
+
+    반경이 걸치는 샤드마다 담당 샤드에서 계산하고 결과를 합칩니다.
+    local_shard(현재 프로세스가 담당하는 샤드)는 직접 계산하고,
+    응답하지 않는 샤드(시간 초과, Redis 오류)도 직접 계산해 매칭이 누락되지 않도록 합니다.
+    웹 프로세스는 local_shard=DEFAULT_SHARD로 호출해 default 샤드는 요청 없이 직접 계산합니다.
+
+    Returns:
+        list: find_matchable_users와 같은 형식
+    """
+    shards = shards_for_radius(latitude, longitude, radius_km)
+    remote_shards = [shard for shard in shards if shard != local_shard]
+    remote_results = (
+        request_shards(remote_shards, current_user, latitude, longitude, radius_km)
+        if remote_shards else {}
+    )
+
+    results = []
+    for shard in shards:
+        shard_result = remote_results.get(shard)
+        if shard_result is None:
+            if shard != local_shard:
+                print(f'⚠️ 샤드 응답 없음 ({shard}): 직접 계산합니다.')
+            shard_result = find_matchable_users_in_shard(current_user, latitude, longitude, radius_km, shard)
+        results.extend(shard_result)
+
+    users = User.objects.select_related('user', 'location').in_bulk([result['user_id'] for result in results])
+    matchable_users = [
+        {
+            'user': users[result['user_id']],
+            'distance_km': result['distance_km'],
+            'distance_m': result['distance_km'] * 1000,
+            'match_score': result['match_score'],
+        }
+        for result in results
+        if result['user_id'] in users
+    ]
+
+    # 점수 높은 순 → 거리 가까운 순으로 정렬
+    matchable_users.sort(key=lambda x: (-x['match_score'], x['distance_km']))
+    return matchable_users
@@ -0,0 +1,502 @@
+"""
+전체 매칭 스윕
+
+클라이언트마다 전체 사용자를 스캔하는 대신, 주기적으로 매칭 동의 사용자 전체를 한 번에 계산합니다.
+- 위치를 격자(grid)로 나눠 같은/인접 칸의 사용자 쌍만 비교 (전체 O(N²) 비교 대신 주변 쌍만)
+- 가까운 쌍마다 거리는 한 번만 계산하고, 양방향 이상형 점수를 함께 계산
+- Match 테이블을 일괄 갱신 (반경 밖 매칭 삭제 + 새 매칭 생성)
+- 같은 패스에서 모든 사용자의 matchable_count / last_count_updated_at 갱신
+
+run_matching_sweep --workers N 이면 격자 행 단위 샤드를 프로세스 풀에서 병렬로 계산합니다(run_sharded_sweep).
+
+run_matching_sweep 명령에서 사용하며, precomputed 모드의 match_check / matchable_count가 결과를 제공합니다.
+"""
+import contextlib
+import io
+import math
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from apps.users.models import COORDINATE_SCALE, User, UserLocation, IdealTypeProfile
+from apps.users.presence import filter_live_users
+from apps.matching.models import Match
+from apps.matching.events import publish_count_changes, publish_match_changes
+from apps.matching.utils import calculate_distance_km, check_match_criteria
+
+
+KM_PER_DEGREE_LAT = 111.32
+
+# 매칭 점수 기준 (find_matchable_users와 동일)
+MATCH_SCORE_THRESHOLD = 50.0
+
+BULK_BATCH_SIZE = 1000
+
+
+def _grid_cell_size(radius_km, max_abs_latitude):
+    """
+    격자 한 칸의 크기 (위도/경도 degree)
+
+    한 칸이 반경 이상이면 반경 내 쌍은 항상 같은 칸이나 인접 칸에 있습니다.
+    경도 1도의 길이는 고위도일수록 짧아지므로 가장 높은 위도 기준으로 잡습니다.
+    """
+    lat_size = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = max(math.cos(math.radians(min(max_abs_latitude, 89.0))), 0.01)
+    lon_size = radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+    return lat_size, lon_size
+
+
+def _grid_cell(latitude, longitude, cell_size):
+    lat_size, lon_size = cell_size
+    return math.floor(latitude / lat_size), math.floor(longitude / lon_size)
+
+
+def _nearby_pairs(positions, radius_km, cell_size=None):
+    """
+    반경 내에 있는 사용자 쌍 찾기 (격자 버킷팅)
+
+    Args:
+        positions: {user_id: (latitude, longitude)}
+        radius_km: 반경 (km 단위)
+        cell_size: 격자 칸 크기 (없으면 positions 기준으로 계산, 샤드끼리는 같은 값을 써야 함)
+
+    Yields:
+        (user_id_a, user_id_b, distance_km): user_id_a < user_id_b, 각 쌍은 한 번만
+    """
+    if not positions:
+        return
+    if cell_size is None:
+        max_abs_latitude = max(abs(lat) for lat, _lon in positions.values())
+        cell_size = _grid_cell_size(radius_km, max_abs_latitude)
+
+    grid = defaultdict(list)
+    for user_id, (lat, lon) in positions.items():
+        grid[_grid_cell(lat, lon, cell_size)].append(user_id)
+
+    for (row, col), user_ids in grid.items():
+        for d_row in (-1, 0, 1):
+            for d_col in (-1, 0, 1):
+                neighbor_ids = grid.get((row + d_row, col + d_col))
+                if not neighbor_ids:
+                    continue
+                for user_id in user_ids:
+                    lat, lon = positions[user_id]
+                    for other_id in neighbor_ids:
+                        if other_id <= user_id:
+                            continue
+                        other_lat, other_lon = positions[other_id]
+                        distance_km = calculate_distance_km(lat, lon, other_lat, other_lon)
+                        if distance_km <= radius_km:
+                            yield user_id, other_id, distance_km
+
+
+def _score(requester, ideal_types, candidate):
+    """requester의 이상형 기준으로 candidate 점수 계산 (요청 가능한 사용자가 아니면 0점)"""
+    ideal_type = ideal_types.get(requester.id)
+    if ideal_type is None:
+        return 0.0
+    return check_match_criteria(ideal_type, candidate, requester.gender)
+
+
+def _quantize(value, places):
+    return Decimal(str(value)).quantize(Decimal(places))
+
+
+def _load_positions():
+    """전체 위치 (매칭 삭제 판단용, 동의 여부와 무관)"""
+    return {
+        user_id: (lat_e6 / COORDINATE_SCALE, lon_e6 / COORDINATE_SCALE)
+        for user_id, lat_e6, lon_e6 in UserLocation.objects.values_list('user_id', 'latitude_e6', 'longitude_e6')
+    }
+
+
+def _load_sweep_users(**location_filters):
+    """
+    스윕 대상 사용자 로딩 (매칭 동의 ON + 위치 있는 + 접속 중인 사용자)
+
+    Args:
+        location_filters: 위치 범위 조건 (샤드별 로딩 시 location__latitude_e6__gte 등)
+
+    Returns:
+        tuple: (users, positions, candidate_ids, ideal_types)
+            - users: {user_id: User}
+            - positions: {user_id: (latitude, longitude)}
+            - candidate_ids: 매칭 후보가 될 수 있는 사용자 ID (find_matchable_users와 동일 조건)
+            - ideal_types: 매칭을 요청할 수 있는 사용자의 {user_id: IdealTypeProfile}
+              (match_check와 동일하게 이메일 인증 + 이상형 프로필 필요)
+    """
+    # 최근 PRESENCE_WINDOW_SECONDS 안에 확인된 사용자만 새 매칭/인원 수 계산 대상
+    # (이미 있는 매칭은 reconcile_matches와 같이 위치 기준으로만 정리하므로, 접속이 끊긴 사용자의 매칭도 반경 안이면 유지됨)
+    users = {
+        user.id: user
+        for user in filter_live_users(User.objects.filter(
+            matching_consent=True,
+            location__isnull=False,
+            **location_filters,
+        ).select_related('user', 'location', 'ideal_type_profile'))
+    }
+    positions = {
+        user_id: user.location.degrees
+        for user_id, user in users.items()
+    }
+    candidate_ids = {user_id for user_id, user in users.items() if user.service_active}
+
+    ideal_types = {}
+    for user_id, user in users.items():
+        if not user.user.email_verified:
+            continue
+        try:
+            ideal_types[user_id] = user.ideal_type_profile
+        except IdealTypeProfile.DoesNotExist:
+            continue
+
+    return users, positions, candidate_ids, ideal_types
+
+
+def _counted_user_ids(users, ideal_types, user_ids):
+    """matchable_count를 갱신할 사용자 (요청 가능한 사용자, matchable_count API와 동일하게 useruser 제외)"""
+    return [
+        user_id for user_id in user_ids
+        if user_id in ideal_types and users[user_id].user.username != 'useruser'
+    ]
+
+
+def _score_pairs(pairs, users, candidate_ids, ideal_types, radius_km, count_radius_km):
+    """
+    근접 쌍마다 양방향 점수를 계산해 새 매칭 후보와 매칭 가능 인원 수를 집계
+
+    Returns:
+        tuple: (desired, counts, pair_count)
+            - desired: {(user1_id, user2_id): (distance_km, match_score)}
+            - counts: {user_id: matchable_count}
+    """
+    desired = {}
+    counts = defaultdict(int)
+    pair_count = 0
+
+    # 점수 계산 로그는 쌍마다 출력되므로 스윕 중에는 숨김
+    with contextlib.redirect_stdout(io.StringIO()):
+        for user_a, user_b, distance_km in pairs:
+            pair_count += 1
+            a, b = users[user_a], users[user_b]
+            score_ab = _score(a, ideal_types, b) if user_b in candidate_ids else 0.0
+            score_ba = _score(b, ideal_types, a) if user_a in candidate_ids else 0.0
+
+            if distance_km <= count_radius_km:
+                if score_ab >= MATCH_SCORE_THRESHOLD:
+                    counts[user_a] += 1
+                if score_ba >= MATCH_SCORE_THRESHOLD:
+                    counts[user_b] += 1
+
+            if distance_km > radius_km:
+                continue
+            # 점수가 기준 이상인 쪽이 user1 (양쪽 모두면 점수가 높은 쪽)
+            if score_ab >= MATCH_SCORE_THRESHOLD and score_ab >= score_ba:
+                desired[(user_a, user_b)] = (distance_km, score_ab)
+            elif score_ba >= MATCH_SCORE_THRESHOLD:
+                desired[(user_b, user_a)] = (distance_km, score_ba)
+
+    return desired, dict(counts), pair_count
+
+
+def _apply_results(positions, desired, counts, counted_ids, radius_km, count_radius_km, now):
+    """
+    스윕 결과를 DB에 일괄 반영
+
+    - 반경 밖이거나 위치 정보가 없는 매칭 삭제 (reconcile_matches와 동일 기준)
+    - 새 매칭 일괄 생성 (이미 있는 쌍은 방향과 무관하게 제외)
+    - matchable_count / last_count_updated_at 일괄 갱신 (후보가 없으면 0명)
+    - 인원 수가 바뀐 사용자에게 WebSocket으로 전송 (publish_count_changes)
+
+    Returns:
+        tuple: (created_count, deleted_count)
+    """
+    existing_pairs = set()
+    deleted_ids = []
+    deleted_pairs = []
+    for match_id, user1_id, user2_id in Match.objects.values_list('id', 'user1_id', 'user2_id'):
+        existing_pairs.add(frozenset((user1_id, user2_id)))
+        position1, position2 = positions.get(user1_id), positions.get(user2_id)
+        if position1 is None or position2 is None or calculate_distance_km(*position1, *position2) > radius_km:
+            deleted_ids.append(match_id)
+            deleted_pairs.append((match_id, user1_id, user2_id))
+
+    for start in range(0, len(deleted_ids), BULK_BATCH_SIZE):
+        Match.objects.filter(id__in=deleted_ids[start:start + BULK_BATCH_SIZE]).delete()
+
+    new_matches = []
+    for (user1_id, user2_id), (distance_km, match_score) in desired.items():
+        if frozenset((user1_id, user2_id)) in existing_pairs:
+            continue
+        lat1, lon1 = positions[user1_id]
+        lat2, lon2 = positions[user2_id]
+        new_matches.append(Match(
+            user1_id=user1_id,
+            user2_id=user2_id,
+            user1_latitude=_quantize(lat1, '0.000001'),
+            user1_longitude=_quantize(lon1, '0.000001'),
+            user2_latitude=_quantize(lat2, '0.000001'),
+            user2_longitude=_quantize(lon2, '0.000001'),
+            match_score=_quantize(match_score, '0.01'),
+            matched_criteria={
+                'distance_m': distance_km * 1000,
+                'match_score': match_score,
+            },
+        ))
+
+    created = []
+    for start in range(0, len(new_matches), BULK_BATCH_SIZE):
+        batch = new_matches[start:start + BULK_BATCH_SIZE]
+        try:
+            with transaction.atomic():
+                created.extend(Match.objects.bulk_create(batch))
+        except IntegrityError:
+            # 스윕 도중 match_check에서 같은 쌍이 생성된 경우: 하나씩 생성하며 중복은 건너뜀
+            for match in batch:
+                try:
+                    with transaction.atomic():
+                        match.save()
+                    created.append(match)
+                except Exception as e:
+                    print(f'⚠️ 매칭 생성 실패: {str(e)}')
+
+    publish_match_changes(created=created, deleted=deleted_pairs)
+
+    # 인원 수가 바뀐 사용자에게만 WebSocket으로 전송하기 위해 이전 값을 읽어 둠
+    previous_counts = {}
+    for start in range(0, len(counted_ids), BULK_BATCH_SIZE):
+        previous_counts.update(
+            User.objects.filter(id__in=counted_ids[start:start + BULK_BATCH_SIZE])
+            .values_list('id', 'matchable_count')
+        )
+
+    # 필요한 필드만 가진 인스턴스로 일괄 갱신 (updated_at은 건드리지 않음)
+    User.objects.bulk_update(
+        [
+            User(id=user_id, matchable_count=counts.get(user_id, 0), last_count_updated_at=now)
+            for user_id in counted_ids
+        ],
+        ['matchable_count', 'last_count_updated_at'],
+        batch_size=BULK_BATCH_SIZE,
+    )
+    publish_count_changes(
+        {
+            user_id: counts.get(user_id, 0)
+            for user_id in counted_ids
+            if previous_counts.get(user_id) != counts.get(user_id, 0)
+        },
+        count_radius_km,
+    )
+
+    return len(created), len(deleted_ids)
+
+
+def run_sweep(radius_km, count_radius_km):
+    """
+    전체 매칭 스윕 1회 실행 (단일 프로세스)
+
+    Args:
+        radius_km: 매칭 반경 (km 단위)
+        count_radius_km: matchable_count 계산 반경 (km 단위)
+
+    Returns:
+        dict: 처리 통계 (users, pairs, created, deleted, counted, elapsed_ms)
+    """
+    started = time.monotonic()
+    now = timezone.now()
+
+    positions = _load_positions()
+    users, active_positions, candidate_ids, ideal_types = _load_sweep_users()
+
+    desired, counts, pair_count = _score_pairs(
+        _nearby_pairs(active_positions, max(radius_km, count_radius_km)),
+        users,
+        candidate_ids,
+        ideal_types,
+        radius_km,
+        count_radius_km,
+    )
+
+    counted_ids = _counted_user_ids(users, ideal_types, users)
+    created_count, deleted_count = _apply_results(positions, desired, counts, counted_ids, radius_km, count_radius_km, now)
+
+    return {
+        'users': len(users),
+        'pairs': pair_count,
+        'created': created_count,
+        'deleted': deleted_count,
+        'counted': len(counted_ids),
+        'elapsed_ms': (time.monotonic() - started) * 1000,
+    }
+
+
+# ==========================================
+# 샤드 스윕 (멀티 프로세스)
+# ==========================================
+
+def _init_shard_worker():
+    """
+    샤드 워커 프로세스 초기화
+
+    spawn 방식이면 Django를 새로 설정하고, fork 방식이면 부모에게서 물려받은 DB 연결을 버립니다.
+    (각 워커는 자기 DB 연결을 새로 열어 사용)
+    """
+    import django
+    from django.db import connections
+
+    django.setup()
+    connections.close_all()
+
+
+def _plan_shards(positions, cell_size, shard_count):
+    """
+    격자 행(위도 띠) 단위로 사용자 수가 비슷하도록 샤드를 나눔
+
+    Returns:
+        list: [(first_row, last_row), ...] 각 샤드가 담당하는 행 범위 (양 끝 포함)
+    """
+    rows = defaultdict(int)
+    for lat, lon in positions.values():
+        rows[_grid_cell(lat, lon, cell_size)[0]] += 1
+    if not rows:
+        return []
+
+    sorted_rows = sorted(rows)
+    target = len(positions) / max(shard_count, 1)
+    shards = []
+    first_row = sorted_rows[0]
+    assigned = 0
+    for row in sorted_rows:
+        assigned += rows[row]
+        if assigned >= target * (len(shards) + 1) and len(shards) < shard_count - 1:
+            shards.append((first_row, row))
+            first_row = row + 1
+    shards.append((first_row, sorted_rows[-1]))
+    return [(first, last) for first, last in shards if first <= last]
+
+
+def _run_shard(shard_index, first_row, last_row, cell_size, radius_km, count_radius_km):
+    """
+    샤드 1개 계산 (워커 프로세스에서 실행)
+
+    담당 행 ± 1행(halo)의 사용자를 로딩해 경계를 넘는 쌍도 놓치지 않고,
+    쌍의 작은 ID 쪽 사용자가 담당 행에 있을 때만 결과에 포함해 샤드 간 중복을 없앱니다.
+
+    Returns:
+        dict: desired, counts, counted_ids, 샤드 통계
+    """
+    from django.db import close_old_connections
+
+    close_old_connections()
+    started = time.monotonic()
+    lat_size = cell_size[0]
+
+    # 행 경계와 부동소수점 오차를 고려해 한 행 더 넓게 로딩한 뒤 행 번호로 다시 거름
+    users, positions, candidate_ids, ideal_types = _load_sweep_users(
+        location__latitude_e6__gte=math.floor((first_row - 2) * lat_size * COORDINATE_SCALE),
+        location__latitude_e6__lt=math.ceil((last_row + 3) * lat_size * COORDINATE_SCALE),
+    )
+    rows = {user_id: _grid_cell(lat, lon, cell_size)[0] for user_id, (lat, lon) in positions.items()}
+    positions = {
+        user_id: position for user_id, position in positions.items()
+        if first_row - 1 <= rows[user_id] <= last_row + 1
+    }
+    owned_ids = [user_id for user_id in positions if first_row <= rows[user_id] <= last_row]
+
+    pairs = (
+        (user_a, user_b, distance_km)
+        for user_a, user_b, distance_km in _nearby_pairs(positions, max(radius_km, count_radius_km), cell_size)
+        if first_row <= rows[user_a] <= last_row
+    )
+    desired, counts, pair_count = _score_pairs(pairs, users, candidate_ids, ideal_types, radius_km, count_radius_km)
+
+    return {
+        'shard': shard_index,
+        'rows': (first_row, last_row),
+        'users': len(owned_ids),
+        'halo_users': len(positions) - len(owned_ids),
+        'pairs': pair_count,
+        'desired': desired,
+        'counts': counts,
+        'counted_ids': _counted_user_ids(users, ideal_types, owned_ids),
+        'elapsed_ms': (time.monotonic() - started) * 1000,
+    }
+
+
+def run_sharded_sweep(radius_km, count_radius_km, workers, shard_count=None):
+    """
+    전체 매칭 스윕 1회 실행 (격자 행 단위로 샤드를 나눠 프로세스 풀에서 병렬 계산)
+
+    점수 계산은 워커 프로세스에서 나눠 처리하고(GIL 회피),
+    결과는 메인 프로세스에서 합쳐 한 번에 DB에 반영합니다.
+
+    Args:
+        radius_km: 매칭 반경 (km 단위)
+        count_radius_km: matchable_count 계산 반경 (km 단위)
+        workers: 워커 프로세스 수
+        shard_count: 샤드 수 (기본값: workers * 4, 샤드 크기가 고르지 않아도 워커가 놀지 않도록)
+
+    Returns:
+        dict: run_sweep과 같은 통계 + shards(샤드별 통계)
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from django.db import connections
+
+    started = time.monotonic()
+    now = timezone.now()
+    shard_count = shard_count or workers * 4
+
+    positions = _load_positions()
+    active_ids = User.objects.filter(
+        matching_consent=True,
+        location__isnull=False,
+    ).values_list('id', flat=True)
+    active_positions = {user_id: positions[user_id] for user_id in active_ids if user_id in positions}
+    if not active_positions:
+        created_count, deleted_count = _apply_results(positions, {}, {}, [], radius_km, count_radius_km, now)
+        return {
+            'users': 0, 'pairs': 0, 'created': created_count, 'deleted': deleted_count,
+            'counted': 0, 'elapsed_ms': (time.monotonic() - started) * 1000, 'shards': [],
+        }
+
+    # 모든 샤드가 같은 격자를 쓰도록 칸 크기를 여기서 정함
+    search_radius_km = max(radius_km, count_radius_km)
+    max_abs_latitude = max(abs(lat) for lat, _lon in active_positions.values())
+    cell_size = _grid_cell_size(search_radius_km, max_abs_latitude)
+    shard_plan = _plan_shards(active_positions, cell_size, shard_count)
+
+    # fork 시 DB 연결이 워커와 공유되지 않도록 먼저 닫음
+    connections.close_all()
+
+    desired = {}
+    counts = defaultdict(int)
+    counted_ids = []
+    shard_stats = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_shard_worker) as executor:
+        futures = [
+            executor.submit(_run_shard, index, first_row, last_row, cell_size, radius_km, count_radius_km)
+            for index, (first_row, last_row) in enumerate(shard_plan)
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            desired.update(result.pop('desired'))
+            for user_id, count in result.pop('counts').items():
+                counts[user_id] += count
+            counted_ids.extend(result.pop('counted_ids'))
+            shard_stats.append(result)
+
+    shard_stats.sort(key=lambda stats: stats['shard'])
+    created_count, deleted_count = _apply_results(positions, desired, counts, counted_ids, radius_km, count_radius_km, now)
+
+    return {
+        'users': sum(stats['users'] for stats in shard_stats),
+        'pairs': sum(stats['pairs'] for stats in shard_stats),
+        'created': created_count,
+        'deleted': deleted_count,
+        'counted': len(counted_ids),
+        'elapsed_ms': (time.monotonic() - started) * 1000,
+        'shards': shard_stats,
+    }
@@ -0,0 +1,18 @@
+"""
+매칭 테스트 공용 helper
+"""
+import contextlib
+import io
+
+from apps.matching.utils import check_match_criteria
+
+
+def sample_values(rng, values, extra=()):
+    """values 중 1개 이상을 고른 목록 (extra는 목록에 없는 값)"""
+    return rng.sample(values, rng.randint(1, len(values))) + list(extra)
+
+
+def quiet_check_match_criteria(ideal_type, candidate_user, user_gender):
+    """check_match_criteria (후보마다 출력하는 로그는 숨김)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return check_match_criteria(ideal_type, candidate_user, user_gender)
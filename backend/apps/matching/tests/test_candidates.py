@@ -0,0 +1,109 @@
+"""
+매칭 후보 읽기 모델 점수 테스트 (비트마스크 점수 = check_match_criteria)
+"""
+import itertools
+import random
+
+from django.test import SimpleTestCase
+
+from apps.users.models import IdealTypeProfile, User, UserLocation
+from apps.users.vocabulary import INTERESTS, MBTI_TYPES, PERSONALITY_TYPES
+from apps.matching.candidates import _candidate_row, _preferences, preferred_genders, score_candidate
+from apps.matching.tests.helpers import quiet_check_match_criteria, sample_values
+
+
+PRIORITY_ITEMS = (None, 'mbti', 'personality', 'interests')
+
+
+def _ideal_type(rng, priorities, extra=()):
+    return IdealTypeProfile(
+        height_min=150, height_max=190,
+        age_min=20, age_max=40,
+        preferred_gender='F',
+        preferred_mbti=sample_values(rng, MBTI_TYPES),
+        preferred_personality=sample_values(rng, PERSONALITY_TYPES, extra),
+        preferred_interests=sample_values(rng, INTERESTS, extra),
+        priority_1=priorities[0], priority_2=priorities[1], priority_3=priorities[2],
+    )
+
+
+def _candidate(rng, user_id=2):
+    return User(
+        id=user_id, gender='F', age=rng.randint(20, 40), height=rng.randint(150, 190),
+        mbti=rng.choice(MBTI_TYPES),
+        personality=sample_values(rng, PERSONALITY_TYPES),
+        interests=sample_values(rng, INTERESTS),
+    )
+
+
+class ScoreCandidateTests(SimpleTestCase):
+
+    location = UserLocation(latitude_e6=37566500, longitude_e6=126978000)
+
+    def assert_same_score(self, ideal_type, candidate_user):
+        row = _candidate_row(candidate_user, self.location)
+        self.assertTrue(row.encoded_exactly)
+        self.assertAlmostEqual(
+            score_candidate(_preferences(ideal_type), row),
+            quiet_check_match_criteria(ideal_type, candidate_user, 'M'),
+            places=9,
+            msg=f'ideal={ideal_type.__dict__} candidate={candidate_user.__dict__}',
+        )
+
+    def test_matches_check_match_criteria_for_every_priority_order(self):
+        rng = random.Random(43)
+        for priorities in itertools.product(PRIORITY_ITEMS, repeat=3):
+            for _ in range(20):
+                self.assert_same_score(_ideal_type(rng, priorities), _candidate(rng))
+
+    def test_preferred_values_outside_vocabulary(self):
+        # 이상형 목록에 직접 입력한 값이 있어도 (선택한 개수에는 포함, 후보와는 일치하지 않음) 같은 점수
+        rng = random.Random(7)
+        for _ in range(200):
+            priorities = rng.sample(PRIORITY_ITEMS[1:], 3)
+            self.assert_same_score(_ideal_type(rng, priorities, extra=['직접 입력']), _candidate(rng))
+
+    def test_full_overlap_scores_100(self):
+        ideal_type = IdealTypeProfile(
+            preferred_gender='F', preferred_mbti=['INFP'],
+            preferred_personality=['calm'], preferred_interests=['music', 'art'],
+            priority_1='mbti', priority_2='personality', priority_3='interests',
+        )
+        candidate_user = User(
+            gender='F', age=25, height=165, mbti='INFP', personality=['calm'], interests=['art', 'music'],
+        )
+        self.assertEqual(score_candidate(_preferences(ideal_type), _candidate_row(candidate_user, self.location)), 100.0)
+        self.assertEqual(quiet_check_match_criteria(ideal_type, candidate_user, 'M'), 100.0)
+
+    def test_values_outside_vocabulary_are_not_encoded_exactly(self):
+        # 비트로 표현할 수 없는 후보는 check_match_criteria로 점수를 계산하도록 표시
+        for candidate_user in (
+            User(gender='F', age=25, height=165, mbti='INFP', personality=['calm', '직접 입력'], interests=['art']),
+            User(gender='F', age=25, height=165, mbti='INFP', personality=['calm'], interests=['art', 3]),
+            User(gender='F', age=25, height=165, mbti='XXXX', personality=['calm'], interests=['art']),
+        ):
+            self.assertFalse(_candidate_row(candidate_user, self.location).encoded_exactly)
+
+        no_mbti = User(gender='F', age=25, height=165, mbti='', personality=['calm'], interests=['art'])
+        self.assertTrue(_candidate_row(no_mbti, self.location).encoded_exactly)
+
+
+class PreferredGendersTests(SimpleTestCase):
+
+    def test_matches_check_match_criteria_gender_filter(self):
+        for preferred_gender, user_gender, candidate_gender in itertools.product(
+            ('M', 'F', 'A', None), ('M', 'F', None), ('M', 'F'),
+        ):
+            # 선호 MBTI가 1순위로 일치하므로 성별 필터를 통과하면 점수가 0보다 큼
+            ideal_type = IdealTypeProfile(
+                preferred_gender=preferred_gender, preferred_mbti=['INFP'],
+                priority_1='mbti', priority_2=None, priority_3=None,
+            )
+            candidate_user = User(
+                gender=candidate_gender, age=25, height=165, mbti='INFP', personality=['calm'], interests=['art'],
+            )
+            self.assertEqual(
+                candidate_gender in preferred_genders(ideal_type, user_gender),
+                quiet_check_match_criteria(ideal_type, candidate_user, user_gender) > 0,
+                msg=f'preferred={preferred_gender} user={user_gender} candidate={candidate_gender}',
+            )
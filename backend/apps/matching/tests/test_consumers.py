@@ -0,0 +1,131 @@
+"""
+매칭 WebSocket Consumer 테스트 (CHANNEL_LAYERS_IN_MEMORY와 같은 메모리 레이어 사용)
+"""
+from unittest import mock
+
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser
+from django.test import SimpleTestCase, override_settings
+
+from apps.users.models import AuthUser, User
+from apps.matching.consumers import MatchingConsumer
+from apps.matching.events import USER_GROUP
+
+
+IN_MEMORY_CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+PROFILE_ID = 7
+
+
+def _profile_loader(profile):
+    async def get_profile(self, user):
+        return profile
+    return get_profile
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class MatchingConsumerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.user = AuthUser(id=1, username='tester', email_verified=True)
+        self.profile = User(id=PROFILE_ID, user_id=self.user.id)
+        patcher = mock.patch.object(MatchingConsumer, '_get_profile', _profile_loader(self.profile))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _communicator(self, user):
+        communicator = WebsocketCommunicator(MatchingConsumer.as_asgi(), '/ws/matching/')
+        communicator.scope['user'] = user
+        return communicator
+
+    async def test_rejects_anonymous_user(self):
+        communicator = self._communicator(AnonymousUser())
+        connected, code = await communicator.connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, 4401)
+
+    async def test_rejects_user_without_profile(self):
+        communicator = self._communicator(self.user)
+        with mock.patch.object(MatchingConsumer, '_get_profile', _profile_loader(None)):
+            connected, code = await communicator.connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, 4403)
+
+    async def test_rejects_unverified_email(self):
+        communicator = self._communicator(AuthUser(id=2, username='unverified', email_verified=False))
+        connected, code = await communicator.connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, 4403)
+
+    async def test_ping_marks_user_seen(self):
+        communicator = self._communicator(self.user)
+        connected, _subprotocol = await communicator.connect()
+        self.assertTrue(connected)
+
+        with mock.patch('apps.matching.consumers.mark_user_seen') as mark_user_seen:
+            await communicator.send_json_to({'type': 'ping'})
+            self.assertEqual(await communicator.receive_json_from(), {'type': 'pong'})
+        mark_user_seen.assert_called_once_with(PROFILE_ID)
+        await communicator.disconnect()
+
+    async def test_unknown_message_type(self):
+        communicator = self._communicator(self.user)
+        await communicator.connect()
+        await communicator.send_json_to({'type': 'dance'})
+        response = await communicator.receive_json_from()
+        self.assertEqual(response['type'], 'error')
+        await communicator.disconnect()
+
+    async def test_invalid_location(self):
+        communicator = self._communicator(self.user)
+        await communicator.connect()
+        await communicator.send_json_to({'type': 'location', 'latitude': 'north'})
+        response = await communicator.receive_json_from()
+        self.assertEqual(response['type'], 'error')
+        self.assertIn('latitude', response['errors'])
+        await communicator.disconnect()
+
+    async def test_match_removed_event_is_pushed(self):
+        communicator = self._communicator(self.user)
+        await communicator.connect()
+
+        await get_channel_layer().group_send(
+            USER_GROUP.format(user_id=PROFILE_ID),
+            {'type': 'match.removed', 'match_id': 34, 'other_user_id': 12},
+        )
+        self.assertEqual(
+            await communicator.receive_json_from(),
+            {'type': 'match.removed', 'match_id': 34, 'other_user_id': 12},
+        )
+        await communicator.disconnect()
+
+    @override_settings(MATCHING_COUNT_RADIUS_KM=0.05)
+    async def test_count_changed_event_is_pushed_once(self):
+        communicator = self._communicator(self.user)
+        await communicator.connect()
+
+        group = USER_GROUP.format(user_id=PROFILE_ID)
+        event = {'type': 'count.changed', 'matchable_count': 3, 'radius': 0.05}
+        await get_channel_layer().group_send(group, event)
+        self.assertEqual(
+            await communicator.receive_json_from(),
+            {'type': 'count', 'matchable_count': 3, 'radius': 0.05},
+        )
+
+        # 같은 인원 수나 다른 반경의 인원 수는 전송하지 않음
+        await get_channel_layer().group_send(group, event)
+        await get_channel_layer().group_send(group, {**event, 'matchable_count': 5, 'radius': 1.0})
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
+
+    async def test_disconnect_leaves_group(self):
+        communicator = self._communicator(self.user)
+        await communicator.connect()
+        await communicator.disconnect()
+
+        await get_channel_layer().group_send(
+            USER_GROUP.format(user_id=PROFILE_ID),
+            {'type': 'match.removed', 'match_id': 34, 'other_user_id': 12},
+        )
+        self.assertTrue(await communicator.receive_nothing())
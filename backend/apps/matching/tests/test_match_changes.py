@@ -0,0 +1,93 @@
+"""
+매칭 변경분 커서 테스트 (정리된 이력 경계는 DB에서 구함, PostgreSQL/Redis 필요)
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.users.models import AuthUser, User
+from apps.matching.models import MatchChange
+from apps.matching.utils import match_changes_pruned_before, prune_match_changes
+
+
+def _create_profile(username):
+    auth_user = AuthUser.objects.create_user(username, email=f'{username}@example.com', email_verified=True)
+    return User.objects.create(
+        user=auth_user, gender='F', age=25, height=165, mbti='INFP', personality=['calm'], interests=['music'],
+    )
+
+
+class MatchChangesCursorTests(TestCase):
+
+    def setUp(self):
+        self.profile = _create_profile('tester')
+        self.other = _create_profile('other')
+        self.client = APIClient()
+        self.client.force_authenticate(self.profile.user)
+
+    def _change(self, match_id, days_ago=0):
+        change = MatchChange.objects.create(
+            user=self.profile, match_id=match_id, other_user_id=self.other.id, change_type=MatchChange.CHANGE_CREATED,
+        )
+        MatchChange.objects.filter(id=change.id).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return change
+
+    def _reset(self, cursor):
+        response = self.client.get('/api/matching/changes/', {} if cursor is None else {'cursor': cursor})
+        self.assertEqual(response.status_code, 200, msg=response.data)
+        return response.data['reset']
+
+    def test_stale_cursor_resets_after_cache_is_cleared(self):
+        stale = self._change(1, days_ago=30)
+        pruned = self._change(2, days_ago=30)
+        kept = self._change(3)
+
+        self.assertEqual(prune_match_changes(7), 2)
+        cache.clear()
+
+        self.assertEqual(match_changes_pruned_before(), kept.id - 1)
+        self.assertTrue(self._reset(stale.id))
+        # 정리된 마지막 이력까지 받은 커서는 이후 이력이 모두 남아 있으므로 변경분만 받음
+        self.assertFalse(self._reset(pruned.id))
+        self.assertFalse(self._reset(kept.id))
+
+    def test_newest_change_is_kept_as_boundary(self):
+        stale = self._change(1, days_ago=30)
+        self._change(2, days_ago=30)
+        newest = self._change(3, days_ago=30)
+
+        self.assertEqual(prune_match_changes(7), 2)
+        self.assertEqual(list(MatchChange.objects.values_list('id', flat=True)), [newest.id])
+        cache.clear()
+
+        self.assertEqual(match_changes_pruned_before(), newest.id - 1)
+        self.assertTrue(self._reset(stale.id))
+
+    def test_no_changes_never_resets_cursor(self):
+        self.assertEqual(match_changes_pruned_before(), 0)
+        self.assertFalse(self._reset(0))
+        self.assertTrue(self._reset(None))
+
+    def test_user_without_changes_gets_304_after_prune(self):
+        self._change(1, days_ago=30)
+        kept = self._change(2, days_ago=30)
+        self.assertEqual(prune_match_changes(7), 1)
+
+        self.client.force_authenticate(self.other.user)
+        response = self.client.get('/api/matching/changes/')
+        self.assertEqual(response.status_code, 200)
+        # 이력이 없는 사용자도 경계 이상의 커서를 받음
+        self.assertEqual(response.data['cursor'], kept.id - 1)
+
+        cursor = response.data['cursor']
+        response = self.client.get('/api/matching/changes/', {'cursor': cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['reset'])
+
+        response = self.client.get(
+            '/api/matching/changes/', {'cursor': cursor}, HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(response.status_code, 304)
@@ -0,0 +1,110 @@
+"""
+DB 점수 계산 테스트 (SQL 점수 = check_match_criteria, PostgreSQL 필요)
+"""
+import itertools
+import random
+from unittest import mock
+
+from django.test import TestCase
+
+from apps.users.models import AuthUser, IdealTypeProfile, User, UserLocation
+from apps.users.vocabulary import INTERESTS, MBTI_TYPES, PERSONALITY_TYPES
+from apps.matching.candidates import MATCH_SCORE_THRESHOLD
+from apps.matching.scoring import search_scored_candidates
+from apps.matching.utils import calculate_distance_km
+from apps.matching.tests.helpers import quiet_check_match_criteria, sample_values
+
+
+LATITUDE, LONGITUDE = 37.5665, 126.9780
+RADIUS_KM = 0.05
+
+
+def _create_profile(index, *, latitude_e6=int(LATITUDE * 1e6), longitude_e6=int(LONGITUDE * 1e6), **fields):
+    auth_user = AuthUser.objects.create_user(f'user{index}', email=f'user{index}@example.com', email_verified=True)
+    profile = User.objects.create(user=auth_user, **fields)
+    # 후보 본인의 이상형 프로필 없이 매칭 동의 ON (User.save는 프로필이 미완성이면 동의를 OFF로 되돌림)
+    User.objects.filter(id=profile.id).update(matching_consent=True, service_active=True)
+    profile.matching_consent = profile.service_active = True
+    UserLocation.objects.create(user=profile, latitude_e6=latitude_e6, longitude_e6=longitude_e6)
+    return profile
+
+
+# 위치 갱신 시각으로 접속 상태 판단 (Redis 없이)
+@mock.patch('apps.matching.scoring.all_live_user_ids', return_value=None)
+class SearchScoredCandidatesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(45)
+        cls.current_user = _create_profile(
+            0, gender='M', age=30, height=175, mbti='INTJ', personality=['calm'], interests=['music'],
+        )
+        cls.candidates = []
+        for index in range(1, 121):
+            personality = sample_values(rng, PERSONALITY_TYPES, ['직접 입력'] if index % 10 == 0 else ())
+            cls.candidates.append(_create_profile(
+                index,
+                # 일부는 성별/나이/키 필터 또는 반경 밖
+                gender='M' if index % 11 == 0 else 'F',
+                age=rng.randint(18, 45),
+                height=rng.randint(145, 195),
+                mbti=rng.choice(MBTI_TYPES),
+                personality=personality,
+                interests=sample_values(rng, INTERESTS),
+                latitude_e6=int(LATITUDE * 1e6) + rng.randint(-600, 600),
+                longitude_e6=int(LONGITUDE * 1e6) + rng.randint(-600, 600),
+            ))
+
+    def _ideal_type(self, priorities, rng):
+        ideal_type, _created = IdealTypeProfile.objects.update_or_create(
+            user=self.current_user,
+            defaults={
+                'height_min': 150, 'height_max': 190,
+                'age_min': 20, 'age_max': 40,
+                'preferred_gender': 'F',
+                'preferred_mbti': sample_values(rng, MBTI_TYPES),
+                'preferred_personality': sample_values(rng, PERSONALITY_TYPES, ['직접 입력']),
+                'preferred_interests': sample_values(rng, INTERESTS),
+                'priority_1': priorities[0],
+                'priority_2': priorities[1],
+                'priority_3': priorities[2],
+            },
+        )
+        return ideal_type
+
+    def _expected_scores(self, ideal_type):
+        """반경 안 후보 중 check_match_criteria 점수가 50점 이상인 후보"""
+        expected = {}
+        for candidate in self.candidates:
+            if calculate_distance_km(LATITUDE, LONGITUDE, *candidate.location.degrees) > RADIUS_KM:
+                continue
+            score = quiet_check_match_criteria(ideal_type, candidate, self.current_user.gender)
+            if score >= MATCH_SCORE_THRESHOLD:
+                expected[candidate.id] = score
+        return expected
+
+    def test_scores_match_check_match_criteria(self, _all_live_user_ids):
+        rng = random.Random(4)
+        for priorities in itertools.permutations(('mbti', 'personality', 'interests')):
+            ideal_type = self._ideal_type(priorities, rng)
+            rows = search_scored_candidates(self.current_user, ideal_type, LATITUDE, LONGITUDE, RADIUS_KM, 1000)
+            scores = {user_id: match_score for user_id, _distance_km, match_score in rows}
+
+            expected = self._expected_scores(ideal_type)
+            self.assertTrue(expected, msg='반경 안에 50점 이상인 후보가 있어야 비교가 의미 있음')
+            self.assertEqual(set(scores), set(expected), msg=f'priorities={priorities}')
+            for user_id, score in expected.items():
+                self.assertAlmostEqual(scores[user_id], score, places=6, msg=f'user_id={user_id}')
+
+    def test_ordered_by_score_then_distance_and_limited(self, _all_live_user_ids):
+        ideal_type = self._ideal_type(('interests', 'personality', 'mbti'), random.Random(5))
+        rows = search_scored_candidates(self.current_user, ideal_type, LATITUDE, LONGITUDE, RADIUS_KM, 1000)
+        self.assertEqual(rows, sorted(rows, key=lambda row: (-row[2], row[1])))
+
+        limited = search_scored_candidates(self.current_user, ideal_type, LATITUDE, LONGITUDE, RADIUS_KM, 3)
+        self.assertEqual([row[1:] for row in limited], [row[1:] for row in rows[:3]])
+
+    def test_excludes_current_user(self, _all_live_user_ids):
+        ideal_type = self._ideal_type(('mbti', 'personality', 'interests'), random.Random(6))
+        rows = search_scored_candidates(self.current_user, ideal_type, LATITUDE, LONGITUDE, RADIUS_KM, 1000)
+        self.assertNotIn(self.current_user.id, [user_id for user_id, _distance_km, _score in rows])
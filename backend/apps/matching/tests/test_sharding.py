@@ -0,0 +1,158 @@
+"""
+지역 샤딩 테스트 (geohash_encode, shard_for, shards_for_radius, request_shards)
+"""
+import contextlib
+import io
+from types import SimpleNamespace
+from unittest import mock
+
+import redis
+from django.test import SimpleTestCase, override_settings
+
+from apps.matching import sharding
+from apps.matching.sharding import DEFAULT_SHARD, geohash_encode, shard_for, shards_for_radius
+
+
+# 적도/본초 자오선에서 만나는 geohash 최상위 칸 4개
+QUADRANT_SHARD_MAP = {'s': 'north-east', 'e': 'north-west', 'k': 'south-east', '7': 'south-west'}
+
+
+class GeohashEncodeTests(SimpleTestCase):
+
+    def test_known_geohash(self):
+        self.assertEqual(geohash_encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(geohash_encode(37.5665, 126.9780, 6), 'wydm9q')
+
+    def test_precision(self):
+        self.assertEqual(len(geohash_encode(37.5665, 126.9780)), 12)
+        self.assertEqual(geohash_encode(37.5665, 126.9780, 4), 'wydm')
+
+    def test_prefix_of_longer_geohash(self):
+        self.assertTrue(geohash_encode(37.5665, 126.9780, 12).startswith(geohash_encode(37.5665, 126.9780, 5)))
+
+    def test_quadrant_boundaries(self):
+        self.assertEqual(geohash_encode(0.001, 0.001, 1), 's')
+        self.assertEqual(geohash_encode(0.001, -0.001, 1), 'e')
+        self.assertEqual(geohash_encode(-0.001, 0.001, 1), 'k')
+        self.assertEqual(geohash_encode(-0.001, -0.001, 1), '7')
+
+
+class ShardForTests(SimpleTestCase):
+
+    @override_settings(MATCHING_SHARD_MAP={})
+    def test_default_shard_without_map(self):
+        self.assertEqual(shard_for(37.5665, 126.9780), DEFAULT_SHARD)
+
+    @override_settings(MATCHING_SHARD_MAP={'wydm': 'seoul', 'wydm9': 'seoul-center', 'wy7': 'busan'})
+    def test_longest_prefix_wins(self):
+        self.assertEqual(shard_for(37.5665, 126.9780), 'seoul-center')  # wydm9q
+        self.assertEqual(shard_for(37.58, 126.95), 'seoul')  # wydmbc
+        self.assertEqual(shard_for(35.1796, 129.0756), 'busan')  # wy7b1h
+
+    @override_settings(MATCHING_SHARD_MAP={'wydm': 'seoul'})
+    def test_unmapped_location_uses_default_shard(self):
+        self.assertEqual(shard_for(35.1796, 129.0756), DEFAULT_SHARD)
+
+    @override_settings(MATCHING_SHARD_MAP={'wydm': 'seoul'})
+    def test_accepts_decimal_strings(self):
+        self.assertEqual(shard_for('37.566500', '126.978000'), 'seoul')
+
+
+class ShardsForRadiusTests(SimpleTestCase):
+
+    @override_settings(MATCHING_SHARD_MAP=QUADRANT_SHARD_MAP)
+    def test_radius_inside_one_shard(self):
+        self.assertEqual(shards_for_radius(0.5, 0.5, 1.0), ['north-east'])
+
+    @override_settings(MATCHING_SHARD_MAP=QUADRANT_SHARD_MAP)
+    def test_radius_crossing_shard_corner(self):
+        # 반경이 네 칸이 만나는 지점을 덮으면 네 샤드 모두에 요청
+        self.assertCountEqual(
+            shards_for_radius(0.001, 0.001, 1.0),
+            ['north-east', 'north-west', 'south-east', 'south-west'],
+        )
+
+    @override_settings(MATCHING_SHARD_MAP=QUADRANT_SHARD_MAP)
+    def test_radius_crossing_one_edge(self):
+        self.assertCountEqual(shards_for_radius(0.5, 0.001, 1.0), ['north-east', 'north-west'])
+
+    @override_settings(MATCHING_SHARD_MAP=QUADRANT_SHARD_MAP)
+    def test_no_duplicate_shards(self):
+        shards = shards_for_radius(0.001, 0.001, 1.0)
+        self.assertEqual(len(shards), len(set(shards)))
+
+    @override_settings(MATCHING_SHARD_MAP={'wydm': 'seoul', 'wy7': 'busan'})
+    def test_unmapped_neighbour_uses_default_shard(self):
+        # wydm 칸 경계 근처에서 반경이 다른 칸으로 넘어가면 default 샤드도 포함
+        shards = shards_for_radius(37.5665, 126.9780, 20.0)
+        self.assertIn('seoul', shards)
+        self.assertIn(DEFAULT_SHARD, shards)
+        self.assertNotIn('busan', shards)
+
+
+class RequestShardsTests(SimpleTestCase):
+
+    def setUp(self):
+        self.user = SimpleNamespace(id=1)
+
+    def test_redis_error_returns_no_results(self):
+        client = mock.Mock()
+        client.pipeline.return_value.execute.side_effect = redis.ConnectionError('down')
+        with mock.patch.object(sharding, 'get_redis', return_value=client), \
+                contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(sharding.request_shards(['seoul'], self.user, 37.5, 127.0, 0.05), {})
+
+    @override_settings(MATCHING_SHARD_RPC_TIMEOUT_SECONDS=2)
+    def test_waits_for_all_replies_with_one_blpop_per_reply(self):
+        client = mock.Mock()
+        replies = []
+
+        def blpop(keys, timeout):
+            replies.append(list(keys))
+            key = keys[0]
+            return key, '[{"user_id": %d, "distance_km": 0.01, "match_score": 80}]' % len(replies)
+
+        client.blpop.side_effect = blpop
+        with mock.patch.object(sharding, 'get_redis', return_value=client):
+            results = sharding.request_shards(['seoul', 'busan'], self.user, 37.5, 127.0, 0.05)
+
+        self.assertCountEqual(results, ['seoul', 'busan'])
+        # 두 번째 BLPOP은 아직 응답이 없는 키만 기다림
+        self.assertEqual(len(replies[0]), 2)
+        self.assertEqual(len(replies[1]), 1)
+
+    def test_timeout_returns_partial_results(self):
+        client = mock.Mock()
+        client.blpop.return_value = None
+        with mock.patch.object(sharding, 'get_redis', return_value=client):
+            self.assertEqual(sharding.request_shards(['seoul'], self.user, 37.5, 127.0, 0.05), {})
+        self.assertEqual(client.blpop.call_count, 1)
+
+
+class FindMatchableUsersRoutedTests(SimpleTestCase):
+
+    @override_settings(MATCHING_SHARD_MAP={'wydm': 'seoul'})
+    def test_local_shard_is_not_requested(self):
+        with mock.patch.object(sharding, 'request_shards') as request_shards, \
+                mock.patch.object(sharding, 'find_matchable_users_in_shard', return_value=[]) as in_shard, \
+                mock.patch.object(sharding.User.objects, 'select_related') as select_related:
+            select_related.return_value.in_bulk.return_value = {}
+            sharding.find_matchable_users_routed(
+                SimpleNamespace(id=1), 37.5665, 126.9780, radius_km=0.05, local_shard='seoul',
+            )
+        request_shards.assert_not_called()
+        in_shard.assert_called_once()
+
+    @override_settings(MATCHING_SHARD_MAP={'wydm': 'seoul'})
+    def test_unanswered_shard_is_computed_locally(self):
+        with mock.patch.object(sharding, 'request_shards', return_value={}) as request_shards, \
+                mock.patch.object(sharding, 'find_matchable_users_in_shard', return_value=[]) as in_shard, \
+                mock.patch.object(sharding.User.objects, 'select_related') as select_related, \
+                contextlib.redirect_stdout(io.StringIO()):
+            select_related.return_value.in_bulk.return_value = {}
+            sharding.find_matchable_users_routed(
+                SimpleNamespace(id=1), 37.5665, 126.9780, radius_km=0.05, local_shard=DEFAULT_SHARD,
+            )
+        request_shards.assert_called_once()
+        self.assertEqual(request_shards.call_args[0][0], ['seoul'])
+        self.assertEqual(in_shard.call_args[0][4], 'seoul')
@@ -9,6 +9,9 @@ app_name = 'matching'
 urlpatterns = [
     path('matchable-count/', views.matchable_count, name='matchable_count'),
     path('check/', views.match_check, name='match_check'),
+    path('check/wait/', views.match_check_wait, name='match_check_wait'),
+    path('changes/', views.match_changes, name='match_changes'),
+    path('heartbeat/', views.heartbeat, name='heartbeat'),
     path('notifications/register/', views.register_notification, name='register_notification'),
     path('active-count/', views.active_match_count, name='active_match_count'),
 ]
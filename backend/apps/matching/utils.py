@@ -1,9 +1,24 @@
 """
 매칭 관련 유틸리티 함수
 """
-from math import radians, cos, sin, asin, sqrt
-from django.db.models import Q
-from apps.users.models import User, UserLocation, IdealTypeProfile
+from math import radians, cos, sin, asin, sqrt, floor, ceil
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, F, Value, FloatField, Case, When
+from django.db.models.functions import Cast, Radians, Sin, Cos, ASin, Sqrt, Power, Least
+from apps.users.models import (
+    COORDINATE_SCALE, User, UserLocation, IdealTypeProfile, from_microdegrees, location_regions_for_box, to_microdegrees,
+)
+from apps.users.location_buffer import get_current_location, overlay_buffered_locations
+from apps.users.presence import filter_live_users
+from apps.matching.models import Match
+from apps.matching.events import publish_match_changes
+from config.db_router import use_replica
+
+
+# 지구 반경 (km)
+EARTH_RADIUS_KM = 6371
 
 
 def calculate_distance_km(lat1, lon1, lat2, lon2):
@@ -12,7 +27,7 @@ def calculate_distance_km(lat1, lon1, lat2, lon2):
     반환: 거리 (km)
     """
     # 지구 반경 (km)
-    R = 6371
+    R = EARTH_RADIUS_KM
     
     # 라디안으로 변환
     lat1, lon1, lat2, lon2 = map(radians, [float(lat1), float(lon1), float(lat2), float(lon2)])
@@ -26,6 +41,86 @@ def calculate_distance_km(lat1, lon1, lat2, lon2):
     return R * c
 
 
+def bounding_box(latitude, longitude, radius_km):
+    """
+    반경 radius_km 원을 감싸는 위도/경도 사각형
+
+    Returns:
+        tuple: (min_lat, max_lat, min_lon, max_lon)
+    """
+    lat_delta = radius_km / 111.32
+    lon_delta = radius_km / (111.32 * max(cos(radians(float(latitude))), 0.01))
+    return (
+        float(latitude) - lat_delta,
+        float(latitude) + lat_delta,
+        float(longitude) - lon_delta,
+        float(longitude) + lon_delta,
+    )
+
+
+def bounding_box_e6(latitude, longitude, radius_km):
+    """
+    bounding_box를 마이크로도 정수로 (바깥쪽으로 올림/내림해 경계의 위치도 포함)
+
+    Returns:
+        tuple: (min_lat_e6, max_lat_e6, min_lon_e6, max_lon_e6)
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    return (
+        floor(min_lat * COORDINATE_SCALE),
+        ceil(max_lat * COORDINATE_SCALE),
+        floor(min_lon * COORDINATE_SCALE),
+        ceil(max_lon * COORDINATE_SCALE),
+    )
+
+
+def distance_km_expression(lat_expr, lon_expr, latitude, longitude):
+    """
+    calculate_distance_km과 같은 Haversine 거리를 DB에서 계산하는 ORM 식(expression)
+
+    Args:
+        lat_expr, lon_expr: 위도/경도(마이크로도) 컬럼을 가리키는 식 (예: F('location__latitude_e6'))
+        latitude, longitude: 기준 위치 (도)
+
+    Returns:
+        Expression: 거리 (km, FloatField)
+    """
+    lat1 = Radians(Value(float(latitude), output_field=FloatField()))
+    lon1 = Radians(Value(float(longitude), output_field=FloatField()))
+    scale = Value(float(COORDINATE_SCALE), output_field=FloatField())
+    lat2 = Radians(Cast(lat_expr, FloatField()) / scale)
+    lon2 = Radians(Cast(lon_expr, FloatField()) / scale)
+
+    a = (
+        Power(Sin((lat2 - lat1) / 2), 2)
+        + Cos(lat1) * Cos(lat2) * Power(Sin((lon2 - lon1) / 2), 2)
+    )
+    # 부동소수 오차로 1을 살짝 넘으면 asin이 실패하므로 1로 제한
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(Least(a, Value(1.0, output_field=FloatField()))))
+
+
+def annotate_partner_distance(matches, current_user, latitude, longitude):
+    """
+    Match 쿼리셋에 상대방 ID와 상대방 현재 위치까지의 거리를 붙입니다.
+
+    상대방의 UserLocation을 JOIN해서 한 번의 쿼리로 계산하며,
+    상대방 위치가 없으면 distance_km은 NULL이 됩니다.
+
+    Returns:
+        QuerySet: other_user_id, distance_km 이 annotate된 Match 쿼리셋
+    """
+    is_user1 = Q(user1_id=current_user.id)
+    return matches.annotate(
+        other_user_id=Case(When(is_user1, then=F('user2_id')), default=F('user1_id')),
+        distance_km=distance_km_expression(
+            Case(When(is_user1, then=F('user2__location__latitude_e6')), default=F('user1__location__latitude_e6')),
+            Case(When(is_user1, then=F('user2__location__longitude_e6')), default=F('user1__location__longitude_e6')),
+            latitude,
+            longitude,
+        ),
+    )
+
+
 def check_match_criteria(ideal_type, candidate_user, user_gender):
     """
     이상형 조건 체크 및 매칭 점수 계산 (2단계 방식)
@@ -310,6 +405,55 @@ def check_match_criteria(ideal_type, candidate_user, user_gender):
     return final_score
 
 
+def evaluate_candidate(current_user, ideal_type, candidate, latitude, longitude, radius_km):
+    """
+    후보 1명에 대해 거리와 이상형 조건을 확인합니다.
+
+    Args:
+        current_user: User 객체 (현재 사용자)
+        ideal_type: 현재 사용자의 IdealTypeProfile
+        candidate: User 객체 (location이 로딩된 매칭 후보)
+        latitude, longitude: 현재 위치
+        radius_km: 반경 (km 단위)
+
+    Returns:
+        dict | None: 매칭 가능하면 {'user', 'distance_km', 'distance_m', 'match_score'}, 아니면 None
+    """
+    candidate_location = candidate.location
+    
+    # 거리 계산
+    distance_km = calculate_distance_km(latitude, longitude, *candidate_location.degrees)
+    
+    print(f'   후보: {candidate.user.username} (거리: {distance_km * 1000:.2f}m)')
+    
+    # 반경 체크
+    if distance_km > radius_km:
+        print(f'      ❌ 거리 초과 ({distance_km * 1000:.2f}m > {radius_km * 1000:.2f}m)')
+        return None
+    
+    # 매칭 조건 체크
+    match_score = check_match_criteria(
+        ideal_type,
+        candidate,
+        current_user.gender
+    )
+    
+    print(f'      매칭 점수: {match_score}')
+    
+    # 매칭 점수 50점 이상이면 매칭 가능
+    if match_score >= 50.0:
+        print(f'      ✅ 매칭 가능! (점수: {match_score:.1f}점 >= 50점)')
+        return {
+            'user': candidate,
+            'distance_km': distance_km,
+            'distance_m': distance_km * 1000,
+            'match_score': match_score,
+        }
+    
+    print(f'      ❌ 매칭 조건 불충족 (점수: {match_score:.1f}점 < 50점)')
+    return None
+
+
 def find_matchable_users(current_user, latitude, longitude, radius_km=0.5):
     """
     반경 내에서 이상형 조건에 부합하는 사용자 찾기
@@ -333,6 +477,23 @@ def find_matchable_users(current_user, latitude, longitude, radius_km=0.5):
         print(f'   ❌ 이상형 프로필 없음')
         return []
     
+    # 요청자 본인의 이상형 프로필은 primary에서 읽고, 후보 조회만 읽기 복제본으로
+    with use_replica(current_user.user):
+        return _find_matchable_users(current_user, ideal_type, latitude, longitude, radius_km)
+
+
+def _find_matchable_users(current_user, ideal_type, latitude, longitude, radius_km):
+    """find_matchable_users의 후보 조회/점수 계산 (이상형 프로필을 읽은 뒤)"""
+    if settings.MATCHING_READ_MODEL:
+        # 매칭 후보 읽기 모델(matching_candidates)만 읽어서 계산 (순환 import 방지)
+        from apps.matching.candidates import find_matchable_candidates
+        return find_matchable_candidates(current_user, ideal_type, latitude, longitude, radius_km)
+    
+    if settings.MATCHING_SQL_SCORING:
+        # 필터링/점수 계산/정렬을 SQL 한 문장으로 (순환 import 방지)
+        from apps.matching.scoring import find_matchable_users_scored
+        return find_matchable_users_scored(current_user, ideal_type, latitude, longitude, radius_km)
+    
     # 매칭 동의가 ON인 사용자만 조회 (matching_consent = True)
     # 자기 자신은 제외
     candidate_users = User.objects.filter(
@@ -342,52 +503,28 @@ def find_matchable_users(current_user, latitude, longitude, radius_km=0.5):
     
     print(f'   매칭 동의 ON 사용자: {candidate_users.count()}명')
     
-    # 위치 정보가 있는 사용자만 필터링
+    # 위치 정보가 있는 사용자만 필터링 (반경의 경계 사각형 안, latitude_e6/longitude_e6 인덱스 사용)
+    # region 조건은 user_locations가 지역으로 파티셔닝된 경우 읽을 파티션을 한두 개로 줄임
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    min_lat_e6, max_lat_e6, min_lon_e6, max_lon_e6 = bounding_box_e6(latitude, longitude, radius_km)
     candidate_users = candidate_users.filter(
-        location__isnull=False
+        location__region__in=location_regions_for_box(min_lat, max_lat, min_lon, max_lon),
+        location__latitude_e6__range=(min_lat_e6, max_lat_e6),
+        location__longitude_e6__range=(min_lon_e6, max_lon_e6),
     ).select_related('location')
     
-    print(f'   위치 정보 있는 사용자: {candidate_users.count()}명')
+    # 최근 PRESENCE_WINDOW_SECONDS 안에 위치/heartbeat를 보낸 사용자만 (오래된 위치로 매칭되지 않도록)
+    candidate_users = filter_live_users(candidate_users)
+    
+    print(f'   반경 근처 접속 중인 사용자: {len(candidate_users)}명')
     
     matchable_users = []
     
-    for candidate in candidate_users:
-        candidate_location = candidate.location
-        
-        # 거리 계산
-        distance_km = calculate_distance_km(
-            latitude, longitude,
-            float(candidate_location.latitude),
-            float(candidate_location.longitude)
-        )
-        
-        print(f'   후보: {candidate.user.username} (거리: {distance_km * 1000:.2f}m)')
-        
-        # 반경 체크
-        if distance_km > radius_km:
-            print(f'      ❌ 거리 초과 ({distance_km * 1000:.2f}m > {radius_km * 1000:.2f}m)')
-            continue
-        
-        # 매칭 조건 체크
-        match_score = check_match_criteria(
-            ideal_type,
-            candidate,
-            current_user.gender
-        )
-        
-        print(f'      매칭 점수: {match_score}')
-        
-        # 매칭 점수 50점 이상이면 매칭 가능
-        if match_score >= 50.0:
-            matchable_users.append({
-                'user': candidate,
-                'distance_km': distance_km,
-                'distance_m': distance_km * 1000,
-                'match_score': match_score,
-            })
-            print(f'      ✅ 매칭 가능! (점수: {match_score:.1f}점 >= 50점)')
-        else:
-            print(f'      ❌ 매칭 조건 불충족 (점수: {match_score:.1f}점 < 50점)')
+    # write-behind 모드면 Redis 버퍼의 최신 위치로 거리 계산
+    for candidate in overlay_buffered_locations(candidate_users):
+        matchable = evaluate_candidate(current_user, ideal_type, candidate, latitude, longitude, radius_km)
+        if matchable:
+            matchable_users.append(matchable)
     
     # 점수 높은 순 → 거리 가까운 순으로 정렬
     matchable_users.sort(key=lambda x: (-x['match_score'], x['distance_km']))
@@ -397,6 +534,164 @@ def find_matchable_users(current_user, latitude, longitude, radius_km=0.5):
     return matchable_users
 
 
+def reconcile_matches(current_user, latitude, longitude, radius_km, matchable_users=None):
+    """
+    현재 위치 기준으로 사용자의 매칭을 갱신합니다.
+    - 반경 밖으로 나갔거나 위치 정보가 없는 상대와의 매칭 삭제
+    - 반경 내에서 이상형 조건에 부합하는 사용자와 새 매칭 생성
+
+    Args:
+        current_user: User 객체 (현재 사용자)
+        latitude: 현재 위치 위도
+        longitude: 현재 위치 경도
+        radius_km: 반경 (km 단위)
+        matchable_users: 이미 계산된 매칭 가능 사용자 목록 (없으면 find_matchable_users로 계산)
+
+    Returns:
+        tuple: (new_matches, deleted_matches, existing_matches)
+            - new_matches: 새로 생성된 Match 리스트
+            - deleted_matches: 삭제된 매칭 정보(dict) 리스트
+            - existing_matches: 유지된 기존 Match 리스트 (최신순)
+    """
+    # 매칭 가능한 사용자 찾기
+    if matchable_users is None:
+        matchable_users = find_matchable_users(
+            current_user,
+            float(latitude),
+            float(longitude),
+            radius_km=radius_km
+        )
+
+    print(f'📊 매칭 가능한 사용자: {len(matchable_users)}명')
+    for matchable in matchable_users[:5]:  # 처음 5개만 출력
+        print(f'   - {matchable["user"].user.username} (거리: {matchable["distance_m"]:.2f}m, 점수: {matchable["match_score"]})')
+
+    # 기존 매칭 + 상대방 현재 위치까지의 거리 (쿼리 1회)
+    matches = annotate_partner_distance(
+        Match.objects.filter(
+            Q(user1=current_user) | Q(user2=current_user)
+        ).select_related('user1__user', 'user2__user'),
+        current_user,
+        latitude,
+        longitude,
+    ).order_by('-matched_at')
+
+    # 거리 바깥으로 나간 매칭 삭제
+    existing_matches = []
+    deleted_matches = []
+    for match in matches:
+        other_user = match.user2 if match.user1_id == current_user.id else match.user1
+
+        if match.distance_km is None:
+            # 상대방 위치 정보가 없으면 매칭 삭제
+            deleted_matches.append({
+                'match_id': match.id,
+                'other_user': other_user.user.username,
+                'reason': '상대방 위치 정보 없음'
+            })
+            print(f'   🗑️ 매칭 삭제: {other_user.user.username} (위치 정보 없음)')
+        elif match.distance_km > radius_km:
+            deleted_matches.append({
+                'match_id': match.id,
+                'other_user': other_user.user.username,
+                'distance_km': match.distance_km,
+                'radius_km': radius_km
+            })
+            print(f'   🗑️ 매칭 삭제: {other_user.user.username} (거리: {match.distance_km*1000:.2f}m > 반경: {radius_km*1000:.2f}m)')
+        else:
+            existing_matches.append(match)
+
+    deleted_pairs = []
+    if deleted_matches:
+        deleted_ids = [info['match_id'] for info in deleted_matches]
+        deleted_pairs = [(match.id, match.user1_id, match.user2_id) for match in matches if match.id in deleted_ids]
+        Match.objects.filter(id__in=deleted_ids).delete()
+        print(f'📊 총 {len(deleted_matches)}개의 매칭이 삭제되었습니다.')
+
+    # 새 매칭 생성 (Match에 저장할 현재 위치는 마이크로도 정수에서 한 번만 Decimal로 변환)
+    user1_latitude = from_microdegrees(to_microdegrees(latitude))
+    user1_longitude = from_microdegrees(to_microdegrees(longitude))
+    matched_user_ids = {match.user1_id for match in existing_matches} | {match.user2_id for match in existing_matches}
+    new_matches = []
+    for matchable in matchable_users:
+        candidate_user = matchable['user']
+
+        # 이미 매칭된 사용자는 제외
+        if candidate_user.id in matched_user_ids:
+            print(f'   ⚠️ {candidate_user.user.username}: 이미 매칭됨')
+            continue
+
+        try:
+            with transaction.atomic():
+                new_match = Match.objects.create(
+                    user1=current_user,
+                    user2=candidate_user,
+                    user1_latitude=user1_latitude,
+                    user1_longitude=user1_longitude,
+                    user2_latitude=candidate_user.location.latitude,
+                    user2_longitude=candidate_user.location.longitude,
+                    match_score=Decimal(str(matchable['match_score'])).quantize(Decimal('0.01')),
+                    matched_criteria={
+                        'distance_m': matchable['distance_m'],
+                        'match_score': matchable['match_score'],
+                    }
+                )
+                new_matches.append(new_match)
+                print(f'   ✅ 새 매칭 생성 완료 (매칭 ID: {new_match.id})')
+        except Exception as e:
+            # 매칭 생성 실패 (중복 등)는 무시하고 계속
+            print(f'⚠️ 매칭 생성 실패: {str(e)}')
+            continue
+
+    publish_match_changes(created=new_matches, deleted=deleted_pairs)
+
+    return new_matches, deleted_matches, existing_matches
+
+
+def evaluate_moved_user(user_id, radius_km, shard=None):
+    """
+    매칭 워커용: 이동한 사용자 기준으로 매칭을 한 번 계산합니다.
+
+    이벤트 발행 이후 동의가 꺼졌거나 위치가 삭제되었을 수 있으므로 현재 상태를 다시 확인합니다.
+    shard가 주어지면(지역 샤딩) 자기 샤드는 직접, 반경이 걸치는 다른 샤드는 해당 샤드에 요청해 계산합니다.
+
+    Returns:
+        tuple | None: reconcile_matches 결과 (매칭 대상이 아니면 None)
+    """
+    try:
+        current_user = User.objects.select_related(
+            'user', 'location', 'ideal_type_profile'
+        ).get(id=user_id)
+        location = get_current_location(current_user)
+    except (User.DoesNotExist, UserLocation.DoesNotExist):
+        return None
+
+    if not current_user.user.email_verified or not current_user.matching_consent:
+        return None
+
+    latitude, longitude = location.degrees
+    matchable_users = None
+    if shard is not None:
+        # 순환 import 방지 (sharding → utils)
+        from apps.matching.sharding import find_matchable_users_routed
+
+        matchable_users = find_matchable_users_routed(
+            current_user,
+            latitude,
+            longitude,
+            radius_km=radius_km,
+            local_shard=shard,
+        )
+
+    return reconcile_matches(
+        current_user,
+        latitude,
+        longitude,
+        radius_km,
+        matchable_users=matchable_users,
+    )
+
+
 def check_new_matches(current_user, last_check_time=None):
     """
     새로운 매칭 발생 여부 확인
@@ -434,3 +729,93 @@ def check_new_matches(current_user, last_check_time=None):
         'new_matches_count': new_matches_count,
         'latest_match': latest_match,
     }
+
+
+def get_match_changes(current_user, cursor, latest):
+    """
+    커서 이후의 매칭 변경분 계산
+
+    같은 매칭이 여러 번 바뀌었으면 마지막 상태만 반환하고,
+    커서 이후에 생성되었다가 삭제된 매칭은 클라이언트가 모르는 매칭이므로 제외합니다.
+
+    Args:
+        current_user: User 객체 (현재 사용자)
+        cursor: 클라이언트가 마지막으로 받은 커서 (MatchChange.id)
+        latest: 이번 응답의 커서 (이 값까지만 조회해 응답 도중 추가된 변경은 다음 요청에서 받도록 함)
+
+    Returns:
+        tuple: (created_matches, deleted)
+            - created_matches: 현재 존재하는 새 Match 리스트 (최신순)
+            - deleted: [{'match_id', 'other_user_id'}, ...]
+    """
+    from apps.matching.models import MatchChange
+
+    changes = MatchChange.objects.filter(
+        user=current_user,
+        id__gt=cursor,
+        id__lte=latest,
+    ).order_by('id').values_list('match_id', 'other_user_id', 'change_type')
+
+    first_change = {}
+    last_change = {}
+    for match_id, other_user_id, change_type in changes:
+        first_change.setdefault(match_id, change_type)
+        last_change[match_id] = (other_user_id, change_type)
+
+    created_ids = []
+    deleted = []
+    for match_id, (other_user_id, change_type) in last_change.items():
+        if change_type == MatchChange.CHANGE_CREATED:
+            created_ids.append(match_id)
+        elif first_change[match_id] != MatchChange.CHANGE_CREATED:
+            deleted.append({'match_id': match_id, 'other_user_id': other_user_id})
+
+    created_matches = list(
+        Match.objects.filter(id__in=created_ids)
+        .select_related('user1__user', 'user2__user')
+        .order_by('-matched_at')
+    ) if created_ids else []
+
+    return created_matches, deleted
+
+
+def match_changes_pruned_before():
+    """
+    prune_match_changes로 삭제된 이력의 경계 (이보다 작은 커서는 전체 목록으로 다시 동기화)
+
+    남아 있는 가장 오래된 이력 ID - 1 (캐시가 아니라 DB에서 구하므로 캐시를 비워도 유지됨)
+    prune_match_changes는 가장 최근 이력을 항상 남기므로, 이력이 한 번이라도 있었다면 경계가 사라지지 않습니다.
+    """
+    from django.db.models import Min
+    from apps.matching.models import MatchChange
+
+    first_id = MatchChange.objects.aggregate(Min('id'))['id__min']
+    return first_id - 1 if first_id is not None else 0
+
+
+def prune_match_changes(retention_days):
+    """
+    보관 기간이 지난 매칭 변경 이력 삭제 (가장 최근 이력 1건은 경계로 남김)
+
+    Returns:
+        int: 삭제된 이력 수
+    """
+    from datetime import timedelta
+    from django.db.models import Max
+    from django.utils import timezone
+    from apps.matching.models import MatchChange
+
+    newest_id = MatchChange.objects.aggregate(Max('id'))['id__max']
+    if newest_id is None:
+        return 0
+
+    expired = MatchChange.objects.filter(
+        created_at__lt=timezone.now() - timedelta(days=retention_days),
+        id__lt=newest_id,
+    )
+    pruned_before = expired.aggregate(Max('id'))['id__max']
+    if pruned_before is None:
+        return 0
+
+    deleted_count, _ = MatchChange.objects.filter(id__lte=pruned_before).delete()
+    return deleted_count
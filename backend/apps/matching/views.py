@@ -1,21 +1,44 @@
 """
 매칭 관련 API Views
 """
+import asyncio
+
+import redis
+from asgiref.sync import sync_to_async
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import APIException
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework import status
 from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
-from django.db.models import Q
-from decimal import Decimal
+from django.db.models import Q, Max
+from django.views.decorators.http import require_GET
 from datetime import timedelta
 
-from apps.users.models import User, UserLocation, AuthUser
+from config.db_router import use_replica
+from apps.users.models import COORDINATE_SCALE, UserLocation, to_microdegrees
 from apps.users.permissions import IsEmailVerified
-from apps.matching.models import Match, Notification
-from apps.matching.utils import calculate_distance_km, find_matchable_users
+from apps.users.serializers import UserLocationSerializer
+from apps.users.location_buffer import get_current_location
+from apps.users.presence import mark_user_seen
+from apps.users.profile_loader import forget_request_profiles, load_request_profile
+from apps.users.utils import save_user_location
+from apps.matching.models import Match, MatchChange, Notification
+from apps.matching.events import NOTIFY_CHANNEL, is_precomputed_mode, pop_match_pickups, publish_count_changes
+from apps.matching.redis_client import get_async_redis
+from apps.matching.incremental import find_matchable_users_incremental, is_incremental_mode
+from apps.matching.sharding import DEFAULT_SHARD, find_matchable_users_routed, is_sharding_enabled
+from apps.matching.utils import (
+    annotate_partner_distance,
+    find_matchable_users,
+    get_match_changes,
+    match_changes_pruned_before,
+    reconcile_matches,
+)
 from apps.matching.serializers import (
     MatchableCountSerializer,
     MatchCheckSerializer,
@@ -28,6 +51,7 @@ def _get_current_user_profile(request, *, user_id_source: str = 'query', authed_
     """
     DEBUG 모드에서 인증 없이 테스트할 때 user_id로 프로필을 로딩하는 공통 로직.
     - 기존 응답 포맷/상태코드를 그대로 유지하기 위해 (profile, error_response) 형태로 반환합니다.
+    - 프로필은 인증 사용자/이상형/위치와 함께 요청당 한 번만 로딩합니다. (load_request_profile)
     """
     if settings.DEBUG and not request.user.is_authenticated:
         user_id = request.query_params.get('user_id') if user_id_source == 'query' else request.data.get('user_id')
@@ -37,23 +61,22 @@ def _get_current_user_profile(request, *, user_id_source: str = 'query', authed_
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        try:
-            auth_user = AuthUser.objects.get(id=user_id)
-            return auth_user.profile, None
-        except Exception:
+        current_user = load_request_profile(request, user_id)
+        if current_user is None:
             return None, Response(
                 {'success': False, 'error': f'user_id {user_id}에 해당하는 프로필이 없습니다.'},
                 status=status.HTTP_404_NOT_FOUND,
             )
+        return current_user, None
 
     # 정상 모드: 인증된 사용자
-    try:
-        return request.user.profile, None
-    except User.DoesNotExist:
+    current_user = load_request_profile(request)
+    if current_user is None:
         return None, Response(
             {'success': False, 'error': authed_missing_profile_error},
             status=status.HTTP_404_NOT_FOUND,
         )
+    return current_user, None
 
 
 def _deny_if_email_not_verified(user_profile, *, error_message: str):
@@ -86,6 +109,96 @@ def _deny_if_matching_consent_off(user_profile, *, error_message: str):
     )
 
 
+def _precomputed_match_check(current_user):
+    """
+    precomputed 모드의 match_check 응답
+
+    매칭 워커가 생성한 매칭은 양쪽 사용자의 pickup 목록에 기록되므로,
+    pickup에 남아 있는(아직 삭제되지 않은) 매칭을 새 매칭으로 돌려줍니다.
+    """
+    new_match_ids = pop_match_pickups(current_user.id)
+    user_matches = Match.objects.filter(
+        Q(user1=current_user) | Q(user2=current_user)
+    ).select_related('user1__user', 'user2__user').order_by('-matched_at')
+    
+    new_matches = list(user_matches.filter(id__in=new_match_ids)) if new_match_ids else []
+    latest_match = new_matches[0] if new_matches else user_matches.first()
+    
+    return Response({
+        'success': True,
+        'has_new_match': len(new_matches) > 0,
+        'new_matches_count': len(new_matches),
+        'latest_match': MatchSerializer(latest_match).data if latest_match else None,
+    }, status=status.HTTP_200_OK)
+
+
+def find_matchable_users_for_mode(current_user, latitude, longitude, radius, *, load_users=True):
+    """
+    현재 설정에 맞는 방식으로 매칭 가능한 사용자 찾기
+    - incremental 모드: 변경된 후보만 재평가
+    - 지역 샤딩: 반경이 걸치는 샤드에서 계산한 결과를 합침 (default 샤드는 이 프로세스에서 직접 계산)
+    - 그 외: 전체 후보 계산 (find_matchable_users)
+
+    incremental 모드는 사용자별 후보 캐시를 이 프로세스에서 직접 갱신하므로 지역 샤딩을 사용하지 않습니다.
+    (MATCHING_MODE=incremental이면 MATCHING_SHARD_MAP은 이 경로에서 무시됨)
+    """
+    if is_incremental_mode():
+        return find_matchable_users_incremental(
+            current_user,
+            latitude,
+            longitude,
+            radius_km=radius,
+            load_users=load_users,
+        )
+    if is_sharding_enabled():
+        return find_matchable_users_routed(
+            current_user,
+            latitude,
+            longitude,
+            radius_km=radius,
+            local_shard=DEFAULT_SHARD,
+        )
+    return find_matchable_users(current_user, float(latitude), float(longitude), radius_km=radius)
+
+
+def _is_capped_scan(candidates):
+    """
+    후보 계산 결과가 MATCHING_SQL_LIMIT명에서 잘렸을 수 있는지 여부
+    (DB 점수 계산은 점수 → 거리 순으로 MATCHING_SQL_LIMIT명까지만 가져옴)
+    """
+    return (
+        settings.MATCHING_SQL_SCORING
+        and not settings.MATCHING_READ_MODEL
+        and len(candidates) >= settings.MATCHING_SQL_LIMIT
+    )
+
+
+def has_fresh_sweep_count(current_user, radius):
+    """
+    전체 매칭 스윕(run_matching_sweep)이 저장한 matchable_count를 그대로 쓸 수 있는지 여부
+    - 요청 반경이 스윕 반경(MATCHING_COUNT_RADIUS_KM)과 같고
+    - 마지막 갱신이 스윕 주기 2회 이내인 경우
+    """
+    if radius != settings.MATCHING_COUNT_RADIUS_KM or not current_user.last_count_updated_at:
+        return False
+    max_age = timedelta(seconds=settings.MATCHING_SWEEP_INTERVAL_SECONDS * 2)
+    return timezone.now() - current_user.last_count_updated_at <= max_age
+
+
+def save_matchable_count(current_user, matchable_count, radius):
+    """
+    계산한 매칭 가능 인원 수 저장
+
+    값이 바뀌었으면 WebSocket으로 연결된 사용자에게도 전송합니다. (publish_count_changes)
+    """
+    changed = current_user.matchable_count != matchable_count
+    current_user.matchable_count = matchable_count
+    current_user.last_count_updated_at = timezone.now()
+    current_user.save(update_fields=['matchable_count', 'last_count_updated_at'])
+    if changed:
+        publish_count_changes({current_user.id: matchable_count}, radius)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated & IsEmailVerified if not settings.DEBUG else AllowAny])
 def matchable_count(request):
@@ -132,21 +245,23 @@ def matchable_count(request):
     if denied:
         return denied
     
-    # 매칭 가능한 사용자 찾기
-    matchable_users = find_matchable_users(
-        current_user,
-        latitude,
-        longitude,
-        radius_km=radius
-    )
+    # precomputed 모드: 전체 매칭 스윕이 최근에 계산한 카운트가 있으면 그대로 사용
+    if is_precomputed_mode() and has_fresh_sweep_count(current_user, radius):
+        return Response({
+            'success': True,
+            'matchable_count': current_user.matchable_count,
+            'radius': radius,
+            'last_count_updated_at': current_user.last_count_updated_at.isoformat(),
+        }, status=status.HTTP_200_OK)
+    
+    # 매칭 가능한 사용자 찾기 (incremental 모드에서는 변경된 후보만 재평가)
+    matchable_users = find_matchable_users_for_mode(current_user, latitude, longitude, radius, load_users=False)
     
     matchable_count = len(matchable_users)
     
     # 사용자 프로필에 카운트 업데이트 (useruser는 제외)
     if current_user.user.username != 'useruser':
-        current_user.matchable_count = matchable_count
-        current_user.last_count_updated_at = timezone.now()
-        current_user.save(update_fields=['matchable_count', 'last_count_updated_at'])
+        save_matchable_count(current_user, matchable_count, radius)
     
     return Response({
         'success': True,
@@ -184,6 +299,10 @@ def match_check(request):
     if denied:
         return denied
     
+    # precomputed 모드: 매칭 워커가 계산해 둔 결과만 읽음
+    if is_precomputed_mode():
+        return _precomputed_match_check(current_user)
+    
     # 위치 가져오기 (쿼리 파라미터 우선, 없으면 저장된 위치 사용)
     latitude = request.query_params.get('latitude')
     longitude = request.query_params.get('longitude')
@@ -191,12 +310,11 @@ def match_check(request):
     if latitude and longitude:
         # 쿼리 파라미터에서 위치 가져오기
         try:
-            # DecimalField 제약 조건: max_digits=9, decimal_places=6
-            # 소수점 6자리로 반올림하여 저장
-            latitude = Decimal(str(latitude)).quantize(Decimal('0.000001'))
-            longitude = Decimal(str(longitude)).quantize(Decimal('0.000001'))
+            # 마이크로도 정수로 한 번만 변환 (저장 위치와 같은 소수점 6자리), 이후 계산은 float
+            latitude = to_microdegrees(latitude) / COORDINATE_SCALE
+            longitude = to_microdegrees(longitude) / COORDINATE_SCALE
             print(f'📍 쿼리 파라미터에서 위치 사용: ({latitude}, {longitude})')
-        except (ValueError, TypeError) as e:
+        except (ValueError, TypeError, OverflowError) as e:
             return Response({
                 'success': False,
                 'error': f'latitude와 longitude는 숫자여야 합니다. ({str(e)})'
@@ -204,9 +322,8 @@ def match_check(request):
     else:
         # 저장된 위치 사용
         try:
-            user_location = current_user.location
-            latitude = Decimal(str(user_location.latitude))
-            longitude = Decimal(str(user_location.longitude))
+            user_location = get_current_location(current_user)
+            latitude, longitude = user_location.degrees
             print(f'📍 저장된 위치 사용: ({latitude}, {longitude})')
         except UserLocation.DoesNotExist:
             return Response({
@@ -226,117 +343,15 @@ def match_check(request):
     # 매칭 동의 자동 활성화 제거: 이메일 인증이 완료되지 않은 사용자는 매칭 동의를 활성화할 수 없음
     # (이미 위에서 이메일 인증 여부를 확인했으므로, 여기서는 자동 활성화하지 않음)
     
-    # 매칭 가능한 사용자 찾기
-    matchable_users = find_matchable_users(
+    # 반경 밖 매칭 삭제 + 새 매칭 생성
+    new_matches, _deleted_matches, existing_matches = reconcile_matches(
         current_user,
-        float(latitude),
-        float(longitude),
-        radius_km=radius
+        latitude,
+        longitude,
+        radius,
+        matchable_users=find_matchable_users_for_mode(current_user, latitude, longitude, radius),
     )
     
-    print(f'📊 매칭 가능한 사용자: {len(matchable_users)}명')
-    for matchable in matchable_users[:5]:  # 처음 5개만 출력
-        print(f'   - {matchable["user"].user.username} (거리: {matchable["distance_m"]:.2f}m, 점수: {matchable["match_score"]})')
-    
-    # 기존 매칭 확인 (Match 객체 리스트)
-    existing_matches = Match.objects.filter(
-        Q(user1=current_user) | Q(user2=current_user)
-    ).select_related('user1', 'user2').order_by('-matched_at')
-    
-    print(f'🔍 기존 매칭 확인 중...')
-    for match in existing_matches[:5]:  # 처음 5개만 출력
-        other_user = match.user2 if match.user1 == current_user else match.user1
-        print(f'   ⚠️ {other_user.user.username}: 이미 매칭됨 (매칭 ID: {match.id})')
-    
-    # 거리 바깥으로 나간 매칭 삭제
-    deleted_matches = []
-    for match in existing_matches:
-        other_user = match.user2 if match.user1 == current_user else match.user1
-        
-        # 상대방의 현재 위치 확인
-        try:
-            other_location = other_user.location
-            other_lat = float(other_location.latitude)
-            other_lon = float(other_location.longitude)
-            
-            # 현재 위치와 상대방 위치 간 거리 계산 (km)
-            distance_km = calculate_distance_km(
-                float(latitude), float(longitude),
-                other_lat, other_lon
-            )
-            
-            # 반경 밖이면 매칭 삭제
-            if distance_km > radius:
-                match.delete()
-                deleted_matches.append({
-                    'match_id': match.id,
-                    'other_user': other_user.user.username,
-                    'distance_km': distance_km,
-                    'radius_km': radius
-                })
-                print(f'   🗑️ 매칭 삭제: {other_user.user.username} (거리: {distance_km*1000:.2f}m > 반경: {radius*1000:.2f}m)')
-        except UserLocation.DoesNotExist:
-            # 상대방 위치 정보가 없으면 매칭 삭제
-            match.delete()
-            deleted_matches.append({
-                'match_id': match.id,
-                'other_user': other_user.user.username,
-                'reason': '상대방 위치 정보 없음'
-            })
-            print(f'   🗑️ 매칭 삭제: {other_user.user.username} (위치 정보 없음)')
-    
-    if deleted_matches:
-        print(f'📊 총 {len(deleted_matches)}개의 매칭이 삭제되었습니다.')
-    
-    # 삭제 후 기존 매칭 목록 다시 조회 (삭제된 것 제외)
-    existing_matches = Match.objects.filter(
-        Q(user1=current_user) | Q(user2=current_user)
-    ).select_related('user1', 'user2').order_by('-matched_at')
-    
-    # 새 매칭 생성
-    new_matches = []
-    for matchable in matchable_users:
-        candidate_user = matchable['user']
-        
-        # 이미 매칭된 사용자는 제외
-        if any(m.user1 == candidate_user or m.user2 == candidate_user for m in existing_matches):
-            print(f'   ⚠️ {candidate_user.user.username}: 이미 매칭됨 (매칭 ID: {[m.id for m in existing_matches if m.user1 == candidate_user or m.user2 == candidate_user][0]})')
-            continue
-        
-        # 새 매칭 생성
-        try:
-            # candidate_user의 위치 정보 확인
-            if not hasattr(candidate_user, 'location') or not candidate_user.location:
-                continue  # 위치 정보가 없으면 스킵
-            
-            with transaction.atomic():
-                # DecimalField 제약 조건: max_digits=9, decimal_places=6
-                # 소수점 6자리로 반올림
-                user1_lat = Decimal(str(latitude)).quantize(Decimal('0.000001'))
-                user1_lon = Decimal(str(longitude)).quantize(Decimal('0.000001'))
-                user2_lat = Decimal(str(candidate_user.location.latitude)).quantize(Decimal('0.000001'))
-                user2_lon = Decimal(str(candidate_user.location.longitude)).quantize(Decimal('0.000001'))
-                
-                new_match = Match.objects.create(
-                    user1=current_user,
-                    user2=candidate_user,
-                    user1_latitude=user1_lat,
-                    user1_longitude=user1_lon,
-                    user2_latitude=user2_lat,
-                    user2_longitude=user2_lon,
-                    match_score=Decimal(str(matchable['match_score'])).quantize(Decimal('0.01')),
-                    matched_criteria={
-                        'distance_m': matchable['distance_m'],
-                        'match_score': matchable['match_score'],
-                    }
-                )
-                new_matches.append(new_match)
-                print(f'   ✅ 새 매칭 생성 완료 (매칭 ID: {new_match.id})')
-        except Exception as e:
-            # 매칭 생성 실패 (중복 등)는 무시하고 계속
-            print(f'⚠️ 매칭 생성 실패: {str(e)}')
-            continue
-    
     # 최신 매칭 정보 (새 매칭 우선, 없으면 기존 매칭)
     latest_match = new_matches[0] if new_matches else (existing_matches[0] if existing_matches else None)
     
@@ -372,6 +387,334 @@ def match_check(request):
         }, status=status.HTTP_200_OK)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated & IsEmailVerified if not settings.DEBUG else AllowAny])
+def match_changes(request):
+    """
+    API 13-2: 매칭 변경분 조회
+    GET /api/matching/changes/?cursor=<마지막으로 받은 cursor>
+    
+    cursor 이후 생성/삭제된 매칭만 반환합니다.
+    cursor가 없거나 보관 기간이 지나 이력이 정리된 경우에는 현재 매칭 전체를 반환합니다(reset).
+    응답의 ETag를 If-None-Match로 보내면 변경이 없을 때 304 Not Modified를 반환합니다.
+    """
+    current_user, error_response = _get_current_user_profile(request, user_id_source='query')
+    if error_response:
+        return error_response
+    
+    denied = _deny_if_email_not_verified(
+        current_user,
+        error_message='이메일 인증이 완료되지 않았습니다. 매칭을 확인하려면 먼저 이메일 인증을 완료해주세요.',
+    )
+    if denied:
+        return denied
+    
+    cursor = request.query_params.get('cursor')
+    if cursor is not None:
+        try:
+            cursor = int(cursor)
+        except ValueError:
+            return Response({
+                'success': False,
+                'error': 'cursor는 정수여야 합니다.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+    
+    latest = _latest_match_cursor(current_user)
+    # 응답 본문은 (cursor, latest)로 정해지므로 둘 다 ETag에 포함 (이전 cursor로 온 요청이 변경분을 놓치지 않도록)
+    etag = f'"match-changes-{current_user.id}-{cursor}-{latest}"'
+    
+    # 변경 없음(cursor가 이미 최신): 본문 없이 304 (latest는 정리 경계 이상이므로 reset 대상이 아님)
+    if cursor == latest and request.headers.get('If-None-Match') == etag:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        response['ETag'] = etag
+        return response
+    
+    response = Response({
+        'success': True,
+        **_match_changes_payload(current_user, cursor, latest),
+    }, status=status.HTTP_200_OK)
+    response['ETag'] = etag
+    return response
+
+
+def _latest_match_cursor(current_user):
+    """
+    응답으로 돌려줄 커서: 사용자의 가장 최근 변경 이력 ID
+
+    정리 경계(match_changes_pruned_before)보다 작으면 경계를 돌려줍니다.
+    (이력이 없거나 모두 정리된 사용자가 다음 요청에서 계속 reset되지 않도록, 경계 이하의 이력은 이미 없음)
+    """
+    latest = MatchChange.objects.filter(user=current_user).aggregate(Max('id'))['id__max'] or 0
+    return max(latest, match_changes_pruned_before())
+
+
+def _needs_match_reset(cursor):
+    """커서가 없거나 이력이 정리된 구간이면 현재 매칭 전체를 다시 보내야 함"""
+    return cursor is None or cursor < match_changes_pruned_before()
+
+
+def _match_changes_payload(current_user, cursor, latest=None):
+    """
+    변경분 응답 본문 (match_changes, heartbeat 공용)
+    - reset이면 현재 매칭 전체를 created로 반환
+    """
+    if latest is None:
+        latest = _latest_match_cursor(current_user)
+    reset = cursor is None
+    if not reset:
+        created_matches, deleted = get_match_changes(current_user, cursor, latest)
+        # 변경분을 읽은 뒤 경계를 확인 (읽는 도중 이력이 정리되었으면 전체 목록으로)
+        reset = _needs_match_reset(cursor)
+    if reset:
+        created_matches = list(
+            Match.objects.filter(Q(user1=current_user) | Q(user2=current_user))
+            .select_related('user1__user', 'user2__user')
+            .order_by('-matched_at')
+        )
+        deleted = []
+    
+    return {
+        'cursor': latest,
+        'reset': reset,
+        'created': MatchSerializer(created_matches, many=True).data,
+        'deleted': deleted,
+    }
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated & IsEmailVerified if not settings.DEBUG else AllowAny])
+def heartbeat(request):
+    """
+    API 13-3: heartbeat (위치 업데이트 + 매칭 체크 + 인원 수를 한 번에)
+    POST /api/matching/heartbeat/
+    
+    Request Body:
+        latitude, longitude: 현재 위치 (필수)
+        cursor: 마지막으로 받은 매칭 변경 cursor (선택, 없으면 현재 매칭 전체)
+        radius: 매칭 반경 (km, 기본값 MATCHING_RADIUS_KM)
+        count_radius: 매칭 가능 인원 수 반경 (km, 기본값 MATCHING_COUNT_RADIUS_KM)
+        active_radius: 활성 매칭 반경 (km, 기본값 0.05)
+    
+    위치 업데이트 → match_check → matchable_count → active_count를 차례로 호출하던 것을
+    프로필 조회 1회, 후보 계산 1회로 처리합니다. 위치 저장과 후보 계산(샤드 RPC, Redis 접속 상태)은 트랜잭션 밖에서,
+    매칭 갱신/인원 수 저장/변경분 조회만 트랜잭션 1개로 실행합니다.
+    """
+    current_user, error_response = _get_current_user_profile(request, user_id_source='data')
+    if error_response:
+        return error_response
+    
+    location_serializer = UserLocationSerializer(data=request.data)
+    if not location_serializer.is_valid():
+        return Response({
+            'success': False,
+            'error': '입력 데이터가 유효하지 않습니다.',
+            'errors': location_serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        radius = float(request.data.get('radius', settings.MATCHING_RADIUS_KM))
+        count_radius = float(request.data.get('count_radius', settings.MATCHING_COUNT_RADIUS_KM))
+        active_radius = float(request.data.get('active_radius', 0.05))
+        cursor = request.data.get('cursor')
+        cursor = int(cursor) if cursor is not None else None
+    except (ValueError, TypeError):
+        return Response({
+            'success': False,
+            'error': 'radius, count_radius, active_radius, cursor는 숫자여야 합니다.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    denied = _deny_if_email_not_verified(
+        current_user,
+        error_message='이메일 인증이 완료되지 않았습니다. 매칭을 확인하려면 먼저 이메일 인증을 완료해주세요.',
+    )
+    if denied:
+        return denied
+    
+    denied = _deny_if_matching_consent_off(
+        current_user,
+        error_message='매칭 동의가 OFF 상태입니다. 매칭을 확인하려면 매칭 동의를 ON으로 설정해주세요.',
+    )
+    if denied:
+        return denied
+    
+    # 1. 위치 저장 (useruser는 고정 위치 사용)
+    #    접속 상태/"user moved" 이벤트(Redis)도 함께 기록하므로 트랜잭션 밖에서 (위치 upsert는 자체 트랜잭션)
+    if current_user.user.username == 'useruser':
+        try:
+            location = current_user.location
+        except UserLocation.DoesNotExist:
+            return Response({
+                'success': False,
+                'error': 'useruser의 위치 정보가 없습니다.'
+            }, status=status.HTTP_404_NOT_FOUND)
+        # 위치는 고정이지만 heartbeat를 보내는 동안은 접속 중으로 표시
+        mark_user_seen(current_user.id)
+    else:
+        location, _created = save_user_location(
+            current_user,
+            location_serializer.validated_data['latitude'],
+            location_serializer.validated_data['longitude'],
+        )
+    latitude, longitude = location.degrees
+    
+    # 2. 후보 계산 1회: 두 반경 중 큰 반경으로 한 번만 계산해 매칭/인원 수에 함께 사용
+    #    샤드 RPC/접속 상태 조회가 있을 수 있으므로 트랜잭션 밖에서 (읽기만 함)
+    new_matches = existing_matches = match_candidates = None
+    candidates = []
+    use_sweep_count = is_precomputed_mode() and has_fresh_sweep_count(current_user, count_radius)
+    if not use_sweep_count:
+        candidates = find_matchable_users_for_mode(
+            current_user,
+            latitude,
+            longitude,
+            max(radius, count_radius),
+            load_users=not is_precomputed_mode(),
+        )
+    if not is_precomputed_mode():
+        match_candidates = [matchable for matchable in candidates if matchable['distance_km'] <= radius]
+        if count_radius > radius and _is_capped_scan(candidates):
+            # 큰 반경 결과가 점수 순으로 잘렸으면 매칭 반경 안의 후보가 빠졌을 수 있으므로 매칭 반경으로 다시 계산
+            match_candidates = find_matchable_users_for_mode(current_user, latitude, longitude, radius)
+    
+    # 3~6. DB 읽기/쓰기만 트랜잭션 1개로 (매칭 변경 알림은 commit 후 발행, publish_match_changes)
+    with transaction.atomic():
+        # 3. 매칭 갱신 (precomputed 모드에서는 매칭 워커가 계산)
+        if match_candidates is not None:
+            new_matches, _deleted_matches, existing_matches = reconcile_matches(
+                current_user,
+                latitude,
+                longitude,
+                radius,
+                matchable_users=match_candidates,
+            )
+        
+        # 4. 매칭 가능 인원 수 (useruser는 저장하지 않음)
+        if use_sweep_count:
+            matchable_count = current_user.matchable_count
+        else:
+            matchable_count = sum(1 for matchable in candidates if matchable['distance_km'] <= count_radius)
+            if current_user.user.username != 'useruser':
+                save_matchable_count(current_user, matchable_count, count_radius)
+        
+        # 5. 활성 매칭 수 (매칭 갱신 결과에 상대방 거리가 있으면 추가 쿼리 없이 계산)
+        if existing_matches is not None and radius <= active_radius:
+            active_count = len(existing_matches) + len(new_matches)
+        else:
+            active_count = annotate_partner_distance(
+                Match.objects.filter(Q(user1=current_user) | Q(user2=current_user)),
+                current_user,
+                latitude,
+                longitude,
+            ).filter(distance_km__lte=active_radius).count()
+        
+        # 6. 매칭 변경분 (다른 사용자가 만든 매칭 포함)
+        changes = _match_changes_payload(current_user, cursor)
+    
+    return Response({
+        'success': True,
+        'location': {
+            'latitude': str(location.latitude),
+            'longitude': str(location.longitude),
+            'updated_at': location.updated_at.isoformat(),
+        },
+        **changes,
+        'matchable_count': matchable_count,
+        'count_radius': count_radius,
+        'active_count': active_count,
+        'active_radius': active_radius,
+    }, status=status.HTTP_200_OK)
+
+
+def _resolve_profile_id(request):
+    """
+    롱폴링 구독 대상 사용자 ID
+
+    인증 실패/프로필 없음이면 None을 반환하고, 오류 응답은 match_check가 그대로 만듭니다.
+    """
+    drf_request = Request(
+        request,
+        authenticators=[authenticator() for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+    )
+    try:
+        current_user, _error_response = _get_current_user_profile(drf_request, user_id_source='query')
+    except APIException:
+        return None
+    return current_user.id if current_user else None
+
+
+def _fresh_match_check(request):
+    """
+    저장해 둔 프로필을 버리고 match_check 실행
+
+    롱폴링은 대기 전에 읽은 프로필(위치/매칭 동의/이상형)을 최대 timeout초 뒤에 다시 쓰게 되므로
+    확인할 때마다 새로 로딩합니다.
+    """
+    forget_request_profiles(request)
+    return match_check(request)
+
+
+async def _wait_for_match_notification(pubsub, timeout):
+    """알림 채널에 메시지가 올 때까지 최대 timeout초 대기 (메시지를 받으면 True)"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return False
+        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+        if message is not None:
+            return True
+
+
+@require_GET
+async def match_check_wait(request):
+    """
+    API 13-1: 매칭 체크 (롱폴링)
+    GET /api/matching/check/wait/?timeout=25
+    
+    match_check와 같은 파라미터/응답 형식입니다.
+    새 매칭이 없으면 사용자별 알림 채널(Redis pub/sub)을 구독한 채로 최대 timeout초 기다리고,
+    그 사이 매칭이 생성/삭제되면 바로 다시 확인해 응답합니다.
+    ASGI에서 대기 중인 요청은 sync 워커 스레드를 점유하지 않습니다.
+    """
+    try:
+        timeout = float(request.GET.get('timeout', settings.MATCHING_LONG_POLL_TIMEOUT_SECONDS))
+    except ValueError:
+        timeout = settings.MATCHING_LONG_POLL_TIMEOUT_SECONDS
+    timeout = max(0.0, min(timeout, settings.MATCHING_LONG_POLL_TIMEOUT_SECONDS))
+    
+    user_id = await sync_to_async(_resolve_profile_id)(request)
+    if user_id is None:
+        return await sync_to_async(_fresh_match_check)(request)
+    
+    client = get_async_redis()
+    pubsub = client.pubsub()
+    try:
+        # 확인 전에 먼저 구독해야 확인과 대기 사이에 생긴 매칭 알림을 놓치지 않음
+        try:
+            await pubsub.subscribe(NOTIFY_CHANNEL.format(user_id=user_id))
+        except redis.RedisError as e:
+            print(f'⚠️ 매칭 알림 구독 실패 (user_id: {user_id}): {str(e)}')
+            return await sync_to_async(_fresh_match_check)(request)
+        
+        response = await sync_to_async(_fresh_match_check)(request)
+        if response.status_code != status.HTTP_200_OK or response.data.get('has_new_match'):
+            return response
+        
+        try:
+            notified = await _wait_for_match_notification(pubsub, timeout)
+        except redis.RedisError as e:
+            print(f'⚠️ 매칭 알림 대기 실패 (user_id: {user_id}): {str(e)}')
+            return response
+        
+        if notified:
+            response = await sync_to_async(_fresh_match_check)(request)
+        return response
+    finally:
+        await pubsub.aclose()
+        await client.aclose()
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated & IsEmailVerified if not settings.DEBUG else AllowAny])
 def register_notification(request):
@@ -451,42 +794,28 @@ def active_match_count(request):
             'error': 'latitude, longitude는 숫자여야 합니다.'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # 현재 사용자의 모든 매칭 조회
-    matches = Match.objects.filter(
-        Q(user1=current_user) | Q(user2=current_user)
-    ).select_related('user1', 'user2')
-    
-    active_count = 0
-    active_matches = []
-    
-    for match in matches:
-        # 상대방 사용자 찾기
-        other_user = match.user2 if match.user1 == current_user else match.user1
+    # 현재 사용자의 매칭 중 상대방이 max_distance 이내에 있는 것만 조회
+    # (상대방 위치 JOIN + 거리 계산을 DB에서 처리하여 매칭 수와 무관하게 쿼리 1회, 읽기 복제본에서)
+    with use_replica(request.user):
+        matches = annotate_partner_distance(
+            Match.objects.filter(Q(user1=current_user) | Q(user2=current_user)),
+            current_user,
+            latitude,
+            longitude,
+        ).filter(
+            distance_km__lte=max_distance_km
+        ).values('id', 'other_user_id', 'distance_km', 'matched_at')
         
-        # 상대방의 현재 위치 조회
-        try:
-            other_location = other_user.location
-            other_lat = float(other_location.latitude)
-            other_lon = float(other_location.longitude)
-            
-            # 거리 계산 (km)
-            distance_km = calculate_distance_km(
-                latitude, longitude,
-                other_lat, other_lon
-            )
-            
-            # 50m 이내인 경우만 카운트
-            if distance_km <= max_distance_km:
-                active_count += 1
-                active_matches.append({
-                    'id': match.id,
-                    'other_user_id': other_user.id,
-                    'distance_m': round(distance_km * 1000, 2),
-                    'matched_at': match.matched_at.isoformat(),
-                })
-        except UserLocation.DoesNotExist:
-            # 상대방 위치 정보가 없으면 제외
-            continue
+        active_matches = [
+            {
+                'id': match['id'],
+                'other_user_id': match['other_user_id'],
+                'distance_m': round(match['distance_km'] * 1000, 2),
+                'matched_at': match['matched_at'].isoformat(),
+            }
+            for match in matches
+        ]
+    active_count = len(active_matches)
     
     return Response({
         'success': True,
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import AuthUser, User, IdealTypeProfile, UserLocation
+from .models import AuthUser, User, IdealTypeProfile, UserLocation, UserLocationSnapshot, ColdUserLocation
 
 
 @admin.register(AuthUser)
@@ -96,4 +96,22 @@ class UserLocationAdmin(admin.ModelAdmin):
     list_filter = ('updated_at',)
     search_fields = ('user__user__username', 'user__user__email')
     raw_id_fields = ('user',)
-    readonly_fields = ('updated_at',)
\ No newline at end of file
+    readonly_fields = ('updated_at',)
+
+
+@admin.register(UserLocationSnapshot)
+class UserLocationSnapshotAdmin(admin.ModelAdmin):
+    """사용자 위치 스냅샷 Admin"""
+    list_display = ('user', 'latitude', 'longitude', 'updated_at', 'snapshot_at')
+    search_fields = ('user__user__username', 'user__user__email')
+    raw_id_fields = ('user',)
+    readonly_fields = ('snapshot_at',)
+
+
+@admin.register(ColdUserLocation)
+class ColdUserLocationAdmin(admin.ModelAdmin):
+    """보관된 사용자 위치 Admin"""
+    list_display = ('user', 'latitude', 'longitude', 'updated_at', 'archived_at')
+    search_fields = ('user__user__username', 'user__user__email')
+    raw_id_fields = ('user',)
+    readonly_fields = ('archived_at',)
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""
+인증 사용자 스냅샷 캐시
+
+JWTAuthentication은 요청마다 AuthUser를 DB에서 조회합니다. heartbeat/match_check처럼 몇 초마다 오는
+요청에서는 인증 쿼리가 대부분이므로, AuthUser(+ 프로필의 매칭 동의/서비스 활성화 상태) 스냅샷을
+2단계 캐시(프로세스 LRU → Redis)에서 읽어 인증 단계의 DB 쿼리를 없앱니다.
+
+- 버전: 사용자마다 Redis에 버전(auth:version:{user_id}, 무효화 시각 ns)을 두고,
+  스냅샷은 버전별 키(auth:snapshot:{user_id}:{version})에 저장합니다.
+  무효화는 버전만 바꾸므로, 무효화 직전에 DB에서 읽은 오래된 스냅샷이 나중에 저장되어도 다시 읽히지 않습니다.
+- 프로세스 LRU: (버전, 스냅샷)을 저장하고 Redis의 버전과 같을 때만 사용 → 다른 프로세스의 무효화도 바로 반영
+- 무효화: AuthUser 저장(비밀번호 변경 포함)/삭제, User의 매칭 동의/서비스 활성화 변경/삭제 시 (commit 후)
+- Redis를 사용할 수 없으면 기존처럼 DB에서 조회 (무효화를 놓치지 않도록 프로세스 LRU도 사용하지 않음)
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.users.models import AuthUser
+
+
+VERSION_KEY = 'auth:version:{user_id}'
+SNAPSHOT_KEY = 'auth:snapshot:{user_id}:{version}'
+
+# 스냅샷에 담는 AuthUser 필드 (비밀번호/마지막 로그인은 제외 → 접근 시 지연 로딩)
+AUTH_SNAPSHOT_FIELDS = (
+    'id', 'username', 'email', 'email_verified', 'email_verified_at', 'date_joined',
+    'is_staff', 'is_superuser', 'is_active',
+)
+# 토큰 폐기 확인(CHECK_REVOKE_TOKEN)을 사용하면 비밀번호 해시도 필요
+if getattr(api_settings, 'CHECK_REVOKE_TOKEN', False):
+    AUTH_SNAPSHOT_FIELDS += ('password',)
+
+# 스냅샷에 담는 프로필(User) 상태 - 변경 시 스냅샷 무효화
+PROFILE_SNAPSHOT_FIELDS = ('matching_consent', 'service_active')
+
+
+class _LocalLRU:
+    """프로세스 안의 LRU (스레드 안전)"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.AUTH_CACHE_LOCAL_SIZE:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+_local_snapshots = _LocalLRU()
+
+
+def _current_version(user_id):
+    """사용자의 스냅샷 버전 (없으면 새로 생성)"""
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        # 버전 키가 없어진 경우에도 이전 버전과 겹치지 않도록 현재 시각 사용
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _load_snapshot(user_id):
+    """DB에서 스냅샷 생성 (AuthUser + 프로필 상태, 쿼리 1회)"""
+    row = (
+        AuthUser.objects
+        .filter(id=user_id)
+        .values(*AUTH_SNAPSHOT_FIELDS, 'profile__id', *(f'profile__{field}' for field in PROFILE_SNAPSHOT_FIELDS))
+        .first()
+    )
+    if row is None:
+        return None
+
+    profile = None
+    if row['profile__id'] is not None:
+        profile = {'id': row['profile__id']}
+        profile.update({field: row[f'profile__{field}'] for field in PROFILE_SNAPSHOT_FIELDS})
+    return {
+        'auth': {field: row[field] for field in AUTH_SNAPSHOT_FIELDS},
+        'profile': profile,
+    }
+
+
+def _auth_user_from_snapshot(snapshot):
+    """스냅샷 → AuthUser (DB에서 읽은 객체와 같게 생성, 스냅샷에 없는 필드는 지연 로딩)"""
+    field_names = [field.attname for field in AuthUser._meta.concrete_fields if field.attname in snapshot['auth']]
+    auth_user = AuthUser.from_db(DEFAULT_DB_ALIAS, field_names, [snapshot['auth'][name] for name in field_names])
+    # 프로필 상태 (프로필이 없으면 None) - 프로필 로딩 전에 확인할 수 있도록
+    auth_user.profile_state = snapshot['profile']
+    return auth_user
+
+
+def get_cached_auth_user(user_id):
+    """
+    인증 사용자 조회 (프로세스 LRU → Redis → DB)
+
+    Args:
+        user_id: AuthUser ID
+
+    Returns:
+        AuthUser: 사용자 (profile_state 속성에 프로필 상태), 없으면 None
+    """
+    try:
+        version = _current_version(user_id)
+        local = _local_snapshots.get(user_id)
+        if local is not None and local[0] == version:
+            return _auth_user_from_snapshot(local[1])
+        snapshot_key = SNAPSHOT_KEY.format(user_id=user_id, version=version)
+        snapshot = cache.get(snapshot_key)
+    except Exception as e:
+        print(f'⚠️ 인증 사용자 캐시 조회 실패, DB에서 조회 (user_id: {user_id}): {str(e)}')
+        snapshot = _load_snapshot(user_id)
+        return _auth_user_from_snapshot(snapshot) if snapshot is not None else None
+
+    if snapshot is None:
+        snapshot = _load_snapshot(user_id)
+        if snapshot is None:
+            return None
+        try:
+            cache.set(snapshot_key, snapshot, timeout=settings.AUTH_CACHE_TIMEOUT)
+        except Exception as e:
+            print(f'⚠️ 인증 사용자 캐시 저장 실패 (user_id: {user_id}): {str(e)}')
+
+    _local_snapshots.set(user_id, (version, snapshot))
+    return _auth_user_from_snapshot(snapshot)
+
+
+def invalidate_auth_user(user_id):
+    """사용자 스냅샷 무효화 (트랜잭션 안이면 commit 후)"""
+    def invalidate():
+        _local_snapshots.pop(user_id)
+        try:
+            cache.set(VERSION_KEY.format(user_id=user_id), time.time_ns(), timeout=None)
+        except Exception as e:
+            print(f'⚠️ 인증 사용자 캐시 무효화 실패 (user_id: {user_id}): {str(e)}')
+
+    transaction.on_commit(invalidate)
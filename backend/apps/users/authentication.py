@@ -0,0 +1,36 @@
+"""
+캐시된 사용자로 인증하는 JWT 인증 클래스
+
+토큰 검증은 JWTAuthentication과 같고, 사용자는 DB 대신 인증 사용자 스냅샷 캐시(auth_cache)에서 읽습니다.
+→ 캐시가 유효하면 인증 단계의 DB 쿼리가 0회입니다.
+"""
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.users.auth_cache import get_cached_auth_user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication.get_user와 같은 검사를 캐시된 사용자로 수행"""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        user = get_cached_auth_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if getattr(api_settings, 'CHECK_REVOKE_TOKEN', False):
+            from rest_framework_simplejwt.utils import get_md5_hash_password
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+        return user
@@ -0,0 +1,277 @@
+"""
+위치 write-behind 버퍼
+
+피크 시간에는 기기마다 5~60초 간격으로 위치를 보내므로 user_locations 쓰기가 기기 수에 비례해 늘어납니다.
+LOCATION_WRITE_MODE=write_behind 이면 위치 업데이트는 Redis 해시에만 기록하고,
+flush 프로세스(python manage.py flush_locations)가 LOCATION_FLUSH_INTERVAL_SECONDS마다
+아직 반영되지 않은 사용자들의 최신 위치를 모아 UserLocation에 일괄 upsert 합니다.
+→ Postgres 쓰기 횟수는 기기 수가 아니라 flush 주기/배치 크기에 따라 정해집니다.
+
+키 구성
+- location:buffer        해시 {user_id: 위치(JSON)} - 최신 위치 (매칭 조회 시 DB 위치보다 우선)
+- location:dirty         세트 - 아직 DB에 반영되지 않은 사용자
+- location:flushing      세트 - flush 중인 사용자 (반영이 끝난 사용자부터 제거)
+- location:reported:{id} 문자열 - dead-band로 저장을 생략한 마지막 보고 위치 (위치 조회 API가 표시, LOCATION_DEADBAND_MAX_AGE_SECONDS 뒤 만료)
+
+유실 범위
+- flush 프로세스가 죽어도 location:flushing이 남아 있으므로 다음 flush가 이어서 반영합니다.
+  (upsert는 recorded_at이 더 최근일 때만 갱신하므로 같은 위치를 다시 반영해도 안전)
+- Redis가 죽으면 마지막 flush 이후의 위치만 유실됩니다. (최대 LOCATION_FLUSH_INTERVAL_SECONDS
+  + Redis 영속성 설정(AOF everysec 등)에 따른 구간) 유실된 사용자도 다음 위치 업데이트에서 복구됩니다.
+- flush 프로세스는 종료 신호(SIGTERM/SIGINT)를 받으면 남은 위치를 모두 반영한 뒤 종료합니다.
+- 반영한 위치는 그 사이 새 위치가 기록되지 않았으면 location:buffer에서 지웁니다. (해시가 사용자 수만큼 계속 커지지 않도록)
+- 위치 조회/매칭에서 Redis를 사용할 수 없으면 DB 위치를 사용하고, 위치 업데이트는 DB에 바로 저장합니다.
+"""
+import json
+from datetime import datetime, timezone as dt_timezone
+
+import redis
+from django.conf import settings
+
+from apps.users.models import UserLocation
+from apps.matching.redis_client import get_redis
+
+
+BUFFER_KEY = 'location:buffer'
+DIRTY_KEY = 'location:dirty'
+FLUSHING_KEY = 'location:flushing'
+REPORTED_KEY = 'location:reported:{user_id}'
+
+# 버퍼에 있는 위치보다 더 최근에 측정된 위치일 때만 기록 (upsert의 recorded_at 조건과 동일)
+# 반환값: 1(기록), 0(버퍼의 위치가 더 최근이라 무시)
+BUFFER_WRITE_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], ARGV[1])
+if current and cjson.decode(current)['recorded_at'] >= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+redis.call('SADD', KEYS[2], ARGV[1])
+return 1
+"""
+
+# DB에 반영한 위치를 버퍼에서 제거 (반영 이후 새 위치가 기록된 사용자는 남김)
+# ARGV: user_id, 반영한 위치(JSON) 쌍, 반환값: 제거한 사용자 수
+TRIM_SCRIPT = """
+local removed = 0
+for i = 1, #ARGV, 2 do
+    if redis.call('HGET', KEYS[1], ARGV[i]) == ARGV[i + 1] then
+        redis.call('HDEL', KEYS[1], ARGV[i])
+        removed = removed + 1
+    end
+end
+return removed
+"""
+
+# flush할 사용자 목록을 가져옴 (이전 flush가 중간에 끝나 남은 사용자도 함께 처리)
+CLAIM_SCRIPT = """
+redis.call('SUNIONSTORE', KEYS[2], KEYS[2], KEYS[1])
+redis.call('DEL', KEYS[1])
+return redis.call('SMEMBERS', KEYS[2])
+"""
+
+
+def is_write_behind_enabled():
+    """위치 업데이트를 Redis 버퍼에만 기록하는지 여부"""
+    return settings.LOCATION_WRITE_MODE == 'write_behind'
+
+
+def _encode(latitude_e6, longitude_e6, recorded_at, updated_at):
+    return json.dumps({
+        'latitude_e6': latitude_e6,
+        'longitude_e6': longitude_e6,
+        'recorded_at': recorded_at.timestamp(),
+        'updated_at': updated_at.timestamp(),
+    })
+
+
+def _decode(user_id, payload, location_id=None):
+    data = json.loads(payload)
+    return UserLocation(
+        id=location_id,
+        user_id=user_id,
+        latitude_e6=data['latitude_e6'],
+        longitude_e6=data['longitude_e6'],
+        recorded_at=datetime.fromtimestamp(data['recorded_at'], tz=dt_timezone.utc),
+        updated_at=datetime.fromtimestamp(data['updated_at'], tz=dt_timezone.utc),
+    )
+
+
+def buffer_user_location(user_id, latitude_e6, longitude_e6, recorded_at, updated_at):
+    """
+    위치를 Redis 버퍼에 기록 (좌표는 마이크로도 정수)
+
+    Returns:
+        bool: 기록했으면 True, 버퍼의 위치가 더 최근이라 무시했으면 False
+    """
+    written = get_redis().eval(
+        BUFFER_WRITE_SCRIPT,
+        2,
+        BUFFER_KEY,
+        DIRTY_KEY,
+        user_id,
+        _encode(latitude_e6, longitude_e6, recorded_at, updated_at),
+        recorded_at.timestamp(),
+    )
+    return bool(written)
+
+
+def get_buffered_locations(user_ids):
+    """
+    버퍼에 있는 위치
+
+    Returns:
+        dict: {user_id: UserLocation} (저장되지 않은 객체)
+    """
+    return {
+        user_id: _decode(user_id, payload)
+        for user_id, payload in _get_buffered_payloads(user_ids).items()
+    }
+
+
+def _get_buffered_payloads(user_ids):
+    """버퍼에 있는 위치 원본 ({user_id: JSON})"""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    payloads = get_redis().hmget(BUFFER_KEY, user_ids)
+    return {
+        user_id: payload
+        for user_id, payload in zip(user_ids, payloads)
+        if payload is not None
+    }
+
+
+def _is_newer(buffered, location):
+    """버퍼의 위치가 DB 위치보다 최근에 측정되었는지 (배치 업로드처럼 DB에 바로 저장된 위치가 더 최근일 수 있음)"""
+    if location is None or location.recorded_at is None:
+        return True
+    return buffered.recorded_at >= location.recorded_at
+
+
+def get_current_location(user_profile):
+    """
+    사용자의 최신 위치 (write-behind 모드면 버퍼와 DB 중 더 최근 위치)
+
+    Redis를 사용할 수 없으면 DB 위치를 반환합니다. (최대 flush 주기만큼 늦을 수 있음)
+
+    Raises:
+        UserLocation.DoesNotExist: 버퍼와 DB 모두 위치가 없는 경우
+    """
+    try:
+        location = user_profile.location
+    except UserLocation.DoesNotExist:
+        location = None
+
+    if is_write_behind_enabled():
+        try:
+            payload = get_redis().hget(BUFFER_KEY, user_profile.id)
+        except redis.RedisError as e:
+            print(f'⚠️ 위치 버퍼 조회 실패, DB 위치 사용 (user_id: {user_profile.id}): {str(e)}')
+            payload = None
+        if payload is not None:
+            buffered = _decode(user_profile.id, payload, location.id if location else None)
+            if _is_newer(buffered, location):
+                return buffered
+
+    if location is None:
+        raise UserLocation.DoesNotExist('UserLocation matching query does not exist.')
+    return location
+
+
+def remember_reported_location(location):
+    """
+    dead-band로 저장을 생략한 위치를 기록 (위치 조회 API가 업데이트 응답과 같은 위치/시각을 보여주도록)
+
+    저장된 위치와의 차이가 LOCATION_DEADBAND_METERS 미만이고 다음 저장까지만 의미가 있으므로
+    LOCATION_DEADBAND_MAX_AGE_SECONDS 뒤 만료됩니다.
+    """
+    try:
+        get_redis().set(
+            REPORTED_KEY.format(user_id=location.user_id),
+            _encode(location.latitude_e6, location.longitude_e6, location.recorded_at, location.updated_at),
+            ex=settings.LOCATION_DEADBAND_MAX_AGE_SECONDS,
+        )
+    except Exception as e:
+        print(f'⚠️ 보고 위치 기록 실패 (user_id: {location.user_id}): {str(e)}')
+
+
+def get_reported_location(user_profile):
+    """
+    사용자가 마지막으로 보고한 위치 (dead-band로 저장을 생략한 위치가 저장된 위치보다 최근이면 그 위치)
+
+    위치 조회 API용입니다. 매칭은 get_current_location(저장된 위치)을 사용합니다.
+
+    Raises:
+        UserLocation.DoesNotExist: 저장된 위치가 없는 경우
+    """
+    location = get_current_location(user_profile)
+    try:
+        payload = get_redis().get(REPORTED_KEY.format(user_id=user_profile.id))
+    except Exception as e:
+        print(f'⚠️ 보고 위치 조회 실패, 저장된 위치 사용 (user_id: {user_profile.id}): {str(e)}')
+        return location
+    if payload is None:
+        return location
+    reported = _decode(user_profile.id, payload, location.id)
+    return reported if _is_newer(reported, location) else location
+
+
+def overlay_buffered_locations(users):
+    """
+    DB에서 읽은 사용자(location 로딩됨)의 위치를 버퍼의 최신 위치로 교체 (write-behind 모드에서만)
+
+    반경 조회의 후보 선정(위치 범위 조건)은 DB 위치로 하므로 최대 flush 주기만큼 늦을 수 있지만,
+    거리 계산은 버퍼의 최신 위치로 합니다. DB에 아직 위치가 없는 사용자는 첫 flush 이후부터 후보가 됩니다.
+    """
+    if not is_write_behind_enabled():
+        return users
+    try:
+        buffered = get_buffered_locations(user.id for user in users)
+    except redis.RedisError as e:
+        print(f'⚠️ 위치 버퍼 조회 실패, DB 위치로 계산: {str(e)}')
+        return users
+    for user in users:
+        location = buffered.get(user.id)
+        if location is None or not _is_newer(location, user.location):
+            continue
+        location.id = user.location.id
+        user.location = location
+    return users
+
+
+def flush_buffered_locations(batch_size=None):
+    """
+    버퍼의 위치를 UserLocation에 일괄 반영 (INSERT ... ON CONFLICT DO UPDATE, 배치당 1회)
+
+    배치마다 DB 반영이 끝난 사용자만 location:flushing에서 제거하므로,
+    중간에 실패해도 남은 사용자는 다음 flush에서 다시 반영됩니다.
+    반영한 위치는 버퍼에서도 지웁니다. (반영 이후 새 위치가 기록된 사용자는 다음 flush까지 남김)
+
+    Returns:
+        int: 반영한 사용자 수
+    """
+    # 순환 import 방지 (utils → location_buffer)
+    from apps.users.utils import upsert_user_locations
+
+    batch_size = batch_size or settings.LOCATION_FLUSH_BATCH_SIZE
+    client = get_redis()
+    user_ids = [int(user_id) for user_id in client.eval(CLAIM_SCRIPT, 2, DIRTY_KEY, FLUSHING_KEY)]
+
+    flushed = 0
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        payloads = _get_buffered_payloads(batch)
+        buffered = {user_id: _decode(user_id, payload) for user_id, payload in payloads.items()}
+        # "user moved" 이벤트는 버퍼에 기록할 때 이미 발행했으므로 다시 발행하지 않음
+        upsert_user_locations(
+            [
+                (user_id, location.latitude_e6, location.longitude_e6, location.recorded_at)
+                for user_id, location in buffered.items()
+            ],
+            publish=False,
+        )
+        if payloads:
+            client.eval(TRIM_SCRIPT, 1, BUFFER_KEY, *[value for item in payloads.items() for value in item])
+        client.srem(FLUSHING_KEY, *batch)
+        flushed += len(buffered)
+    return flushed
@@ -0,0 +1,411 @@
+"""
+user_locations 저장 방식 (UNLOGGED / fillfactor) + 복구용 스냅샷 + 지역 파티셔닝 + hot/cold 분리
+
+user_locations는 위치 업데이트마다 덮어쓰고, 내용이 사라져도 다음 위치 업데이트로 다시 채워집니다.
+- LOCATION_TABLE_UNLOGGED=True 이면 UNLOGGED 테이블로 바꿔 WAL을 남기지 않습니다.
+  (DB가 비정상 종료되면 테이블이 비워지므로 snapshot_locations가 스냅샷에서 복구)
+- fillfactor를 낮춰 같은 페이지 안에서 갱신(HOT 업데이트)될 여유 공간을 남깁니다.
+  HOT 업데이트는 인덱스가 걸린 컬럼이 바뀌지 않을 때만 가능하므로,
+  인덱스는 반경 조회용 (latitude_e6, longitude_e6)만 둡니다.
+
+PostgreSQL에서만 적용되며, 다른 DB에서는 아무것도 하지 않습니다.
+
+지역 파티셔닝
+- partition_locations가 user_locations를 지역 키(region, 위도/경도 1도 칸)로 HASH 파티셔닝된 테이블로 바꿉니다.
+  반경 조회는 region 조건을 함께 걸어 한두 개 파티션만 읽습니다. (location_regions_for_box)
+- 파티셔닝된 테이블에서는 유일 제약이 (user_id, region)이므로 upsert_user_locations가 지역을 옮긴 사용자의
+  이전 행을 지우고 새 지역에 INSERT 합니다. (UPSERT_PARTITIONED_LOCATIONS_SQL)
+- user_id만으로는 유일 제약이 없으므로, 같은 사용자의 위치 쓰기는 사용자별 advisory lock으로 트랜잭션 끝까지 직렬화합니다.
+  (두 쓰기가 서로 다른 지역에 동시에 INSERT하면 한 사용자의 행이 두 파티션에 남음, lock_user_locations)
+
+hot/cold 분리
+- archive_locations가 매칭 동의 OFF / 서비스 비활성 / LOCATION_COLD_AFTER_DAYS일 넘게 위치가 갱신되지 않은
+  사용자의 위치를 user_locations_cold로 옮겨, 매칭 조회가 읽는 user_locations를 shared_buffers에 들어갈 만큼 작게 유지합니다.
+- 다음 위치 업데이트(새 행 INSERT 시 cold 행 삭제) 또는 매칭 동의 ON(restore_cold_location) 시 user_locations로 돌아갑니다.
+- 위치 조회 API는 보관된 위치를 되돌리지 않고 그대로 보여줍니다. (get_cold_location)
+- 옮긴 사용자는 매칭 후보 읽기 모델(matching_candidates)에서도 같은 문장으로 삭제합니다.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from apps.users.models import (
+    LOCATION_REGION_SQL, User, UserLocation, UserLocationSnapshot, ColdUserLocation,
+)
+from apps.matching.models import MatchingCandidate
+from apps.matching.candidates import rebuild_matching_candidates
+
+
+LOCATION_TABLE = UserLocation._meta.db_table
+SNAPSHOT_TABLE = UserLocationSnapshot._meta.db_table
+COLD_TABLE = ColdUserLocation._meta.db_table
+USER_TABLE = User._meta.db_table
+CANDIDATE_TABLE = MatchingCandidate._meta.db_table
+REGION_EXPRESSION = LOCATION_REGION_SQL.format(lat='latitude_e6', lon='longitude_e6')
+
+# 마지막 스냅샷 이후 바뀐 위치만 복사
+SNAPSHOT_SQL = f'''
+    INSERT INTO {SNAPSHOT_TABLE} (user_id, latitude_e6, longitude_e6, recorded_at, updated_at, snapshot_at)
+    SELECT user_id, latitude_e6, longitude_e6, recorded_at, updated_at, %s
+    FROM {LOCATION_TABLE}
+    ON CONFLICT (user_id) DO UPDATE SET
+        latitude_e6 = EXCLUDED.latitude_e6,
+        longitude_e6 = EXCLUDED.longitude_e6,
+        recorded_at = EXCLUDED.recorded_at,
+        updated_at = EXCLUDED.updated_at,
+        snapshot_at = EXCLUDED.snapshot_at
+    WHERE {SNAPSHOT_TABLE}.updated_at IS DISTINCT FROM EXCLUDED.updated_at
+'''
+
+# 현재 위치가 없는 사용자만 스냅샷에서 복구 (복구 이후 들어온 위치가 더 최신)
+# 파티셔닝된 테이블은 user_id만으로는 유일 제약이 없으므로 NOT EXISTS로 확인
+RESTORE_SQL = f'''
+    INSERT INTO {LOCATION_TABLE} (user_id, region, latitude_e6, longitude_e6, recorded_at, updated_at)
+    SELECT s.user_id, {REGION_EXPRESSION}, s.latitude_e6, s.longitude_e6, s.recorded_at, s.updated_at
+    FROM {SNAPSHOT_TABLE} s
+    WHERE NOT EXISTS (SELECT 1 FROM {LOCATION_TABLE} l WHERE l.user_id = s.user_id)
+    ON CONFLICT DO NOTHING
+'''
+
+# 비활성 사용자의 위치를 한 번에 batch_size개씩 cold 테이블로 이동 (삭제 → cold INSERT → 스냅샷 삭제를 한 문장으로)
+# 스냅샷도 지워야 hot 테이블 복구(RESTORE_SQL) 시 보관된 위치가 되살아나지 않음
+ARCHIVE_SQL = f'''
+    WITH moved AS (
+        DELETE FROM {LOCATION_TABLE}
+        WHERE id IN (
+            SELECT l.id
+            FROM {LOCATION_TABLE} l
+            JOIN {USER_TABLE} u ON u.id = l.user_id
+            WHERE NOT u.matching_consent OR NOT u.service_active OR l.updated_at < %s
+            LIMIT %s
+        )
+        RETURNING user_id, latitude_e6, longitude_e6, recorded_at, updated_at
+    ), archived AS (
+        INSERT INTO {COLD_TABLE} (user_id, latitude_e6, longitude_e6, recorded_at, updated_at, archived_at)
+        SELECT user_id, latitude_e6, longitude_e6, recorded_at, updated_at, %s FROM moved
+        ON CONFLICT (user_id) DO UPDATE SET
+            latitude_e6 = EXCLUDED.latitude_e6,
+            longitude_e6 = EXCLUDED.longitude_e6,
+            recorded_at = EXCLUDED.recorded_at,
+            updated_at = EXCLUDED.updated_at,
+            archived_at = EXCLUDED.archived_at
+    ), unsnapshotted AS (
+        DELETE FROM {SNAPSHOT_TABLE} WHERE user_id IN (SELECT user_id FROM moved)
+    ), uncandidated AS (
+        DELETE FROM {CANDIDATE_TABLE} WHERE user_id IN (SELECT user_id FROM moved)
+    )
+    SELECT count(*) FROM moved
+'''
+
+# cold 테이블의 위치를 user_locations로 되돌림 (hot 행이 이미 있으면 그 위치가 더 최신)
+RESTORE_COLD_SQL = f'''
+    WITH restored AS (
+        DELETE FROM {COLD_TABLE} WHERE user_id = %s
+        RETURNING user_id, latitude_e6, longitude_e6, recorded_at, updated_at
+    )
+    INSERT INTO {LOCATION_TABLE} (user_id, region, latitude_e6, longitude_e6, recorded_at, updated_at)
+    SELECT r.user_id, {REGION_EXPRESSION}, r.latitude_e6, r.longitude_e6, r.recorded_at, r.updated_at
+    FROM restored r
+    WHERE NOT EXISTS (SELECT 1 FROM {LOCATION_TABLE} l WHERE l.user_id = r.user_id)
+    ON CONFLICT DO NOTHING
+    RETURNING id, user_id, region, latitude_e6, longitude_e6, recorded_at, updated_at
+'''
+
+
+# 사용자별 위치 쓰기 잠금 (키 = 사용자 프로필 ID, 교착을 피하기 위해 ID 순서로 잠금)
+LOCK_USER_LOCATIONS_SQL = '''
+    SELECT pg_advisory_xact_lock(ids.user_id)
+    FROM (SELECT unnest(%s::bigint[]) AS user_id ORDER BY 1) ids
+'''
+
+
+def _is_postgresql(conn=None):
+    return (conn or connection).vendor == 'postgresql'
+
+
+def _location_table_partitions(conn):
+    """user_locations의 파티션 테이블 이름 목록 (파티셔닝되어 있지 않으면 빈 목록)"""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            ORDER BY child.relname
+            """,
+            [LOCATION_TABLE],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+@lru_cache(maxsize=1)
+def is_location_table_partitioned():
+    """
+    user_locations가 지역으로 파티셔닝되어 있는지 여부 (프로세스당 1회 확인)
+
+    partition_locations 실행 후에는 웹/워커 프로세스를 재시작해야 합니다.
+    """
+    if not _is_postgresql():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT EXISTS (
+                SELECT 1 FROM pg_partitioned_table
+                JOIN pg_class ON pg_class.oid = pg_partitioned_table.partrelid
+                WHERE pg_class.relname = %s
+            )
+            """,
+            [LOCATION_TABLE],
+        )
+        return cursor.fetchone()[0]
+
+
+def lock_user_locations(cursor, user_ids):
+    """
+    파티셔닝된 user_locations에서 사용자들의 위치 쓰기를 트랜잭션이 끝날 때까지 직렬화 (transaction.atomic 안에서 호출)
+
+    뒤에 잠금을 얻은 쓰기는 앞선 쓰기의 commit 이후 위치를 보고 이전 지역의 행을 지우므로,
+    한 사용자의 행은 항상 한 파티션에만 남습니다.
+    """
+    cursor.execute(LOCK_USER_LOCATIONS_SQL, [sorted(set(user_ids))])
+
+
+def apply_location_table_storage(conn=None):
+    """
+    LOCATION_TABLE_UNLOGGED / LOCATION_TABLE_FILLFACTOR 설정을 user_locations에 적용
+    (파티셔닝된 경우 각 파티션에 적용)
+
+    Returns:
+        bool: 적용했으면 True (PostgreSQL이 아니면 False)
+    """
+    conn = conn or connection
+    if not _is_postgresql(conn):
+        return False
+
+    tables = _location_table_partitions(conn) or [LOCATION_TABLE]
+    with conn.cursor() as cursor:
+        for table in tables:
+            cursor.execute(
+                f'ALTER TABLE {table} SET {"UNLOGGED" if settings.LOCATION_TABLE_UNLOGGED else "LOGGED"}'
+            )
+            cursor.execute(f'ALTER TABLE {table} SET (fillfactor = %s)' % int(settings.LOCATION_TABLE_FILLFACTOR))
+    return True
+
+
+def reset_location_table_storage(conn=None):
+    """user_locations를 기본 저장 방식(LOGGED, fillfactor 100)으로 되돌림"""
+    conn = conn or connection
+    if not _is_postgresql(conn):
+        return False
+
+    tables = _location_table_partitions(conn) or [LOCATION_TABLE]
+    with conn.cursor() as cursor:
+        for table in tables:
+            cursor.execute(f'ALTER TABLE {table} SET LOGGED')
+            cursor.execute(f'ALTER TABLE {table} RESET (fillfactor)')
+    return True
+
+
+def partition_location_table(partition_count):
+    """
+    user_locations를 지역(region) HASH 파티셔닝 테이블로 변환 (한 트랜잭션, 변환 중 위치 쓰기는 대기)
+
+    Django가 만든 인덱스/제약 이름을 그대로 유지하므로 이후 마이그레이션과 호환됩니다. (기존 id 값도 유지)
+
+    Returns:
+        int: 옮긴 행 수
+    """
+    latlon_index = UserLocation._meta.indexes[0].name
+    unique_constraint = UserLocation._meta.constraints[0].name
+    new_table = f'{LOCATION_TABLE}_partitioned'
+    sequence = f'{LOCATION_TABLE}_region_id_seq'
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {LOCATION_TABLE} IN ACCESS EXCLUSIVE MODE')
+
+        cursor.execute(f'CREATE SEQUENCE {sequence}')
+        cursor.execute(f"SELECT setval('{sequence}', COALESCE((SELECT max(id) FROM {LOCATION_TABLE}), 0) + 1, false)")
+        cursor.execute(f'''
+            CREATE TABLE {new_table} (
+                id bigint NOT NULL DEFAULT nextval('{sequence}'),
+                user_id bigint NOT NULL REFERENCES {USER_TABLE} (id) DEFERRABLE INITIALLY DEFERRED,
+                region integer NOT NULL,
+                latitude_e6 integer NOT NULL,
+                longitude_e6 integer NOT NULL,
+                recorded_at timestamp with time zone NULL,
+                updated_at timestamp with time zone NOT NULL,
+                PRIMARY KEY (id, region)
+            ) PARTITION BY HASH (region)
+        ''')
+        for remainder in range(partition_count):
+            cursor.execute(
+                f'CREATE TABLE {LOCATION_TABLE}_p{remainder} PARTITION OF {new_table} '
+                f'FOR VALUES WITH (MODULUS {partition_count}, REMAINDER {remainder})'
+            )
+
+        cursor.execute(f'''
+            INSERT INTO {new_table} (id, user_id, region, latitude_e6, longitude_e6, recorded_at, updated_at)
+            SELECT id, user_id, {REGION_EXPRESSION}, latitude_e6, longitude_e6, recorded_at, updated_at
+            FROM {LOCATION_TABLE}
+        ''')
+        moved = cursor.rowcount
+        # 지연된 FK 검사를 지금 실행 (검사가 남아 있으면 이후 ALTER TABLE이 실패)
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+        cursor.execute(f'DROP TABLE {LOCATION_TABLE}')
+        cursor.execute(f'ALTER TABLE {new_table} RENAME TO {LOCATION_TABLE}')
+        cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY {LOCATION_TABLE}.id')
+        cursor.execute(f'CREATE INDEX {latlon_index} ON {LOCATION_TABLE} (latitude_e6, longitude_e6)')
+        cursor.execute(f'ALTER TABLE {LOCATION_TABLE} ADD CONSTRAINT {unique_constraint} UNIQUE (user_id, region)')
+
+        apply_location_table_storage()
+
+    is_location_table_partitioned.cache_clear()
+    return moved
+
+
+def unpartition_location_table():
+    """
+    파티셔닝된 user_locations를 Django 모델 정의 그대로의 일반 테이블로 되돌림
+
+    Returns:
+        int: 옮긴 행 수
+    """
+    latlon_index = UserLocation._meta.indexes[0].name
+    unique_constraint = UserLocation._meta.constraints[0].name
+    old_table = f'{LOCATION_TABLE}_partitioned'
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {LOCATION_TABLE} IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'ALTER TABLE {LOCATION_TABLE} RENAME TO {old_table}')
+        # 새 테이블이 같은 이름을 쓰므로 먼저 삭제
+        cursor.execute(f'DROP INDEX {latlon_index}')
+        cursor.execute(f'ALTER TABLE {old_table} DROP CONSTRAINT {unique_constraint}')
+
+        with connection.schema_editor() as schema_editor:
+            schema_editor.create_model(UserLocation)
+
+        cursor.execute(f'''
+            INSERT INTO {LOCATION_TABLE} (id, user_id, region, latitude_e6, longitude_e6, recorded_at, updated_at)
+            SELECT id, user_id, region, latitude_e6, longitude_e6, recorded_at, updated_at
+            FROM {old_table}
+        ''')
+        moved = cursor.rowcount
+        # 지연된 FK 검사를 지금 실행 (검사가 남아 있으면 이후 ALTER TABLE이 실패)
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{LOCATION_TABLE}', 'id'), "
+            f"COALESCE((SELECT max(id) FROM {LOCATION_TABLE}), 0) + 1, false)"
+        )
+        cursor.execute(f'DROP TABLE {old_table}')
+
+        apply_location_table_storage()
+
+    is_location_table_partitioned.cache_clear()
+    return moved
+
+
+def snapshot_locations(now):
+    """
+    현재 위치를 스냅샷 테이블에 복사 (바뀐 행만)
+
+    Returns:
+        int: 복사한 행 수
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(SNAPSHOT_SQL, [now])
+        return cursor.rowcount
+
+
+def restore_locations_from_snapshot():
+    """
+    스냅샷에서 위치 복구 (현재 위치가 없는 사용자만)
+
+    Returns:
+        int: 복구한 행 수
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(RESTORE_SQL)
+        restored = cursor.rowcount
+    if restored:
+        # 매칭 후보 읽기 모델은 UNLOGGED가 아니라 비워지지 않았으므로 복구된 위치 기준으로 다시 맞춤
+        rebuild_matching_candidates()
+    return restored
+
+
+def needs_restore():
+    """user_locations가 비어 있고 스냅샷은 있는 경우 (UNLOGGED 테이블이 비정상 종료로 비워진 경우)"""
+    return not UserLocation.objects.exists() and UserLocationSnapshot.objects.exists()
+
+
+def archive_inactive_locations(now, inactive_before, batch_size=1000):
+    """
+    비활성 사용자의 위치를 cold 테이블로 이동
+
+    Args:
+        now: 보관 시각
+        inactive_before: 이 시각 이전에 마지막으로 갱신된 위치는 비활성으로 간주
+        batch_size: 한 번에 옮길 행 수 (긴 잠금을 피하기 위해 나눠서 처리)
+
+    Returns:
+        int: 옮긴 행 수
+    """
+    archived = 0
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(ARCHIVE_SQL, [inactive_before, batch_size, now])
+            moved = cursor.fetchone()[0]
+        archived += moved
+        if moved < batch_size:
+            return archived
+
+
+def restore_cold_location(user_profile):
+    """
+    cold 테이블에 보관된 위치를 user_locations로 되돌림 (매칭 동의 ON 시)
+
+    Returns:
+        UserLocation | None: 되돌린 위치 (보관된 위치가 없거나 hot 위치가 이미 있으면 None)
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        if is_location_table_partitioned():
+            lock_user_locations(cursor, [user_profile.id])
+        cursor.execute(RESTORE_COLD_SQL, [user_profile.id])
+        row = cursor.fetchone()
+    if row is None:
+        return None
+
+    location_id, user_id, region, latitude_e6, longitude_e6, recorded_at, updated_at = row
+    location = UserLocation(
+        id=location_id,
+        user_id=user_id,
+        region=region,
+        latitude_e6=latitude_e6,
+        longitude_e6=longitude_e6,
+        recorded_at=recorded_at,
+        updated_at=updated_at,
+    )
+    # 위치가 없다고 캐시되어 있을 수 있으므로 갱신
+    user_profile.location = location
+    return location
+
+
+def get_cold_location(user_profile):
+    """
+    cold 테이블에 보관된 위치 (위치 조회 API용, user_locations로 되돌리지 않음)
+
+    Returns:
+        ColdUserLocation | None
+    """
+    return ColdUserLocation.objects.filter(user_id=user_profile.id).first()
+
+
+def discard_cold_locations(user_ids):
+    """새 위치가 user_locations에 저장된 사용자의 보관된 위치 삭제 (다음 위치 업데이트 시 hot으로 복귀)"""
+    user_ids = list(user_ids)
+    if user_ids:
+        ColdUserLocation.objects.filter(user_id__in=user_ids).delete()
@@ -0,0 +1,31 @@
+"""
+비활성 사용자 위치 보관 (hot → cold)
+
+매칭 동의 OFF / 서비스 비활성 / LOCATION_COLD_AFTER_DAYS일 넘게 위치가 갱신되지 않은 사용자의 위치를
+user_locations에서 user_locations_cold로 옮깁니다. (cron 등으로 주기적으로 실행)
+다음 위치 업데이트 또는 매칭 동의 ON 시 자동으로 user_locations로 돌아갑니다.
+
+    python manage.py archive_locations
+    python manage.py archive_locations --days 7
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.users.location_storage import archive_inactive_locations
+
+
+class Command(BaseCommand):
+    help = '오래 활동하지 않은 사용자의 위치를 cold 테이블로 옮깁니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='비활성 기준 (일, 기본값: LOCATION_COLD_AFTER_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='한 번에 옮길 행 수')
+
+    def handle(self, *args, **options):
+        days = options['days'] or settings.LOCATION_COLD_AFTER_DAYS
+        now = timezone.now()
+        archived = archive_inactive_locations(now, now - timedelta(days=days), batch_size=options['batch_size'])
+        self.stdout.write(f'✅ 위치 {archived}건 보관 (비활성 기준: {days}일)')
@@ -0,0 +1,153 @@
+"""
+위치 반경 조회 벤치마크 (일반 테이블 vs 지역 파티셔닝)
+
+임시 테이블 두 개(일반 / region HASH 파티셔닝)에 같은 위치 데이터를 --rows건 만들고,
+find_matchable_users와 같은 조건(region + 위도/경도 사각형)으로 반경 조회 지연 시간을 비교합니다.
+임시 테이블(TEMP)만 사용하므로 실제 user_locations에는 영향이 없습니다.
+
+    python manage.py benchmark_location_queries                     # 100만 건, 조회 200회
+    python manage.py benchmark_location_queries --rows 5000000 --queries 500 --radius 0.05
+"""
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.users.models import COORDINATE_SCALE, LOCATION_REGION_SQL, location_regions_for_box
+from apps.matching.utils import bounding_box, bounding_box_e6
+
+
+# 위치 데이터를 만들 도시 (위도, 경도) - 서비스 지역이 여러 곳으로 늘어난 상황을 가정
+CITIES = [
+    (37.5665, 126.9780),  # 서울
+    (35.1796, 129.0756),  # 부산
+    (35.8714, 128.6014),  # 대구
+    (35.6762, 139.6503),  # 도쿄
+    (34.6937, 135.5023),  # 오사카
+    (25.0330, 121.5654),  # 타이베이
+    (1.3521, 103.8198),  # 싱가포르
+    (13.7563, 100.5018),  # 방콕
+]
+CITY_SPREAD_DEGREES = 0.5  # 도시 중심에서 ±0.5도 안에 분포
+
+PLAIN_TABLE = 'bench_locations_plain'
+PARTITIONED_TABLE = 'bench_locations_partitioned'
+
+
+class Command(BaseCommand):
+    help = '일반 테이블과 지역 파티셔닝 테이블의 위치 반경 조회 지연 시간을 비교합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='위치 행 수')
+        parser.add_argument('--queries', type=int, default=200, help='반경 조회 횟수')
+        parser.add_argument('--partitions', type=int, default=16, help='파티션 수 (HASH modulus)')
+        parser.add_argument('--radius', type=float, default=None, help='조회 반경 (km, 기본값: MATCHING_RADIUS_KM)')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('PostgreSQL에서만 사용할 수 있습니다.')
+
+        radius_km = options['radius'] or settings.MATCHING_RADIUS_KM
+        region_expression = LOCATION_REGION_SQL.format(lat='latitude_e6', lon='longitude_e6')
+
+        with connection.cursor() as cursor:
+            self.stdout.write(f'🛠️ 임시 테이블 생성 ({options["rows"]:,}건, 파티션 {options["partitions"]}개)')
+            started = time.monotonic()
+            self._create_tables(cursor, options['partitions'])
+            self._load_rows(cursor, options['rows'], region_expression)
+            self.stdout.write(f'   완료 ({time.monotonic() - started:.1f}초)')
+
+            # 실제 위치 근처에서 조회 (빈 지역만 조회하지 않도록)
+            cursor.execute(f'SELECT latitude_e6, longitude_e6 FROM {PLAIN_TABLE} ORDER BY random() LIMIT %s', [options['queries']])
+            points = [(lat_e6 / COORDINATE_SCALE, lon_e6 / COORDINATE_SCALE) for lat_e6, lon_e6 in cursor.fetchall()]
+
+            results = {}
+            for table in (PLAIN_TABLE, PARTITIONED_TABLE):
+                # 캐시 상태를 맞추기 위해 한 번씩 미리 실행
+                for latitude, longitude in points[:10]:
+                    self._query(cursor, table, latitude, longitude, radius_km)
+                results[table] = [
+                    self._query(cursor, table, latitude, longitude, radius_km)
+                    for latitude, longitude in random.sample(points, len(points))
+                ]
+
+            cursor.execute(
+                f'EXPLAIN SELECT count(*) FROM {PARTITIONED_TABLE} '
+                f'WHERE region = ANY(%s) AND latitude_e6 BETWEEN %s AND %s AND longitude_e6 BETWEEN %s AND %s',
+                self._params(*points[0], radius_km),
+            )
+            plan = '\n'.join(f'   {row[0]}' for row in cursor.fetchall())
+
+            cursor.execute(f'DROP TABLE {PARTITIONED_TABLE}, {PLAIN_TABLE}')
+
+        self.stdout.write(f'📊 반경 {radius_km * 1000:.0f}m 조회 {len(points)}회')
+        for table, label in ((PLAIN_TABLE, '일반 테이블'), (PARTITIONED_TABLE, '지역 파티셔닝')):
+            timings = sorted(elapsed for elapsed, _count in results[table])
+            counts = [count for _elapsed, count in results[table]]
+            self.stdout.write(
+                f'   {label}: 평균 {statistics.mean(timings):.2f}ms, '
+                f'p50 {timings[len(timings) // 2]:.2f}ms, p95 {timings[int(len(timings) * 0.95)]:.2f}ms '
+                f'(평균 {statistics.mean(counts):.1f}건)'
+            )
+        self.stdout.write('🔎 파티셔닝 테이블 실행 계획 (파티션 제외 확인)')
+        self.stdout.write(plan)
+
+    def _create_tables(self, cursor, partition_count):
+        columns = '''
+            id bigint NOT NULL,
+            region integer NOT NULL,
+            latitude_e6 integer NOT NULL,
+            longitude_e6 integer NOT NULL
+        '''
+        cursor.execute(f'CREATE TEMP TABLE {PLAIN_TABLE} ({columns}, PRIMARY KEY (id))')
+        cursor.execute(f'CREATE INDEX ON {PLAIN_TABLE} (latitude_e6, longitude_e6)')
+
+        cursor.execute(
+            f'CREATE TEMP TABLE {PARTITIONED_TABLE} ({columns}, PRIMARY KEY (id, region)) PARTITION BY HASH (region)'
+        )
+        for remainder in range(partition_count):
+            cursor.execute(
+                f'CREATE TEMP TABLE {PARTITIONED_TABLE}_p{remainder} PARTITION OF {PARTITIONED_TABLE} '
+                f'FOR VALUES WITH (MODULUS {partition_count}, REMAINDER {remainder})'
+            )
+        cursor.execute(f'CREATE INDEX ON {PARTITIONED_TABLE} (latitude_e6, longitude_e6)')
+
+    def _load_rows(self, cursor, rows, region_expression):
+        city_lats = ', '.join(str(lat) for lat, _lon in CITIES)
+        city_lons = ', '.join(str(lon) for _lat, lon in CITIES)
+        cursor.execute(f'''
+            INSERT INTO {PLAIN_TABLE} (id, region, latitude_e6, longitude_e6)
+            SELECT id, {region_expression}, latitude_e6, longitude_e6
+            FROM (
+                SELECT
+                    id,
+                    round(((ARRAY[{city_lats}])[city] + (random() - 0.5) * {CITY_SPREAD_DEGREES * 2}) * {COORDINATE_SCALE})::integer AS latitude_e6,
+                    round(((ARRAY[{city_lons}])[city] + (random() - 0.5) * {CITY_SPREAD_DEGREES * 2}) * {COORDINATE_SCALE})::integer AS longitude_e6
+                FROM (
+                    SELECT id, 1 + floor(random() * {len(CITIES)})::integer AS city
+                    FROM generate_series(1, %s) AS id
+                ) cities
+            ) points
+        ''', [rows])
+        cursor.execute(f'INSERT INTO {PARTITIONED_TABLE} SELECT * FROM {PLAIN_TABLE}')
+        cursor.execute(f'ANALYZE {PLAIN_TABLE}')
+        cursor.execute(f'ANALYZE {PARTITIONED_TABLE}')
+
+    def _params(self, latitude, longitude, radius_km):
+        min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+        return [location_regions_for_box(min_lat, max_lat, min_lon, max_lon), *bounding_box_e6(latitude, longitude, radius_km)]
+
+    def _query(self, cursor, table, latitude, longitude, radius_km):
+        """반경 조회 1회 → (지연 시간 ms, 조회된 행 수)"""
+        params = self._params(latitude, longitude, radius_km)
+        started = time.perf_counter()
+        cursor.execute(
+            f'SELECT id, latitude_e6, longitude_e6 FROM {table} '
+            f'WHERE region = ANY(%s) AND latitude_e6 BETWEEN %s AND %s AND longitude_e6 BETWEEN %s AND %s',
+            params,
+        )
+        count = len(cursor.fetchall())
+        return (time.perf_counter() - started) * 1000, count
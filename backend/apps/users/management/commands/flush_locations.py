@@ -0,0 +1,62 @@
+"""
+위치 write-behind flush
+
+LOCATION_WRITE_MODE=write_behind 일 때 Redis 버퍼에 쌓인 최신 위치를 주기적으로 UserLocation에 일괄 반영합니다.
+종료 신호(SIGTERM/SIGINT)를 받으면 남은 위치를 모두 반영한 뒤 종료합니다.
+
+    python manage.py flush_locations            # LOCATION_FLUSH_INTERVAL_SECONDS 주기로 반복
+    python manage.py flush_locations --once     # 1회만 실행 (배포 전 수동 flush 등)
+"""
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.users.location_buffer import flush_buffered_locations
+
+
+class Command(BaseCommand):
+    help = 'Redis 버퍼의 최신 위치를 UserLocation에 일괄 반영합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='1회만 실행하고 종료')
+        parser.add_argument('--interval', type=int, default=None, help='flush 주기 (초, 기본값: LOCATION_FLUSH_INTERVAL_SECONDS)')
+        parser.add_argument('--batch-size', type=int, default=None, help='upsert 1회당 사용자 수 (기본값: LOCATION_FLUSH_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or settings.LOCATION_FLUSH_INTERVAL_SECONDS
+        batch_size = options['batch_size'] or settings.LOCATION_FLUSH_BATCH_SIZE
+
+        stop_event = threading.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_args: stop_event.set())
+
+        self.stdout.write(f'🚀 위치 flush 시작 (주기: {interval}초, 배치: {batch_size}명)')
+
+        while True:
+            close_old_connections()
+            started = time.monotonic()
+            self._flush(batch_size)
+            if options['once']:
+                return
+            stop_event.wait(max(0.0, interval - (time.monotonic() - started)))
+            if stop_event.is_set():
+                break
+
+        # 종료 전 마지막 flush (대기 중 들어온 위치까지 반영)
+        self._flush(batch_size)
+        self.stdout.write('🛑 위치 flush 종료')
+
+    def _flush(self, batch_size):
+        started = time.monotonic()
+        try:
+            flushed = flush_buffered_locations(batch_size)
+        except Exception as e:
+            # 반영하지 못한 사용자는 버퍼에 남아 있으므로 다음 flush에서 다시 시도
+            self.stderr.write(f'❌ 위치 flush 실패: {str(e)}')
+            return
+        if flushed:
+            self.stdout.write(f'✅ 위치 {flushed}건 반영 ({(time.monotonic() - started) * 1000:.0f}ms)')
@@ -0,0 +1,47 @@
+"""
+user_locations 지역 파티셔닝
+
+user_locations를 지역 키(region, 위도/경도 1도 칸)로 HASH 파티셔닝된 테이블로 변환합니다.
+변환은 한 트랜잭션으로 이루어지며, 그동안 위치 쓰기는 대기합니다.
+변환 후에는 웹/워커 프로세스를 재시작해야 파티셔닝용 upsert를 사용합니다.
+
+    python manage.py partition_locations                  # 16개 파티션으로 변환
+    python manage.py partition_locations --partitions 32
+    python manage.py partition_locations --revert         # 일반 테이블로 되돌림
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.users.location_storage import (
+    is_location_table_partitioned,
+    partition_location_table,
+    unpartition_location_table,
+)
+
+
+class Command(BaseCommand):
+    help = 'user_locations를 지역으로 파티셔닝된 테이블로 변환합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--partitions', type=int, default=16, help='파티션 수 (HASH modulus)')
+        parser.add_argument('--revert', action='store_true', help='파티셔닝을 해제하고 일반 테이블로 되돌림')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('PostgreSQL에서만 사용할 수 있습니다.')
+
+        partitioned = is_location_table_partitioned()
+        if options['revert']:
+            if not partitioned:
+                raise CommandError('user_locations가 파티셔닝되어 있지 않습니다.')
+            moved = unpartition_location_table()
+            self.stdout.write(f'✅ user_locations를 일반 테이블로 되돌림 (위치 {moved}건)')
+            return
+
+        if partitioned:
+            raise CommandError('user_locations가 이미 파티셔닝되어 있습니다.')
+        if options['partitions'] < 1:
+            raise CommandError('--partitions는 1 이상이어야 합니다.')
+        moved = partition_location_table(options['partitions'])
+        self.stdout.write(f'✅ user_locations를 {options["partitions"]}개 파티션으로 변환 (위치 {moved}건)')
+        self.stdout.write('   웹/워커 프로세스를 재시작해주세요.')
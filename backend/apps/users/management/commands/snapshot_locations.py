@@ -0,0 +1,71 @@
+"""
+위치 스냅샷
+
+user_locations(UNLOGGED 운영 시 비정상 종료로 비워질 수 있음)를 주기적으로 user_location_snapshots에 복사합니다.
+복사하기 전에 user_locations가 비어 있고 스냅샷이 있으면(비정상 종료로 비워진 경우) 먼저 스냅샷에서 복구합니다.
+(스냅샷은 user_locations에 있는 행만 갱신하므로, 비워진 테이블을 복사해도 스냅샷이 지워지지 않음)
+
+    python manage.py snapshot_locations                  # LOCATION_SNAPSHOT_INTERVAL_SECONDS 주기로 반복
+    python manage.py snapshot_locations --once           # 1회만 복사
+    python manage.py snapshot_locations --restore        # 스냅샷에서 복구 (현재 위치가 없는 사용자만)
+    python manage.py snapshot_locations --apply-storage  # LOCATION_TABLE_UNLOGGED/FILLFACTOR 설정 변경 반영
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from apps.users.location_storage import (
+    apply_location_table_storage,
+    needs_restore,
+    restore_locations_from_snapshot,
+    snapshot_locations,
+)
+
+
+class Command(BaseCommand):
+    help = '사용자 위치를 복구용 스냅샷 테이블에 주기적으로 복사합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='1회만 실행하고 종료')
+        parser.add_argument('--interval', type=int, default=None, help='복사 주기 (초, 기본값: LOCATION_SNAPSHOT_INTERVAL_SECONDS)')
+        parser.add_argument('--restore', action='store_true', help='스냅샷에서 위치를 복구하고 종료')
+        parser.add_argument('--apply-storage', action='store_true', help='user_locations 저장 방식(UNLOGGED/fillfactor) 설정을 적용하고 종료')
+
+    def handle(self, *args, **options):
+        if options['apply_storage']:
+            if apply_location_table_storage():
+                self.stdout.write(
+                    f'✅ user_locations 저장 방식 적용 ({"UNLOGGED" if settings.LOCATION_TABLE_UNLOGGED else "LOGGED"}, '
+                    f'fillfactor {settings.LOCATION_TABLE_FILLFACTOR})'
+                )
+            else:
+                self.stdout.write('⚠️ PostgreSQL이 아니므로 저장 방식을 적용하지 않았습니다.')
+            return
+
+        if options['restore']:
+            restored = restore_locations_from_snapshot()
+            self.stdout.write(f'♻️ 스냅샷에서 위치 {restored}건 복구')
+            return
+
+        interval = options['interval'] or settings.LOCATION_SNAPSHOT_INTERVAL_SECONDS
+        self.stdout.write(f'🚀 위치 스냅샷 시작 (주기: {interval}초)')
+
+        while True:
+            close_old_connections()
+            started = time.monotonic()
+            try:
+                if needs_restore():
+                    restored = restore_locations_from_snapshot()
+                    self.stdout.write(f'♻️ user_locations가 비어 있어 스냅샷에서 위치 {restored}건 복구')
+                copied = snapshot_locations(timezone.now())
+            except Exception as e:
+                self.stderr.write(f'❌ 위치 스냅샷 실패: {str(e)}')
+            else:
+                self.stdout.write(f'✅ 위치 {copied}건 스냅샷 ({(time.monotonic() - started) * 1000:.0f}ms)')
+
+            if options['once']:
+                return
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
@@ -0,0 +1,75 @@
+"""
+WebSocket(Channels) JWT 인증 미들웨어
+
+HTTP API와 같은 access token으로 WebSocket 연결을 인증합니다.
+토큰은 쿼리 스트링(?token=...) 또는 Authorization: Bearer 헤더로 전달합니다.
+
+PrimaryPinMiddleware: 쓰기 요청을 보낸 사용자의 이후 읽기를 잠시 primary DB로 고정 (읽기 복제본 사용 시)
+"""
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from rest_framework.exceptions import AuthenticationFailed
+from apps.users.authentication import CachedJWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from config.db_router import pin_primary
+
+
+# 상태를 바꾸지 않는 HTTP 메서드
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+@database_sync_to_async
+def _get_user_for_token(raw_token):
+    """access token 검증 후 사용자 반환 (유효하지 않으면 None)"""
+    authentication = CachedJWTAuthentication()
+    try:
+        validated_token = authentication.get_validated_token(raw_token)
+        return authentication.get_user(validated_token)
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+
+
+def _get_raw_token(scope):
+    query = parse_qs(scope.get('query_string', b'').decode())
+    if query.get('token'):
+        return query['token'][0]
+
+    for name, value in scope.get('headers', []):
+        if name == b'authorization':
+            parts = value.decode().split()
+            if len(parts) == 2 and parts[0] == 'Bearer':
+                return parts[1]
+    return None
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """토큰이 유효하면 scope['user']를 토큰의 사용자로 설정"""
+
+    async def __call__(self, scope, receive, send):
+        raw_token = _get_raw_token(scope)
+        if raw_token:
+            user = await _get_user_for_token(raw_token)
+            if user is not None:
+                scope = dict(scope, user=user)
+        return await super().__call__(scope, receive, send)
+
+
+class PrimaryPinMiddleware:
+    """
+    POST/PUT/PATCH/DELETE 요청을 보낸 사용자를 잠시 primary DB에 고정
+
+    DRF는 뷰에서 JWT로 인증한 사용자를 request.user에도 설정하므로 응답 후에 사용자를 알 수 있습니다.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        user = getattr(request, 'user', None)
+        if request.method not in SAFE_METHODS and getattr(user, 'is_authenticated', False):
+            pin_primary(user.id)
+        return response
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_idealtypeprofile_priority_1_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['updated_at'], name='users_updated_047d73_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userlocation',
+            index=models.Index(fields=['updated_at'], name='user_locati_updated_0cdf1e_idx'),
+        ),
+    ]
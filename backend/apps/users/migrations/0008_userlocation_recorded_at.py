@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_user_users_updated_047d73_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userlocation',
+            name='recorded_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='측정 시간'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# 마이그레이션 작성 시점의 user_locations 테이블 (파티셔닝 전)
+LOCATION_TABLE = 'user_locations'
+
+
+def apply_location_table_storage(apps, schema_editor):
+    # LOCATION_TABLE_UNLOGGED / LOCATION_TABLE_FILLFACTOR 설정 적용 (PostgreSQL만)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'ALTER TABLE {LOCATION_TABLE} SET {"UNLOGGED" if settings.LOCATION_TABLE_UNLOGGED else "LOGGED"}'
+    )
+    schema_editor.execute(f'ALTER TABLE {LOCATION_TABLE} SET (fillfactor = %s)' % int(settings.LOCATION_TABLE_FILLFACTOR))
+
+
+def reset_location_table_storage(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'ALTER TABLE {LOCATION_TABLE} SET LOGGED')
+    schema_editor.execute(f'ALTER TABLE {LOCATION_TABLE} RESET (fillfactor)')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_userlocation_recorded_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserLocationSnapshot',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='location_snapshot', serialize=False, to='users.user', verbose_name='사용자')),
+                ('latitude', models.DecimalField(decimal_places=6, max_digits=9, verbose_name='위도')),
+                ('longitude', models.DecimalField(decimal_places=6, max_digits=9, verbose_name='경도')),
+                ('recorded_at', models.DateTimeField(blank=True, null=True, verbose_name='측정 시간')),
+                ('updated_at', models.DateTimeField(verbose_name='업데이트 시간')),
+                ('snapshot_at', models.DateTimeField(verbose_name='스냅샷 시간')),
+            ],
+            options={
+                'verbose_name': '사용자 위치 스냅샷',
+                'verbose_name_plural': '사용자 위치 스냅샷들',
+                'db_table': 'user_location_snapshots',
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='userlocation',
+            name='user_locati_updated_0cdf1e_idx',
+        ),
+        migrations.RunPython(apply_location_table_storage, reset_location_table_storage),
+    ]
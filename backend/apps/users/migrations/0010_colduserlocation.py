@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_userlocation_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ColdUserLocation',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='cold_location', serialize=False, to='users.user', verbose_name='사용자')),
+                ('latitude', models.DecimalField(decimal_places=6, max_digits=9, verbose_name='위도')),
+                ('longitude', models.DecimalField(decimal_places=6, max_digits=9, verbose_name='경도')),
+                ('recorded_at', models.DateTimeField(blank=True, null=True, verbose_name='측정 시간')),
+                ('updated_at', models.DateTimeField(verbose_name='업데이트 시간')),
+                ('archived_at', models.DateTimeField(verbose_name='보관 시간')),
+            ],
+            options={
+                'verbose_name': '사용자 위치 (보관)',
+                'verbose_name_plural': '사용자 위치들 (보관)',
+                'db_table': 'user_locations_cold',
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_colduserlocation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userlocation',
+            name='region',
+            field=models.IntegerField(default=0, verbose_name='지역'),
+        ),
+        # 기존 위치의 지역 키 채우기
+        migrations.RunSQL(
+            'UPDATE user_locations SET region = (floor(latitude)::integer + 90) * 360 + (floor(longitude)::integer + 180)',
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='userlocation',
+            constraint=models.UniqueConstraint(fields=('user', 'region'), name='user_locations_user_region_uniq'),
+        ),
+    ]
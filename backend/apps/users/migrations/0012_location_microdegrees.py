@@ -0,0 +1,67 @@
+from django.db import migrations, models
+
+
+LOCATION_TABLES = ('user_locations', 'user_location_snapshots', 'user_locations_cold')
+MODEL_NAMES = ('userlocation', 'userlocationsnapshot', 'colduserlocation')
+
+
+def _add_microdegree_fields(model_name):
+    return [
+        migrations.AddField(
+            model_name=model_name,
+            name='latitude_e6',
+            field=models.IntegerField(null=True, verbose_name='위도 (마이크로도)'),
+        ),
+        migrations.AddField(
+            model_name=model_name,
+            name='longitude_e6',
+            field=models.IntegerField(null=True, verbose_name='경도 (마이크로도)'),
+        ),
+    ]
+
+
+def _finish_microdegree_fields(model_name):
+    return [
+        migrations.RemoveField(model_name=model_name, name='latitude'),
+        migrations.RemoveField(model_name=model_name, name='longitude'),
+        migrations.AlterField(
+            model_name=model_name,
+            name='latitude_e6',
+            field=models.IntegerField(verbose_name='위도 (마이크로도)'),
+        ),
+        migrations.AlterField(
+            model_name=model_name,
+            name='longitude_e6',
+            field=models.IntegerField(verbose_name='경도 (마이크로도)'),
+        ),
+    ]
+
+
+class Migration(migrations.Migration):
+    """위치 좌표를 DecimalField(9, 6)에서 마이크로도 정수로 변경 (user_locations / 스냅샷 / cold)"""
+
+    dependencies = [
+        ('users', '0011_userlocation_region'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='userlocation',
+            name='user_locati_latitud_ecfe0e_idx',
+        ),
+        *[operation for model_name in MODEL_NAMES for operation in _add_microdegree_fields(model_name)],
+        # 기존 좌표 옮기기 (소수점 6자리이므로 정확히 정수가 됨)
+        *[
+            migrations.RunSQL(
+                f'UPDATE {table} SET latitude_e6 = (latitude * 1000000)::integer, '
+                f'longitude_e6 = (longitude * 1000000)::integer',
+                f'UPDATE {table} SET latitude = latitude_e6 / 1000000.0, longitude = longitude_e6 / 1000000.0',
+            )
+            for table in LOCATION_TABLES
+        ],
+        *[operation for model_name in MODEL_NAMES for operation in _finish_microdegree_fields(model_name)],
+        migrations.AddIndex(
+            model_name='userlocation',
+            index=models.Index(fields=['latitude_e6', 'longitude_e6'], name='user_locati_latitud_dd7215_idx'),
+        ),
+    ]
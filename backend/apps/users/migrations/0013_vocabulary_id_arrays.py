@@ -0,0 +1,106 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:50
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import json
+import zlib
+
+from django.db import migrations, models
+
+
+# 마이그레이션 작성 시점의 항목 목록과 ID 규칙 (apps.users.vocabulary가 바뀌어도 이 마이그레이션의 결과가 바뀌지 않도록 복사)
+PERSONALITY_TYPES = ('extrovert', 'introvert', 'humorous', 'serious', 'calm', 'energetic')
+INTERESTS = ('sports', 'music', 'movie', 'reading', 'travel', 'cooking', 'game', 'art')
+
+_PERSONALITY_IDS = {value: index + 1 for index, value in enumerate(PERSONALITY_TYPES)}
+_INTEREST_IDS = {value: index + 1 for index, value in enumerate(INTERESTS)}
+
+
+def _unknown_id(value):
+    """목록에 없는 항목의 ID (값의 CRC32로 만든 음수)"""
+    return -(zlib.crc32(json.dumps(value, sort_keys=True, ensure_ascii=False).encode()) & 0x7fffffff) - 1
+
+
+def _encode_ids(values, ids):
+    """항목 목록 → 정수 ID 배열 (목록에 있는 항목은 1부터의 순번, 없는 항목은 음수 ID, 중복 제거 후 정렬)"""
+    if not isinstance(values, list):
+        return []
+    return sorted({
+        (ids.get(value) if isinstance(value, str) else None) or _unknown_id(value)
+        for value in values
+    })
+
+
+def personality_ids(values):
+    return _encode_ids(values, _PERSONALITY_IDS)
+
+
+def interest_ids(values):
+    return _encode_ids(values, _INTEREST_IDS)
+
+
+def fill_vocabulary_ids(apps, schema_editor):
+    """기존 사용자/이상형 프로필의 성격/관심사 목록으로 ID 배열 채우기"""
+    User = apps.get_model('users', 'User')
+    IdealTypeProfile = apps.get_model('users', 'IdealTypeProfile')
+
+    users = list(User.objects.only('id', 'personality', 'interests'))
+    for user in users:
+        user.personality_ids = personality_ids(user.personality)
+        user.interest_ids = interest_ids(user.interests)
+    User.objects.bulk_update(users, ['personality_ids', 'interest_ids'], batch_size=1000)
+
+    profiles = list(IdealTypeProfile.objects.only('id', 'preferred_personality', 'preferred_interests'))
+    for profile in profiles:
+        profile.preferred_personality_ids = personality_ids(profile.preferred_personality)
+        profile.preferred_interest_ids = interest_ids(profile.preferred_interests)
+    IdealTypeProfile.objects.bulk_update(
+        profiles, ['preferred_personality_ids', 'preferred_interest_ids'], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_location_microdegrees'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idealtypeprofile',
+            name='preferred_interest_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, editable=False, size=None, verbose_name='선호 관심사 ID 배열'),
+        ),
+        migrations.AddField(
+            model_name='idealtypeprofile',
+            name='preferred_personality_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, editable=False, size=None, verbose_name='선호 성격 유형 ID 배열'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='interest_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, editable=False, size=None, verbose_name='관심사 ID 배열'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='personality_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, editable=False, size=None, verbose_name='성격 유형 ID 배열'),
+        ),
+        migrations.RunPython(fill_vocabulary_ids, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='idealtypeprofile',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['preferred_personality_ids'], name='ideal_pref_personality_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='idealtypeprofile',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['preferred_interest_ids'], name='ideal_pref_interest_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['personality_ids'], name='users_personality_ids_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['interest_ids'], name='users_interest_ids_gin'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:10
+
+from django.db import migrations, models
+
+
+# 마이그레이션 작성 시점의 완성도 기준 (이후 모델 코드가 바뀌어도 이 마이그레이션의 결과가 바뀌지 않도록 복사)
+PROFILE_COMPLETENESS_FIELDS = ('age', 'gender', 'height', 'mbti', 'personality', 'interests')
+IDEAL_TYPE_COMPLETENESS_FIELDS = (
+    'height_min', 'height_max', 'age_min', 'age_max', 'preferred_personality', 'preferred_interests',
+)
+
+
+def fill_completeness(apps, schema_editor):
+    """기존 사용자의 프로필/이상형 프로필 완성도 채우기"""
+    User = apps.get_model('users', 'User')
+    IdealTypeProfile = apps.get_model('users', 'IdealTypeProfile')
+
+    ideal_types = {ideal_type.user_id: ideal_type for ideal_type in IdealTypeProfile.objects.all()}
+    users = list(User.objects.only('id', *PROFILE_COMPLETENESS_FIELDS))
+    for user in users:
+        ideal_type = ideal_types.get(user.id)
+        user.profile_complete = all(getattr(user, field, None) for field in PROFILE_COMPLETENESS_FIELDS)
+        user.ideal_type_complete = ideal_type is not None and all(
+            getattr(ideal_type, field, None) for field in IDEAL_TYPE_COMPLETENESS_FIELDS
+        )
+    User.objects.bulk_update(users, ['profile_complete', 'ideal_type_complete'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0013_vocabulary_id_arrays'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_complete',
+            field=models.BooleanField(default=False, editable=False, verbose_name='프로필 완성 여부'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='ideal_type_complete',
+            field=models.BooleanField(default=False, editable=False, verbose_name='이상형 프로필 완성 여부'),
+        ),
+        migrations.RunPython(fill_completeness, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,16 @@
-from django.db import models
+import copy
+import math
+from decimal import Decimal
+
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 
+from apps.users.vocabulary import interest_ids, personality_ids
+
 class AuthUserManager(BaseUserManager):
     """인증 사용자 매니저"""
     
@@ -57,6 +65,22 @@ class AuthUser(AbstractBaseUser):
     def __str__(self):
         return f"{self.username} ({self.email})"
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # 인증 사용자 스냅샷 무효화 (비밀번호 변경 포함, 로그인 시각만 바뀐 경우 제외)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or set(update_fields) - {'last_login'}:
+            # 순환 import 방지 (auth_cache → users.models)
+            from apps.users.auth_cache import invalidate_auth_user
+            invalidate_auth_user(self.id)
+    
+    def delete(self, *args, **kwargs):
+        user_id = self.id
+        result = super().delete(*args, **kwargs)
+        from apps.users.auth_cache import invalidate_auth_user
+        invalidate_auth_user(user_id)
+        return result
+    
     def has_perm(self, perm, obj=None):
         """권한 확인"""
         return self.is_superuser
@@ -66,8 +90,110 @@ class AuthUser(AbstractBaseUser):
         return self.is_superuser
 
 
-class User(models.Model):
+def _with_derived_fields(update_fields, derived_fields):
+    """update_fields에 원본 필드가 있으면 그 값에서 계산하는 필드도 추가 (None이면 그대로)"""
+    if update_fields is None:
+        return None
+    update_fields = list(update_fields)
+    for field, derived_field in derived_fields.items():
+        if field in update_fields and derived_field not in update_fields:
+            update_fields.append(derived_field)
+    return update_fields
+
+
+# 프로필/이상형 프로필 완성도를 결정하는 필드
+PROFILE_COMPLETENESS_FIELDS = ('age', 'gender', 'height', 'mbti', 'personality', 'interests')
+IDEAL_TYPE_COMPLETENESS_FIELDS = (
+    'height_min', 'height_max', 'age_min', 'age_max', 'preferred_personality', 'preferred_interests',
+)
+
+
+def is_profile_complete(profile):
+    """프로필 완성 여부 (필수 필드가 모두 있고 성격/관심사가 1개 이상)"""
+    return all(getattr(profile, field, None) for field in PROFILE_COMPLETENESS_FIELDS)
+
+
+def is_ideal_type_complete(ideal_type):
+    """이상형 프로필 완성 여부 (MBTI는 선택사항, 선호 성격/관심사는 1개 이상)"""
+    return all(getattr(ideal_type, field, None) for field in IDEAL_TYPE_COMPLETENESS_FIELDS)
+
+
+class LoadedValuesTracker:
+    """
+    DB에서 읽은 TRACKED_FIELDS 값을 기억해 두고(from_db) 저장 시 실제로 바뀐 필드만 확인하는 mixin
+    """
+    TRACKED_FIELDS = ()
+    # 다른 경로가 UPDATE로만 갱신하는 필드 (읽은 값을 기억해 전체 저장 시 호출자가 바꿨는지 확인)
+    EXTERNALLY_UPDATED_FIELDS = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_loaded_values()
+        return instance
+
+    def _remember_loaded_values(self):
+        """현재 값을 DB 값으로 기억 (JSON 목록은 제자리 수정도 감지하도록 복사)"""
+        self._loaded_values = {
+            field: copy.deepcopy(self.__dict__[field])
+            for field in (*self.TRACKED_FIELDS, *self.EXTERNALLY_UPDATED_FIELDS) if field in self.__dict__
+        }
+
+    def _refresh_externally_updated_fields(self):
+        """
+        호출자가 바꾸지 않은 EXTERNALLY_UPDATED_FIELDS를 DB의 현재 값으로 갱신 (기존 행의 전체 저장 전에 호출)
+
+        행이 이미 삭제되었으면 그대로 둡니다. (Django의 INSERT 대체 저장이 그대로 동작)
+        """
+        stale = set(self.EXTERNALLY_UPDATED_FIELDS) - self.changed_fields(self.EXTERNALLY_UPDATED_FIELDS)
+        if not stale:
+            return
+        current = type(self)._base_manager.filter(pk=self.pk).values(*stale).first()
+        if current is None:
+            return
+        for field, value in current.items():
+            setattr(self, field, value)
+        self._loaded_values.update(current)
+
+    def changed_fields(self, fields, update_fields=None):
+        """
+        fields 중 DB에서 읽은 값과 달라진 필드 (새 객체면 전부)
+
+        Args:
+            update_fields: save()의 update_fields (있으면 그 안의 필드만 확인)
+        """
+        fields = set(fields) if update_fields is None else set(fields) & set(update_fields)
+        loaded = getattr(self, '_loaded_values', None)
+        if self._state.adding or loaded is None:
+            return fields
+        # 지연 로딩(deferred) 후 접근하지 않은 필드는 바뀌지 않은 것으로 봄
+        return {
+            field for field in fields
+            if field in self.__dict__ and (field not in loaded or self.__dict__[field] != loaded[field])
+        }
+
+    def _full_clean_changed(self, changed):
+        """
+        변경된 필드만 검증 (새 객체는 전체 검증)
+        - 바뀌지 않은 추적 필드(JSON 목록 등)와 생성 후 바뀌지 않는 user(유일성 확인 쿼리)는 생략
+        """
+        if self._state.adding:
+            self.full_clean()
+        else:
+            self.full_clean(exclude=['user', *(set(self.TRACKED_FIELDS) - changed)])
+
+
+class User(LoadedValuesTracker, models.Model):
     """사용자 프로필 모델 (users 테이블)"""
+    # 매칭 결과에 영향을 주는 필드 (변경 시 updated_at도 함께 갱신 → 증분 매칭의 변경 감지에 사용)
+    MATCHING_FIELDS = ('age', 'gender', 'height', 'mbti', 'personality', 'interests', 'matching_consent', 'service_active')
+    # 매칭 통계 필드 (조회 응답에 포함되지 않으므로 이것만 저장하면 응답 캐시를 무효화하지 않음)
+    STATS_FIELDS = ('matchable_count', 'last_count_updated_at')
+    # 저장 시 변경 여부를 확인하는 필드 (완성도 재계산, 검증 대상)
+    TRACKED_FIELDS = PROFILE_COMPLETENESS_FIELDS
+    # IdealTypeProfile 저장/삭제가 UPDATE로 갱신하는 필드
+    EXTERNALLY_UPDATED_FIELDS = ('ideal_type_complete',)
+    
     user = models.OneToOneField(
         AuthUser,
         on_delete=models.CASCADE,
@@ -84,12 +210,19 @@ class User(models.Model):
     # 성격 및 관심사
     personality = models.JSONField(default=list, verbose_name='성격 유형 리스트')
     interests = models.JSONField(default=list, verbose_name='관심사 리스트')
+    # 성격/관심사의 정수 ID 배열 (저장 시 위 목록에서 계산, GIN 인덱스로 SQL 점수 계산 후보를 추림)
+    personality_ids = ArrayField(models.IntegerField(), default=list, blank=True, editable=False, verbose_name='성격 유형 ID 배열')
+    interest_ids = ArrayField(models.IntegerField(), default=list, blank=True, editable=False, verbose_name='관심사 ID 배열')
     
     # 서비스 설정
     matching_consent = models.BooleanField(default=False, verbose_name='매칭 동의')
     service_active = models.BooleanField(default=True, verbose_name='서비스 활성화')
     consent_updated_at = models.DateTimeField(null=True, blank=True, verbose_name='동의 업데이트 시간')
     
+    # 완성도 (저장 시 관련 필드가 바뀐 경우만 다시 계산, 이상형 프로필 완성도는 IdealTypeProfile 저장 시 갱신)
+    profile_complete = models.BooleanField(default=False, editable=False, verbose_name='프로필 완성 여부')
+    ideal_type_complete = models.BooleanField(default=False, editable=False, verbose_name='이상형 프로필 완성 여부')
+    
     # 매칭 통계
     matchable_count = models.IntegerField(default=0, verbose_name='이상형 조건에 부합하는 인원 수')
     last_count_updated_at = models.DateTimeField(null=True, blank=True, verbose_name='마지막 카운트 업데이트 시간')
@@ -102,6 +235,11 @@ class User(models.Model):
         db_table = 'users'
         verbose_name = '사용자 프로필'
         verbose_name_plural = '사용자 프로필들'
+        indexes = [
+            models.Index(fields=['updated_at']),
+            GinIndex(fields=['personality_ids'], name='users_personality_ids_gin'),
+            GinIndex(fields=['interest_ids'], name='users_interest_ids_gin'),
+        ]
     
     def clean(self):
         """Validation: personality와 interests는 최소 1개 이상"""
@@ -115,36 +253,26 @@ class User(models.Model):
                 'interests': '관심사를 최소 1개 이상 선택해주세요.'
             })
     
-    def _check_profile_completeness(self):
+    def save(self, *args, **kwargs):
         """
-        프로필과 이상형 프로필이 모두 완성되었는지 확인하는 내부 메서드
-        Returns:
-            bool: 프로필과 이상형 프로필이 모두 완성되었는지 여부
+        프로필 저장 (완성도/매칭 동의/정수 ID 배열 갱신 + 매칭 후보 읽기 모델/캐시 무효화)
+
+        update_fields는 호출자가 넘긴 경우에만 좁히고 (완성도 등 파생 필드를 함께 저장), 전체 저장은 그대로 전체 저장입니다.
+        다만 ideal_type_complete는 IdealTypeProfile이 UPDATE로 갱신하므로, 기존 행의 전체 저장에서 호출자가
+        이 값을 바꾸지 않았다면 저장 전에 DB의 현재 값으로 갱신합니다. (먼저 읽어 둔 User 객체가 이전 값을 덮어쓰지 않도록,
+        매칭 동의 판단도 현재 값 기준) 호출자가 직접 바꾼 값은 그대로 저장합니다.
         """
-        # 프로필 완성도 체크
-        profile_fields = ['age', 'gender', 'height', 'mbti', 'personality', 'interests']
-        profile_complete = all(getattr(self, field, None) for field in profile_fields)
-        profile_complete = profile_complete and len(self.personality) > 0 and len(self.interests) > 0
+        if kwargs.get('update_fields') is None and not self._state.adding:
+            self._refresh_externally_updated_fields()
         
-        # 이상형 프로필 완성도 체크
-        ideal_type_complete = False
-        try:
-            ideal_type = self.ideal_type_profile
-            if ideal_type:
-                # 필수 필드 확인 (MBTI는 선택사항)
-                ideal_fields = ['height_min', 'height_max', 'age_min', 'age_max', 
-                              'preferred_personality', 'preferred_interests']
-                ideal_type_complete = all(getattr(ideal_type, field, None) for field in ideal_fields)
-                # 성격과 관심사는 최소 1개 이상 필수
-                ideal_type_complete = ideal_type_complete and \
-                    len(ideal_type.preferred_personality) > 0 and \
-                    len(ideal_type.preferred_interests) > 0
-        except Exception:
-            ideal_type_complete = False
+        # 프로필 완성도는 관련 필드가 실제로 바뀐 경우만 다시 계산 (update_fields가 있으면 완성도도 함께 저장)
+        changed = self.changed_fields(self.TRACKED_FIELDS, kwargs.get('update_fields'))
+        if changed:
+            self.profile_complete = is_profile_complete(self)
+            kwargs['update_fields'] = _with_derived_fields(
+                kwargs.get('update_fields'), {field: 'profile_complete' for field in changed}
+            )
         
-        return profile_complete and ideal_type_complete
-    
-    def save(self, *args, **kwargs):
         # 이메일 인증이 완료되지 않은 경우 매칭 동의와 서비스 활성화를 강제로 False로 설정
         if not self.user.email_verified:
             self.matching_consent = False
@@ -159,7 +287,7 @@ class User(models.Model):
                     kwargs['update_fields'] = list(kwargs['update_fields']) + ['service_active']
         else:
             # 이메일 인증 완료 시에도 프로필과 이상형 프로필이 모두 완성되어야 matching_consent = True 가능
-            all_complete = self._check_profile_completeness()
+            all_complete = self.profile_complete and self.ideal_type_complete
             
             if not all_complete:
                 # 프로필 또는 이상형 프로필이 미완성인 경우 matching_consent = False로 강제 설정, service_active = False
@@ -189,15 +317,56 @@ class User(models.Model):
                         if 'service_active' not in kwargs['update_fields']:
                             kwargs['update_fields'] = list(kwargs['update_fields']) + ['service_active']
         
-        self.full_clean()
-        super().save(*args, **kwargs)
+        # 성격/관심사 정수 ID 배열은 JSON 목록에서 계산 (update_fields에 목록이 있으면 배열도 함께 저장)
+        self.personality_ids = personality_ids(self.personality)
+        self.interest_ids = interest_ids(self.interests)
+        kwargs['update_fields'] = _with_derived_fields(
+            kwargs.get('update_fields'), {'personality': 'personality_ids', 'interests': 'interest_ids'}
+        )
+        
+        # update_fields로 매칭 관련 필드만 저장하는 경우에도 updated_at을 갱신 (auto_now는 update_fields에 있어야 저장됨)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'updated_at' not in update_fields:
+            if any(field in self.MATCHING_FIELDS for field in update_fields):
+                kwargs['update_fields'] = list(update_fields) + ['updated_at']
+        
+        self._full_clean_changed(changed)
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self._remember_loaded_values()
+            # 매칭 후보 읽기 모델 갱신 (매칭 결과에 영향을 주는 필드가 바뀐 경우만)
+            if update_fields is None or any(field in self.MATCHING_FIELDS for field in update_fields):
+                # 순환 import 방지 (matching.models → users.models)
+                from apps.matching.candidates import sync_matching_candidates
+                sync_matching_candidates([self.id])
+            # 인증 사용자 스냅샷의 프로필 상태(생성, 매칭 동의, 서비스 활성화)가 바뀐 경우 무효화
+            from apps.users.auth_cache import PROFILE_SNAPSHOT_FIELDS, invalidate_auth_user
+            if update_fields is None or any(field in PROFILE_SNAPSHOT_FIELDS for field in update_fields):
+                invalidate_auth_user(self.user_id)
+            # 프로필 조회 응답 캐시 무효화 (매칭 동의 변경 포함)
+            from apps.users.response_cache import invalidate_user_responses
+            if update_fields is None or set(update_fields) - set(self.STATS_FIELDS) - {'updated_at'}:
+                invalidate_user_responses('profile', [self.id])
+    
+    def delete(self, *args, **kwargs):
+        profile_id = self.id
+        result = super().delete(*args, **kwargs)
+        from apps.users.auth_cache import invalidate_auth_user
+        from apps.users.response_cache import invalidate_user_responses
+        invalidate_auth_user(self.user_id)
+        invalidate_user_responses('profile', [profile_id])
+        return result
     
     def __str__(self):
         return f"{self.user.username}의 프로필"
 
 
-class IdealTypeProfile(models.Model):
+class IdealTypeProfile(LoadedValuesTracker, models.Model):
     """이상형 프로필 모델"""
+    # 저장 시 변경 여부를 확인하는 필드 (완성도 재계산, 검증 대상)
+    TRACKED_FIELDS = IDEAL_TYPE_COMPLETENESS_FIELDS
+    
     user = models.OneToOneField(
         User,
         on_delete=models.CASCADE,
@@ -223,6 +392,13 @@ class IdealTypeProfile(models.Model):
     preferred_mbti = models.JSONField(default=list, verbose_name='선호 MBTI 리스트')
     preferred_personality = models.JSONField(default=list, verbose_name='선호 성격 유형 리스트')
     preferred_interests = models.JSONField(default=list, verbose_name='선호 관심사 리스트')
+    # 선호 성격/관심사의 정수 ID 배열 (저장 시 위 목록에서 계산)
+    preferred_personality_ids = ArrayField(
+        models.IntegerField(), default=list, blank=True, editable=False, verbose_name='선호 성격 유형 ID 배열'
+    )
+    preferred_interest_ids = ArrayField(
+        models.IntegerField(), default=list, blank=True, editable=False, verbose_name='선호 관심사 ID 배열'
+    )
     
     # 중요 항목 순위 (1순위, 2순위, 3순위)
     priority_1 = models.CharField(
@@ -257,6 +433,10 @@ class IdealTypeProfile(models.Model):
         db_table = 'ideal_type_profiles'
         verbose_name = '이상형 프로필'
         verbose_name_plural = '이상형 프로필들'
+        indexes = [
+            GinIndex(fields=['preferred_personality_ids'], name='ideal_pref_personality_gin'),
+            GinIndex(fields=['preferred_interest_ids'], name='ideal_pref_interest_gin'),
+        ]
     
     def clean(self):
         """Validation: 성격과 관심사는 최소 1개 이상 필수, MBTI는 선택사항"""
@@ -277,14 +457,108 @@ class IdealTypeProfile(models.Model):
             })
     
     def save(self, *args, **kwargs):
-        self.full_clean()
-        super().save(*args, **kwargs)
+        changed = self.changed_fields(self.TRACKED_FIELDS, kwargs.get('update_fields'))
+        self.preferred_personality_ids = personality_ids(self.preferred_personality)
+        self.preferred_interest_ids = interest_ids(self.preferred_interests)
+        kwargs['update_fields'] = _with_derived_fields(
+            kwargs.get('update_fields'),
+            {'preferred_personality': 'preferred_personality_ids', 'preferred_interests': 'preferred_interest_ids'},
+        )
+        self._full_clean_changed(changed)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self._remember_loaded_values()
+            # 사용자 프로필의 이상형 완성도는 관련 필드가 바뀐 경우만 갱신
+            if changed:
+                self._set_ideal_type_complete(is_ideal_type_complete(self))
+        # 이상형 프로필 조회 응답 캐시 무효화 (순환 import 방지)
+        from apps.users.response_cache import invalidate_user_responses
+        invalidate_user_responses('ideal_type', [self.user_id])
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            self._set_ideal_type_complete(False)
+        from apps.users.response_cache import invalidate_user_responses
+        invalidate_user_responses('ideal_type', [self.user_id])
+        return result
+    
+    def _set_ideal_type_complete(self, complete):
+        """User.ideal_type_complete 갱신 (User.save의 검증/무효화 없이 이 컬럼만)"""
+        User.objects.filter(id=self.user_id).update(ideal_type_complete=complete)
+        # 같은 프로필 객체로 이어서 완성도를 확인하는 호출부(ideal_type_view 등)도 바뀐 값을 보도록
+        if self._meta.get_field('user').is_cached(self):
+            self.user.ideal_type_complete = complete
     
     def __str__(self):
         return f"{self.user.user.username}의 이상형 프로필"
 
 
-class UserLocation(models.Model):
+# 위치 좌표는 마이크로도(1e-6도) 정수로 저장 (소수점 6자리 = 약 11cm)
+# 비교/경계 사각형 계산은 정수로 하고, Decimal 변환은 API 입출력 경계에서만 합니다.
+COORDINATE_SCALE = 1_000_000
+
+
+def to_microdegrees(value):
+    """위도/경도(도, Decimal/float/str) → 마이크로도 정수"""
+    return round(float(value) * COORDINATE_SCALE)
+
+
+def from_microdegrees(value):
+    """마이크로도 정수 → 위도/경도 Decimal (소수점 6자리, API 응답/Match 저장용)"""
+    return Decimal(value).scaleb(-6)
+
+
+class MicrodegreeCoordinates:
+    """latitude_e6 / longitude_e6 필드를 가진 위치 모델의 좌표 접근자"""
+
+    @property
+    def latitude(self):
+        """위도 (Decimal, API 경계용)"""
+        return from_microdegrees(self.latitude_e6)
+
+    @latitude.setter
+    def latitude(self, value):
+        self.latitude_e6 = to_microdegrees(value)
+
+    @property
+    def longitude(self):
+        """경도 (Decimal, API 경계용)"""
+        return from_microdegrees(self.longitude_e6)
+
+    @longitude.setter
+    def longitude(self, value):
+        self.longitude_e6 = to_microdegrees(value)
+
+    @property
+    def degrees(self):
+        """(위도, 경도) float - 거리 계산용 (Decimal을 만들지 않음)"""
+        return self.latitude_e6 / COORDINATE_SCALE, self.longitude_e6 / COORDINATE_SCALE
+
+
+# 위치 지역 키: 위도/경도 1도 칸 (약 111km x 88km) 번호
+# user_locations를 파티셔닝하면(partition_locations) 이 값으로 파티션을 나눔
+# DB에서 같은 값을 계산하는 식 (마이크로도 컬럼 기준, 마이그레이션/원시 SQL용)
+LOCATION_REGION_SQL = (
+    '((floor({lat} / 1000000.0)::integer + 90) * 360 + (floor({lon} / 1000000.0)::integer + 180))'
+)
+
+
+def location_region(latitude_e6, longitude_e6):
+    """위도/경도(마이크로도)가 속한 지역 키"""
+    return (latitude_e6 // COORDINATE_SCALE + 90) * 360 + (longitude_e6 // COORDINATE_SCALE + 180)
+
+
+def location_regions_for_box(min_lat, max_lat, min_lon, max_lon):
+    """위도/경도 사각형이 걸치는 지역 키 목록 (반경 조회의 파티션 조건)"""
+    return [
+        (lat + 90) * 360 + (lon + 180)
+        for lat in range(math.floor(min_lat), math.floor(max_lat) + 1)
+        for lon in range(math.floor(min_lon), math.floor(max_lon) + 1)
+    ]
+
+
+class UserLocation(MicrodegreeCoordinates, models.Model):
     """사용자 위치 정보 모델"""
     user = models.OneToOneField(
         User,
@@ -292,17 +566,98 @@ class UserLocation(models.Model):
         related_name='location',
         verbose_name='사용자'
     )
-    latitude = models.DecimalField(max_digits=9, decimal_places=6, verbose_name='위도')
-    longitude = models.DecimalField(max_digits=9, decimal_places=6, verbose_name='경도')
+    latitude_e6 = models.IntegerField(verbose_name='위도 (마이크로도)')
+    longitude_e6 = models.IntegerField(verbose_name='경도 (마이크로도)')
+    # 기기에서 위치를 측정한 시각 (배치 업로드 시 순서가 뒤바뀐/오래된 위치를 거르는 기준)
+    recorded_at = models.DateTimeField(null=True, blank=True, verbose_name='측정 시간')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='업데이트 시간')
+    # 위도/경도에서 계산 (location_region) - 저장 시 자동 설정
+    region = models.IntegerField(default=0, verbose_name='지역')
     
     class Meta:
         db_table = 'user_locations'
         verbose_name = '사용자 위치'
         verbose_name_plural = '사용자 위치들'
+        # 위치는 계속 덮어쓰므로 반경 조회에 필요한 인덱스만 둠 (자주 바뀌는 컬럼의 인덱스는 HOT 업데이트를 막음)
+        # UNLOGGED/fillfactor 설정은 location_storage.apply_location_table_storage 참고
         indexes = [
-            models.Index(fields=['latitude', 'longitude']),
+            models.Index(fields=['latitude_e6', 'longitude_e6']),
         ]
+        # 파티셔닝 시 유일 제약에 파티션 키(region)가 포함되어야 하므로 upsert는 (user, region) 기준
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'region'], name='user_locations_user_region_uniq'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        self.region = location_region(self.latitude_e6, self.longitude_e6)
+        if 'update_fields' in kwargs and kwargs['update_fields'] is not None and 'region' not in kwargs['update_fields']:
+            kwargs['update_fields'] = list(kwargs['update_fields']) + ['region']
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # 매칭 후보 읽기 모델의 좌표도 같은 트랜잭션에서 갱신 (순환 import 방지)
+            from apps.matching.candidates import sync_matching_candidates
+            sync_matching_candidates([self.user_id])
+            from apps.users.response_cache import invalidate_user_responses
+            invalidate_user_responses('location', [self.user_id])
     
     def __str__(self):
         return f"{self.user.user.username}의 위치 ({self.latitude}, {self.longitude})"
+
+
+class UserLocationSnapshot(MicrodegreeCoordinates, models.Model):
+    """
+    사용자 위치 스냅샷 (복구용)
+    
+    user_locations를 UNLOGGED로 운영하면 DB 비정상 종료 시 테이블이 비워지므로,
+    snapshot_locations 명령이 주기적으로 이 (WAL 기록되는) 테이블에 복사해 두고 복구 시 사용합니다.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='location_snapshot',
+        verbose_name='사용자'
+    )
+    latitude_e6 = models.IntegerField(verbose_name='위도 (마이크로도)')
+    longitude_e6 = models.IntegerField(verbose_name='경도 (마이크로도)')
+    recorded_at = models.DateTimeField(null=True, blank=True, verbose_name='측정 시간')
+    updated_at = models.DateTimeField(verbose_name='업데이트 시간')
+    snapshot_at = models.DateTimeField(verbose_name='스냅샷 시간')
+    
+    class Meta:
+        db_table = 'user_location_snapshots'
+        verbose_name = '사용자 위치 스냅샷'
+        verbose_name_plural = '사용자 위치 스냅샷들'
+    
+    def __str__(self):
+        return f"{self.user.user.username}의 위치 스냅샷 ({self.latitude}, {self.longitude})"
+
+
+class ColdUserLocation(MicrodegreeCoordinates, models.Model):
+    """
+    오래 활동하지 않은 사용자의 위치 (cold 테이블)
+    
+    archive_locations 명령이 매칭 동의 OFF / 서비스 비활성 / 오랫동안 위치가 갱신되지 않은 사용자의 위치를
+    user_locations에서 이 테이블로 옮깁니다. 매칭 조회는 user_locations만 읽으므로 hot 테이블과 인덱스가 작게 유지됩니다.
+    다음 위치 업데이트 또는 매칭 동의 ON 시 user_locations로 돌아갑니다.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='cold_location',
+        verbose_name='사용자'
+    )
+    latitude_e6 = models.IntegerField(verbose_name='위도 (마이크로도)')
+    longitude_e6 = models.IntegerField(verbose_name='경도 (마이크로도)')
+    recorded_at = models.DateTimeField(null=True, blank=True, verbose_name='측정 시간')
+    updated_at = models.DateTimeField(verbose_name='업데이트 시간')
+    archived_at = models.DateTimeField(verbose_name='보관 시간')
+    
+    class Meta:
+        db_table = 'user_locations_cold'
+        verbose_name = '사용자 위치 (보관)'
+        verbose_name_plural = '사용자 위치들 (보관)'
+    
+    def __str__(self):
+        return f"{self.user.user.username}의 보관된 위치 ({self.latitude}, {self.longitude})"
@@ -0,0 +1,83 @@
+"""
+접속 상태(presence)
+
+UserLocation은 기기가 위치 전송을 멈춘 뒤에도 남아 있으므로, 몇 시간 전 위치로 매칭되는(유령 매칭) 문제가 있습니다.
+위치 업데이트/heartbeat마다 Redis sorted set(presence:users, score = 마지막 확인 시각)을 갱신하고,
+매칭 후보는 PRESENCE_WINDOW_SECONDS 안에 확인된 사용자로만 제한합니다.
+→ 후보 수가 전체 가입자 수가 아니라 동시 접속자 수에 비례합니다.
+
+Redis를 사용할 수 없으면 UserLocation.updated_at 기준으로 판단합니다. (user_id 인덱스로 조회)
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.users.models import UserLocation
+from apps.matching.redis_client import get_redis
+
+
+PRESENCE_KEY = 'presence:users'
+
+
+def mark_user_seen(user_id):
+    """사용자의 마지막 확인 시각 갱신 (오래된 항목은 함께 정리)"""
+    now = time.time()
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.zadd(PRESENCE_KEY, {user_id: now})
+        pipe.zremrangebyscore(PRESENCE_KEY, '-inf', now - settings.PRESENCE_WINDOW_SECONDS * 2)
+        pipe.execute()
+    except Exception as e:
+        print(f'⚠️ 접속 상태 갱신 실패 (user_id: {user_id}): {str(e)}')
+
+
+def live_user_ids(user_ids):
+    """
+    PRESENCE_WINDOW_SECONDS 안에 확인된 사용자만 추림
+
+    Args:
+        user_ids: 확인할 사용자 ID 목록
+
+    Returns:
+        set: 접속 중인 사용자 ID
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return set()
+
+    cutoff = time.time() - settings.PRESENCE_WINDOW_SECONDS
+    try:
+        scores = get_redis().zmscore(PRESENCE_KEY, user_ids)
+    except Exception as e:
+        print(f'⚠️ 접속 상태 조회 실패, DB 위치 시각으로 판단: {str(e)}')
+        return set(
+            UserLocation.objects.filter(
+                user_id__in=user_ids,
+                updated_at__gte=timezone.now() - timedelta(seconds=settings.PRESENCE_WINDOW_SECONDS),
+            ).values_list('user_id', flat=True)
+        )
+    return {user_id for user_id, score in zip(user_ids, scores) if score is not None and score >= cutoff}
+
+
+def all_live_user_ids():
+    """
+    PRESENCE_WINDOW_SECONDS 안에 확인된 전체 사용자 ID (SQL 조건으로 넘길 때 사용)
+
+    Returns:
+        list: 접속 중인 사용자 ID (Redis를 사용할 수 없으면 None)
+    """
+    cutoff = time.time() - settings.PRESENCE_WINDOW_SECONDS
+    try:
+        return [int(user_id) for user_id in get_redis().zrangebyscore(PRESENCE_KEY, cutoff, '+inf')]
+    except Exception as e:
+        print(f'⚠️ 접속 상태 조회 실패: {str(e)}')
+        return None
+
+
+def filter_live_users(users):
+    """접속 중인 사용자만 남긴 목록 (User 객체 목록)"""
+    users = list(users)
+    live_ids = live_user_ids(user.id for user in users)
+    return [user for user in users if user.id in live_ids]
@@ -0,0 +1,71 @@
+"""
+요청 단위 프로필 로더
+
+뷰마다 request.user → .profile → .ideal_type_profile → .location → .user.email_verified를
+각각 지연 쿼리로 읽는 대신, AuthUser + User + IdealTypeProfile + UserLocation을 select_related 쿼리 1회로 가져와
+요청 객체에 저장해 둡니다. 같은 요청 안에서 여러 helper(_get_current_user_profile, _deny_if_* 등)와
+find_matchable_users가 같은 객체를 다시 사용하므로 요청자 본인의 상태는 쿼리 1회로 읽습니다.
+"""
+from apps.users.models import AuthUser, User
+
+
+# 프로필과 함께 가져오는 관계 (없는 관계는 접근 시 DoesNotExist, 추가 쿼리 없음)
+PROFILE_RELATED = ('user', 'ideal_type_profile', 'location')
+
+# 로딩한 프로필을 저장하는 속성 (DRF Request가 감싼 HttpRequest에 저장 → 같은 요청의 다른 Request 객체와 공유)
+REQUEST_PROFILES_ATTR = '_loaded_profiles'
+
+
+def _request_profiles(request):
+    http_request = getattr(request, '_request', request)
+    profiles = getattr(http_request, REQUEST_PROFILES_ATTR, None)
+    if profiles is None:
+        profiles = {}
+        setattr(http_request, REQUEST_PROFILES_ATTR, profiles)
+    return profiles
+
+
+def load_request_profile(request, user_id=None):
+    """
+    요청자(또는 DEBUG 모드의 user_id) 프로필을 관계와 함께 로딩 (요청당 1회)
+
+    Args:
+        request: DRF Request 또는 HttpRequest
+        user_id: AuthUser ID (없으면 request.user)
+
+    Returns:
+        User: 프로필 (없으면 None)
+    """
+    if user_id is None:
+        user_id = request.user.id
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+    profiles = _request_profiles(request)
+    if user_id not in profiles:
+        auth_user = getattr(request, 'user', None)
+        is_request_user = isinstance(auth_user, AuthUser) and auth_user.id == user_id
+        if is_request_user and getattr(auth_user, 'profile_state', False) is None:
+            # 인증 사용자 스냅샷에 프로필이 없으면 조회하지 않음 (auth_cache)
+            profile = None
+        else:
+            profile = User.objects.select_related(*PROFILE_RELATED).filter(user_id=user_id).first()
+        # 인증 단계에서 읽은 request.user와 같은 객체를 쓰도록 (이메일 인증 등 변경이 양쪽에 반영되도록)
+        if profile is not None and is_request_user:
+            profile.user = auth_user
+        profiles[user_id] = profile
+    return profiles[user_id]
+
+
+def remember_request_profile(request, profile):
+    """요청 중에 새로 만든 프로필을 저장 (이후 load_request_profile이 같은 객체를 반환)"""
+    _request_profiles(request)[profile.user_id] = profile
+
+
+def forget_request_profiles(request):
+    """저장해 둔 프로필을 버림 (롱폴링처럼 한 요청이 오래 기다린 뒤 다시 확인할 때 최신 상태를 읽도록)"""
+    http_request = getattr(request, '_request', request)
+    if hasattr(http_request, REQUEST_PROFILES_ATTR):
+        delattr(http_request, REQUEST_PROFILES_ATTR)
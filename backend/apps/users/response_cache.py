@@ -0,0 +1,157 @@
+"""
+사용자별 조회 응답 캐시 (read-through + ETag)
+
+앱은 화면을 열 때마다 프로필/이상형 프로필/위치/완성도를 조회하지만, 이 데이터는 거의 바뀌지 않습니다.
+GET 응답을 사용자와 데이터 버전으로 만든 키에 저장해 두고, 같은 버전이면 DB 조회와 serializer 없이 응답합니다.
+
+- 버전: 프로필(User) ID와 데이터 종류(profile, ideal_type, location)마다 Redis에 버전(resp:version:...)을 두고,
+  모델 저장(매칭 동의 변경 포함) 시 commit 후 버전을 바꿉니다. AuthUser 정보(이메일 인증 등)는
+  인증 사용자 스냅샷 버전(auth_cache)을 그대로 사용합니다.
+- ETag: 응답 본문의 해시 (strong ETag), If-None-Match가 같으면 본문 없이 304
+- 인증된 사용자의 200 응답만 캐시 (DEBUG 모드의 user_id 조회와 오류 응답은 그대로 처리)
+- 복제본: 무효화할 때 버전을 바꾸기 전에 프로필을 잠시 고정(resp:pin:...)하고, 고정된 프로필의 조회는
+  사용자를 primary에 고정(pin_primary)한 뒤 계산 → 새 버전 키에 지연된 복제본의 이전 값을 저장하지 않음
+  (다른 요청/프로세스/관리자 페이지에서 바꾼 경우 포함)
+- Redis를 사용할 수 없으면 캐시 없이 처리
+"""
+import functools
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from apps.users.auth_cache import VERSION_KEY as AUTH_VERSION_KEY
+from config.db_router import pin_primary, primary_pin_seconds, replica_aliases
+
+
+RESPONSE_VERSION_KEY = 'resp:version:{profile_id}:{kind}'
+RESPONSE_KEY = 'resp:{view}:{profile_id}:{versions}'
+# 무효화 직후 복제본이 따라잡을 때까지 primary에서 계산하도록 표시 (복제본을 사용할 때만)
+RESPONSE_PIN_KEY = 'resp:pin:{profile_id}'
+
+# 응답이 의존하는 데이터 종류 ('auth'는 AuthUser, 나머지는 프로필 ID 기준)
+RESPONSE_KINDS = ('auth', 'profile', 'ideal_type', 'location')
+
+
+def _version_keys(request, profile_id, kinds):
+    return [
+        AUTH_VERSION_KEY.format(user_id=request.user.id) if kind == 'auth'
+        else RESPONSE_VERSION_KEY.format(profile_id=profile_id, kind=kind)
+        for kind in kinds
+    ]
+
+
+def _current_versions(keys):
+    """버전 목록 (없는 버전은 현재 시각으로 생성 → 이전 버전과 겹치지 않음)"""
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        now = time.time_ns()
+        for key in missing:
+            cache.add(key, now, timeout=None)
+        versions.update(cache.get_many(missing))
+    return [versions.get(key) for key in keys]
+
+
+def _etag(data):
+    body = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return '"{}"'.format(hashlib.sha256(body.encode()).hexdigest()[:32])
+
+
+def _etag_matches(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    # If-None-Match는 weak 비교 (W/ 접두사 무시)
+    return any(tag == '*' or tag.removeprefix('W/') == etag for tag in parse_etags(header))
+
+
+def cache_user_response(*kinds):
+    """
+    GET 응답을 사용자와 데이터 버전 기준으로 캐시하는 데코레이터 (@api_view 안쪽에 사용)
+
+    Args:
+        kinds: 응답이 의존하는 데이터 종류 (RESPONSE_KINDS)
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            # 인증 사용자 스냅샷의 프로필 ID로 키를 만듦 (프로필이 없으면 캐시하지 않음)
+            profile_state = getattr(request.user, 'profile_state', None)
+            if request.method != 'GET' or not request.user.is_authenticated or not profile_state:
+                return view(request, *args, **kwargs)
+
+            profile_id = profile_state['id']
+            try:
+                versions = _current_versions(_version_keys(request, profile_id, kinds))
+                response_key = RESPONSE_KEY.format(
+                    view=view.__name__,
+                    profile_id=profile_id,
+                    versions='.'.join(str(version) for version in versions),
+                )
+                entry = cache.get(response_key)
+                # 버전을 읽은 뒤 확인 (무효화는 고정 → 버전 변경 순서이므로 새 버전이면 고정도 보임)
+                pinned = entry is None and replica_aliases() and cache.get(
+                    RESPONSE_PIN_KEY.format(profile_id=profile_id)
+                )
+            except Exception as e:
+                print(f'⚠️ 응답 캐시 조회 실패 ({view.__name__}): {str(e)}')
+                return view(request, *args, **kwargs)
+
+            response = None
+            if entry is None:
+                if pinned:
+                    pin_primary(request.user.id)
+                response = view(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                entry = {'etag': _etag(response.data), 'data': response.data}
+                try:
+                    cache.set(response_key, entry, timeout=settings.RESPONSE_CACHE_TIMEOUT)
+                except Exception as e:
+                    print(f'⚠️ 응답 캐시 저장 실패 ({view.__name__}): {str(e)}')
+
+            if _etag_matches(request, entry['etag']):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            elif response is None:
+                response = Response(entry['data'], status=status.HTTP_200_OK)
+            response['ETag'] = entry['etag']
+            # 클라이언트는 저장해 두고 매번 ETag로 확인
+            response['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
+
+
+def invalidate_user_responses(kind, profile_ids):
+    """
+    프로필의 캐시된 응답 무효화 (트랜잭션 안이면 commit 후)
+
+    복제본을 사용하면 버전을 바꾸기 전에 프로필을 primary_pin_seconds() 동안 고정합니다.
+
+    Args:
+        kind: 바뀐 데이터 종류 ('profile', 'ideal_type', 'location')
+        profile_ids: 프로필(User) ID 목록
+    """
+    keys = [RESPONSE_VERSION_KEY.format(profile_id=profile_id, kind=kind) for profile_id in profile_ids]
+    if not keys:
+        return
+
+    pin_keys = [RESPONSE_PIN_KEY.format(profile_id=profile_id) for profile_id in profile_ids]
+
+    def invalidate():
+        try:
+            # 새 버전으로 조회하는 요청이 복제본의 이전 값을 캐시하지 않도록 버전보다 먼저 고정
+            if replica_aliases():
+                cache.set_many(dict.fromkeys(pin_keys, 1), timeout=primary_pin_seconds())
+            cache.set_many(dict.fromkeys(keys, time.time_ns()), timeout=None)
+        except Exception as e:
+            print(f'⚠️ 응답 캐시 무효화 실패 ({kind}): {str(e)}')
+
+    transaction.on_commit(invalidate)
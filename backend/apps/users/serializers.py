@@ -1,3 +1,7 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import serializers
 from .models import UserLocation, User, IdealTypeProfile, AuthUser
 
@@ -39,6 +43,10 @@ class RegisterSerializer(serializers.ModelSerializer):
 
 class UserLocationSerializer(serializers.ModelSerializer):
     """사용자 위치 정보 Serializer"""
+    # 모델은 마이크로도 정수로 저장하고 latitude/longitude 속성으로 Decimal을 제공 (API 입출력 형식은 소수점 6자리 그대로)
+    latitude = serializers.DecimalField(max_digits=9, decimal_places=6)
+    longitude = serializers.DecimalField(max_digits=9, decimal_places=6)
+    
     class Meta:
         model = UserLocation
         fields = ['latitude', 'longitude']
@@ -56,6 +64,45 @@ class UserLocationSerializer(serializers.ModelSerializer):
         return value
 
 
+class FixTimestampField(serializers.Field):
+    """위치 측정 시각: epoch 밀리초(숫자) 또는 ISO 8601 문자열"""
+    default_error_messages = {
+        'invalid': '측정 시각은 epoch 밀리초 또는 ISO 8601 형식이어야 합니다.',
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('invalid')
+        if isinstance(data, (int, float)):
+            try:
+                return datetime.fromtimestamp(data / 1000, tz=dt_timezone.utc)
+            except (OverflowError, OSError, ValueError):
+                self.fail('invalid')
+        if isinstance(data, str):
+            value = parse_datetime(data)
+            if value is not None:
+                return value if timezone.is_aware(value) else timezone.make_aware(value)
+        self.fail('invalid')
+
+    def to_representation(self, value):
+        return value.isoformat()
+
+
+class LocationFixSerializer(serializers.Serializer):
+    """배치 업로드용 위치 1건 (측정 시각 포함)"""
+    latitude = serializers.FloatField(min_value=-90, max_value=90)
+    longitude = serializers.FloatField(min_value=-180, max_value=180)
+    timestamp = FixTimestampField()
+
+
+class LocationBatchSerializer(serializers.Serializer):
+    """
+    배치 위치 업로드 Serializer
+    - 오프라인/백그라운드에서 모아둔 위치를 한 번에 업로드
+    """
+    fixes = LocationFixSerializer(many=True, allow_empty=False, max_length=500)
+
+
 class UserSerializer(serializers.ModelSerializer):
     """사용자 프로필 Serializer"""
     class Meta:
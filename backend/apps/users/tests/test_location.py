@@ -0,0 +1,135 @@
+"""
+위치 업데이트 dead-band / write-behind 버퍼 테스트 (PostgreSQL/Redis 필요)
+"""
+from datetime import datetime
+from unittest import mock
+
+import redis
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.users import location_buffer
+from apps.users.location_buffer import BUFFER_KEY, DIRTY_KEY, FLUSHING_KEY, REPORTED_KEY, flush_buffered_locations
+from apps.users.models import AuthUser, ColdUserLocation, User, UserLocation
+from apps.matching.redis_client import get_redis
+
+
+LATITUDE, LONGITUDE = '37.566500', '126.978000'
+# 약 1m 북쪽 (dead-band 2m 안)
+NEARBY_LATITUDE = '37.566509'
+
+
+@override_settings(LOCATION_WRITE_MODE='direct', LOCATION_DEADBAND_METERS=2, LOCATION_DEADBAND_MAX_AGE_SECONDS=60)
+class LocationDeadbandTests(TestCase):
+
+    def setUp(self):
+        auth_user = AuthUser.objects.create_user('tester', email='tester@example.com', email_verified=True)
+        self.profile = User.objects.create(
+            user=auth_user, gender='F', age=25, height=165, mbti='INFP', personality=['calm'], interests=['music'],
+        )
+        # 이상형 프로필 없이 매칭 동의 ON (User.save는 프로필이 미완성이면 동의를 OFF로 되돌림)
+        User.objects.filter(id=self.profile.id).update(matching_consent=True, service_active=True)
+        self.client = APIClient()
+        self.client.force_authenticate(auth_user)
+        reported_key = REPORTED_KEY.format(user_id=self.profile.id)
+        get_redis().delete(reported_key)
+        self.addCleanup(get_redis().delete, reported_key)
+
+    def _update(self, latitude, longitude):
+        response = self.client.post('/api/users/location/update/', {'latitude': latitude, 'longitude': longitude})
+        self.assertEqual(response.status_code, 200, msg=response.data)
+        return response.data
+
+    def test_skipped_update_looks_like_written_update(self):
+        written = self._update(LATITUDE, LONGITUDE)
+        stored = UserLocation.objects.get(user=self.profile)
+
+        started_at = timezone.now()
+        skipped = self._update(NEARBY_LATITUDE, LONGITUDE)
+
+        # DB에는 쓰지 않음
+        self.assertEqual(UserLocation.objects.get(user=self.profile).updated_at, stored.updated_at)
+        # 같은 형태, 요청한 위치, 현재 시각
+        self.assertEqual(set(skipped), set(written))
+        self.assertEqual(set(skipped['data']), set(written['data']))
+        self.assertEqual((skipped['data']['latitude'], skipped['data']['longitude']), (NEARBY_LATITUDE, LONGITUDE))
+        self.assertGreaterEqual(datetime.fromisoformat(skipped['updated_at']), started_at)
+
+        # 위치 조회 API도 같은 위치/시각
+        response = self.client.get('/api/users/location/')
+        self.assertEqual(response.status_code, 200, msg=response.data)
+        self.assertEqual(response.data['data'], skipped['data'])
+        self.assertEqual(response.data['updated_at'], skipped['updated_at'])
+
+    def test_written_update_replaces_reported_location(self):
+        self._update(LATITUDE, LONGITUDE)
+        self._update(NEARBY_LATITUDE, LONGITUDE)
+        # dead-band 밖으로 이동하면 저장된 위치를 조회
+        written = self._update('37.567500', LONGITUDE)
+
+        response = self.client.get('/api/users/location/')
+        self.assertEqual(response.data['data'], written['data'])
+        self.assertEqual(response.data['updated_at'], written['updated_at'])
+
+
+@override_settings(LOCATION_WRITE_MODE='write_behind', LOCATION_DEADBAND_METERS=0)
+class LocationWriteBehindTests(TestCase):
+
+    def setUp(self):
+        auth_user = AuthUser.objects.create_user('tester', email='tester@example.com', email_verified=True)
+        self.profile = User.objects.create(
+            user=auth_user, gender='F', age=25, height=165, mbti='INFP', personality=['calm'], interests=['music'],
+        )
+        User.objects.filter(id=self.profile.id).update(matching_consent=True, service_active=True)
+        self.client = APIClient()
+        self.client.force_authenticate(auth_user)
+        get_redis().delete(BUFFER_KEY, DIRTY_KEY, FLUSHING_KEY)
+        self.addCleanup(get_redis().delete, BUFFER_KEY, DIRTY_KEY, FLUSHING_KEY)
+
+    def _update(self, latitude, longitude):
+        response = self.client.post('/api/users/location/update/', {'latitude': latitude, 'longitude': longitude})
+        self.assertEqual(response.status_code, 200, msg=response.data)
+        return response.data
+
+    def test_flush_removes_flushed_entries_from_buffer(self):
+        self._update(LATITUDE, LONGITUDE)
+        self.assertTrue(get_redis().hexists(BUFFER_KEY, self.profile.id))
+
+        self.assertEqual(flush_buffered_locations(), 1)
+        self.assertFalse(get_redis().hexists(BUFFER_KEY, self.profile.id))
+        self.assertEqual(UserLocation.objects.get(user=self.profile).latitude_e6, 37566500)
+
+    def test_redis_outage_falls_back_to_database(self):
+        self._update(LATITUDE, LONGITUDE)
+        flush_buffered_locations()
+
+        broken = mock.Mock()
+        broken.hget.side_effect = redis.ConnectionError('down')
+        broken.eval.side_effect = redis.ConnectionError('down')
+        with mock.patch.object(location_buffer, 'get_redis', return_value=broken):
+            written = self._update('37.567500', LONGITUDE)
+        self.assertEqual(written['data']['latitude'], '37.567500')
+        self.assertEqual(UserLocation.objects.get(user=self.profile).latitude_e6, 37567500)
+
+
+class ColdLocationReadTests(TestCase):
+
+    def test_archived_location_is_returned(self):
+        auth_user = AuthUser.objects.create_user('tester', email='tester@example.com', email_verified=True)
+        profile = User.objects.create(
+            user=auth_user, gender='F', age=25, height=165, mbti='INFP', personality=['calm'], interests=['music'],
+        )
+        now = timezone.now()
+        ColdUserLocation.objects.create(
+            user=profile, latitude_e6=37566500, longitude_e6=126978000, updated_at=now, archived_at=now,
+        )
+        client = APIClient()
+        client.force_authenticate(auth_user)
+
+        response = client.get('/api/users/location/')
+        self.assertEqual(response.status_code, 200, msg=response.data)
+        self.assertEqual((response.data['data']['latitude'], response.data['data']['longitude']), (LATITUDE, LONGITUDE))
+        # 조회만 하고 hot 테이블로 되돌리지 않음
+        self.assertFalse(UserLocation.objects.filter(user=profile).exists())
@@ -0,0 +1,62 @@
+"""
+지역 파티셔닝된 user_locations 쓰기 테스트 (사용자별 잠금, PostgreSQL/Redis 필요)
+"""
+import threading
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from apps.users.location_storage import partition_location_table, unpartition_location_table
+from apps.users.models import AuthUser, User, UserLocation, location_region
+from apps.users.utils import upsert_user_locations
+
+
+SEOUL = (37566500, 126978000)
+BUSAN = (35179600, 129075600)
+
+
+class PartitionedLocationWriteTests(TransactionTestCase):
+
+    def setUp(self):
+        auth_user = AuthUser.objects.create_user('tester', email='tester@example.com', email_verified=True)
+        self.profile = User.objects.create(
+            user=auth_user, gender='F', age=25, height=165, mbti='INFP', personality=['calm'], interests=['music'],
+        )
+        partition_location_table(4)
+        self.addCleanup(unpartition_location_table)
+
+    def _upsert_in_thread(self, fixes):
+        def upsert():
+            try:
+                upsert_user_locations(fixes, publish=False)
+            finally:
+                connection.close()
+        thread = threading.Thread(target=upsert)
+        thread.start()
+        return thread
+
+    def test_concurrent_writes_to_different_regions_keep_one_row(self):
+        self.assertNotEqual(location_region(*SEOUL), location_region(*BUSAN))
+        now = timezone.now()
+
+        with transaction.atomic():
+            upsert_user_locations([(self.profile.id, *SEOUL, now)], publish=False)
+            # 다른 지역으로의 쓰기는 앞선 트랜잭션이 끝날 때까지 대기
+            thread = self._upsert_in_thread([(self.profile.id, *BUSAN, now + timedelta(seconds=1))])
+            thread.join(timeout=0.5)
+            self.assertTrue(thread.is_alive())
+        thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+
+        rows = list(UserLocation.objects.filter(user=self.profile).values_list('region', 'latitude_e6', 'longitude_e6'))
+        self.assertEqual(rows, [(location_region(*BUSAN), *BUSAN)])
+
+    def test_older_write_to_other_region_is_ignored(self):
+        now = timezone.now()
+        upsert_user_locations([(self.profile.id, *SEOUL, now)], publish=False)
+        upsert_user_locations([(self.profile.id, *BUSAN, now - timedelta(seconds=1))], publish=False)
+
+        rows = list(UserLocation.objects.filter(user=self.profile).values_list('region', 'latitude_e6', 'longitude_e6'))
+        self.assertEqual(rows, [(location_region(*SEOUL), *SEOUL)])
@@ -0,0 +1,48 @@
+"""
+User.save 전체 저장 테스트 (ideal_type_complete 보호, INSERT 대체 저장, PostgreSQL/Redis 필요)
+"""
+from django.test import TestCase
+
+from apps.users.models import AuthUser, IdealTypeProfile, User
+
+
+class UserFullSaveTests(TestCase):
+
+    def setUp(self):
+        auth_user = AuthUser.objects.create_user('tester', email='tester@example.com', email_verified=True)
+        self.profile = User.objects.create(
+            user=auth_user, gender='F', age=25, height=165, mbti='INFP', personality=['calm'], interests=['music'],
+        )
+
+    def _create_ideal_type(self):
+        IdealTypeProfile.objects.create(
+            user=User.objects.get(id=self.profile.id),
+            height_min=170, height_max=190, age_min=20, age_max=35, preferred_gender='M',
+            preferred_mbti=['INTJ'], preferred_personality=['calm'], preferred_interests=['music'],
+        )
+
+    def test_stale_full_save_keeps_ideal_type_complete(self):
+        stale = User.objects.get(id=self.profile.id)
+        self._create_ideal_type()
+        self.assertTrue(User.objects.get(id=self.profile.id).ideal_type_complete)
+
+        stale.height = 170
+        stale.save()
+
+        saved = User.objects.get(id=self.profile.id)
+        self.assertEqual(saved.height, 170)
+        self.assertTrue(saved.ideal_type_complete)
+        self.assertTrue(stale.ideal_type_complete)
+
+    def test_full_save_keeps_caller_set_ideal_type_complete(self):
+        profile = User.objects.get(id=self.profile.id)
+        profile.ideal_type_complete = True
+        profile.save()
+        self.assertTrue(User.objects.get(id=self.profile.id).ideal_type_complete)
+
+    def test_full_save_of_deleted_row_inserts_it_again(self):
+        profile = User.objects.get(id=self.profile.id)
+        User.objects.filter(id=self.profile.id).delete()
+
+        profile.save()
+        self.assertTrue(User.objects.filter(id=self.profile.id).exists())
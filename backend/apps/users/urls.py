@@ -19,6 +19,8 @@ urlpatterns = [
     # 위치 관련 API
     path('location/', views.get_location, name='get_location'),  # GET: 현재 위치 조회
     path('location/update/', views.update_location, name='update_location'),  # POST: 위치 업데이트
+    path('location/batch/', views.batch_update_location, name='batch_update_location'),  # POST: 배치 위치 업로드
+    path('location/stats/', views.location_write_stats, name='location_write_stats'),  # GET: 위치 저장/생략 통계 (관리자)
     
     # 프로필 관련 API
     path('profile/', views.profile_view, name='profile_view'),  # GET, POST, PUT 모두 처리
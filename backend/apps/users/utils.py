@@ -0,0 +1,269 @@
+"""
+사용자 관련 유틸리티 함수
+"""
+from datetime import timedelta
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.users.models import COORDINATE_SCALE, UserLocation, location_region, to_microdegrees
+from apps.users.location_buffer import (
+    buffer_user_location, get_current_location, is_write_behind_enabled, remember_reported_location,
+)
+from apps.users.location_storage import discard_cold_locations, is_location_table_partitioned, lock_user_locations
+from apps.users.presence import mark_user_seen
+from apps.users.response_cache import invalidate_user_responses
+from apps.matching.events import publish_user_moved
+from apps.matching.utils import calculate_distance_km
+from apps.matching.candidates import sync_matching_candidates
+from config.db_router import pin_primary
+
+
+# 위치 저장/생략 횟수 (dead-band 효과 확인용)
+LOCATION_WRITE_COUNTER_KEY = 'location:writes:{result}'
+
+# 같은 사용자는 더 최근에 측정된 위치일 때만 갱신 (순서가 뒤바뀐/오래된 위치는 무시)
+UPSERT_LOCATIONS_SQL = f'''
+    INSERT INTO {UserLocation._meta.db_table} (user_id, region, latitude_e6, longitude_e6, recorded_at, updated_at)
+    VALUES {{values}}
+    ON CONFLICT (user_id) DO UPDATE SET
+        region = EXCLUDED.region,
+        latitude_e6 = EXCLUDED.latitude_e6,
+        longitude_e6 = EXCLUDED.longitude_e6,
+        recorded_at = EXCLUDED.recorded_at,
+        updated_at = EXCLUDED.updated_at
+    WHERE {UserLocation._meta.db_table}.recorded_at IS NULL
+       OR {UserLocation._meta.db_table}.recorded_at < EXCLUDED.recorded_at
+    RETURNING id, user_id, region, latitude_e6, longitude_e6, recorded_at, updated_at, (xmax = 0) AS inserted
+'''
+
+# 지역(region)으로 파티셔닝된 user_locations용 (partition_locations)
+# 유일 제약이 (user_id, region)이므로, 다른 지역으로 이동한 사용자는 이전 지역의 행을 지우고 새 지역에 INSERT
+# (파티션 키를 바꾸는 UPDATE 대신 한 문장 안에서 DELETE + INSERT, 더 최근 위치가 있으면 둘 다 하지 않음)
+# 같은 사용자의 동시 쓰기가 서로 다른 지역에 INSERT하지 않도록 실행 전에 lock_user_locations로 사용자별 잠금
+UPSERT_PARTITIONED_LOCATIONS_SQL = f'''
+    WITH fixes AS (
+        SELECT v.*, EXISTS (SELECT 1 FROM {UserLocation._meta.db_table} l WHERE l.user_id = v.user_id) AS existed
+        FROM (VALUES {{values}}) AS v (user_id, region, latitude_e6, longitude_e6, recorded_at, updated_at)
+    ), moved AS (
+        DELETE FROM {UserLocation._meta.db_table} l
+        USING fixes f
+        WHERE l.user_id = f.user_id
+          AND l.region <> f.region
+          AND (l.recorded_at IS NULL OR l.recorded_at < f.recorded_at)
+    )
+    INSERT INTO {UserLocation._meta.db_table} (user_id, region, latitude_e6, longitude_e6, recorded_at, updated_at)
+    SELECT f.user_id, f.region, f.latitude_e6, f.longitude_e6, f.recorded_at, f.updated_at
+    FROM fixes f
+    WHERE NOT EXISTS (
+        SELECT 1 FROM {UserLocation._meta.db_table} l
+        WHERE l.user_id = f.user_id AND l.region <> f.region AND l.recorded_at >= f.recorded_at
+    )
+    ON CONFLICT (user_id, region) DO UPDATE SET
+        latitude_e6 = EXCLUDED.latitude_e6,
+        longitude_e6 = EXCLUDED.longitude_e6,
+        recorded_at = EXCLUDED.recorded_at,
+        updated_at = EXCLUDED.updated_at
+    WHERE {UserLocation._meta.db_table}.recorded_at IS NULL
+       OR {UserLocation._meta.db_table}.recorded_at < EXCLUDED.recorded_at
+    RETURNING id, user_id, region, latitude_e6, longitude_e6, recorded_at, updated_at,
+        NOT (SELECT f.existed FROM fixes f WHERE f.user_id = {UserLocation._meta.db_table}.user_id) AS inserted
+'''
+
+
+def upsert_user_locations(fixes, publish=True):
+    """
+    여러 사용자의 위치를 한 번에 저장 (INSERT ... ON CONFLICT DO UPDATE 1회)
+
+    사용자마다 가장 최근에 측정된 위치만 남기고, 저장된 위치보다 오래된 위치는 갱신하지 않습니다.
+    실제로 저장된 사용자에 대해서만 "user moved" 이벤트를 발행합니다.
+    배치 위치 업로드 API와 내부 생산자(일괄 적재, write-behind flush 등)가 함께 사용합니다.
+
+    Args:
+        fixes: [(user_id, latitude_e6, longitude_e6, recorded_at), ...] (좌표는 마이크로도 정수)
+        publish: False면 "user moved" 이벤트를 발행하지 않음 (버퍼 기록 시 이미 발행한 flush 등)
+
+    Returns:
+        dict: {user_id: (UserLocation, created)} 저장된 위치 (오래된 위치라 무시된 사용자는 제외)
+    """
+    latest_fixes = {}
+    for user_id, latitude_e6, longitude_e6, recorded_at in fixes:
+        current = latest_fixes.get(user_id)
+        if current is None or current[2] < recorded_at:
+            latest_fixes[user_id] = (latitude_e6, longitude_e6, recorded_at)
+    if not latest_fixes:
+        return {}
+
+    now = timezone.now()
+    params = []
+    for user_id, (latitude_e6, longitude_e6, recorded_at) in latest_fixes.items():
+        params.extend([
+            user_id,
+            location_region(latitude_e6, longitude_e6),
+            latitude_e6,
+            longitude_e6,
+            recorded_at,
+            now,
+        ])
+
+    partitioned = is_location_table_partitioned()
+    if partitioned:
+        # VALUES가 INSERT 대상이 아니라 CTE 안에 있으므로 타입을 명시
+        row = '(%s::bigint, %s::integer, %s::integer, %s::integer, %s::timestamptz, %s::timestamptz)'
+        sql = UPSERT_PARTITIONED_LOCATIONS_SQL
+    else:
+        row = '(%s, %s, %s, %s, %s, %s)'
+        sql = UPSERT_LOCATIONS_SQL
+    values = ', '.join([row] * len(latest_fixes))
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            if partitioned:
+                lock_user_locations(cursor, latest_fixes)
+            cursor.execute(sql.format(values=values), params)
+            rows = cursor.fetchall()
+        # 매칭 후보 읽기 모델도 같은 트랜잭션에서 갱신
+        sync_matching_candidates(row[1] for row in rows)
+        # 위치 조회 응답 캐시는 commit 후 무효화
+        invalidate_user_responses('location', [row[1] for row in rows])
+
+    saved = {}
+    for location_id, user_id, region, latitude_e6, longitude_e6, recorded_at, updated_at, inserted in rows:
+        location = UserLocation(
+            id=location_id,
+            user_id=user_id,
+            region=region,
+            latitude_e6=latitude_e6,
+            longitude_e6=longitude_e6,
+            recorded_at=recorded_at,
+            updated_at=updated_at,
+        )
+        saved[user_id] = (location, inserted)
+        # 매칭 워커에 "user moved" 이벤트 발행 (precomputed 모드에서만)
+        if publish:
+            publish_user_moved(user_id, *location.degrees)
+
+    # 새로 INSERT된 사용자는 보관(cold)된 위치가 있을 수 있음 → hot으로 복귀했으므로 삭제
+    discard_cold_locations(user_id for user_id, (_location, inserted) in saved.items() if inserted)
+    return saved
+
+
+def _count_location_write(result):
+    """위치 저장(written)/생략(skipped) 횟수 증가"""
+    key = LOCATION_WRITE_COUNTER_KEY.format(result=result)
+    try:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+    except Exception as e:
+        print(f'⚠️ 위치 저장 카운터 갱신 실패: {str(e)}')
+
+
+def get_location_write_stats():
+    """
+    위치 저장/생략 횟수
+
+    Returns:
+        dict: {'written', 'skipped'}
+    """
+    return {
+        result: cache.get(LOCATION_WRITE_COUNTER_KEY.format(result=result), 0)
+        for result in ('written', 'skipped')
+    }
+
+
+def _within_deadband(location, latitude_e6, longitude_e6, now):
+    """마지막 저장 위치에서 dead-band 안쪽으로만 움직였고, 최근에 저장한 위치인지 여부"""
+    if location is None:
+        return False
+    if now - location.updated_at > timedelta(seconds=settings.LOCATION_DEADBAND_MAX_AGE_SECONDS):
+        return False
+    moved_m = calculate_distance_km(
+        *location.degrees,
+        latitude_e6 / COORDINATE_SCALE, longitude_e6 / COORDINATE_SCALE,
+    ) * 1000
+    return moved_m < settings.LOCATION_DEADBAND_METERS
+
+
+def _buffer_user_location(user_profile, current_location, latitude_e6, longitude_e6, recorded_at, now):
+    """save_user_location의 write-behind 버전 (Redis 버퍼에 기록 + "user moved" 이벤트 발행)"""
+    location = UserLocation(
+        id=current_location.id if current_location else None,
+        user_id=user_profile.id,
+        latitude_e6=latitude_e6,
+        longitude_e6=longitude_e6,
+        recorded_at=recorded_at,
+        updated_at=now,
+    )
+    if not buffer_user_location(user_profile.id, latitude_e6, longitude_e6, recorded_at, now):
+        # 버퍼의 위치가 더 최근이면 아무것도 갱신하지 않음
+        return current_location, False
+
+    _count_location_write('written')
+    invalidate_user_responses('location', [user_profile.id])
+    publish_user_moved(user_profile.id, *location.degrees)
+    return location, current_location is None
+
+
+def save_user_location(user_profile, latitude, longitude, recorded_at=None):
+    """
+    사용자 위치 저장 (upsert) + 매칭 워커에 "user moved" 이벤트 발행
+
+    위치 업데이트 API와 WebSocket 위치 스트림이 같은 경로로 저장하도록 모아둔 함수입니다.
+
+    마지막 저장 위치에서 LOCATION_DEADBAND_METERS 미만으로 움직였고
+    LOCATION_DEADBAND_MAX_AGE_SECONDS 안에 저장한 적이 있으면 DB 쓰기와 이벤트를 생략합니다.
+    이 경우 매칭은 저장된 위치 기준이므로 최대 LOCATION_DEADBAND_METERS의 거리 오차가
+    최대 LOCATION_DEADBAND_MAX_AGE_SECONDS 동안 생길 수 있습니다. (반경 경계 근처의 후보가 늦게 포함/제외될 수 있음)
+    생략한 경우에도 저장한 경우와 같게 요청한 위치와 현재 시각(updated_at/recorded_at)을 반환하고,
+    위치 조회 API도 LOCATION_DEADBAND_MAX_AGE_SECONDS 동안 같은 위치/시각을 보여줍니다. (remember_reported_location)
+
+    LOCATION_WRITE_MODE=write_behind 이면 DB 대신 Redis 버퍼에 기록하고 flush 프로세스가 DB에 반영합니다.
+    (Redis를 사용할 수 없으면 DB에 바로 저장)
+    쓰기를 생략하거나 오래된 위치라 무시한 경우에도 접속 상태(presence)는 갱신합니다.
+
+    Args:
+        latitude, longitude: 요청으로 받은 위도/경도 (도, 여기서 한 번만 마이크로도 정수로 변환)
+
+    Returns:
+        tuple: (UserLocation, created) - 저장된 위치보다 오래된 위치면 (기존 UserLocation, False)
+    """
+    latitude_e6, longitude_e6 = to_microdegrees(latitude), to_microdegrees(longitude)
+    now = timezone.now()
+    mark_user_seen(user_profile.id)
+    # WebSocket 위치 스트림도 다음 조회가 방금 저장한 위치를 읽도록 primary에 고정 (HTTP 쓰기 요청은 미들웨어가 처리)
+    pin_primary(user_profile.user_id)
+    try:
+        current_location = get_current_location(user_profile)
+    except UserLocation.DoesNotExist:
+        current_location = None
+
+    if _within_deadband(current_location, latitude_e6, longitude_e6, now):
+        _count_location_write('skipped')
+        location = UserLocation(
+            id=current_location.id,
+            user_id=user_profile.id,
+            latitude_e6=latitude_e6,
+            longitude_e6=longitude_e6,
+            recorded_at=recorded_at or now,
+            updated_at=now,
+        )
+        remember_reported_location(location)
+        invalidate_user_responses('location', [user_profile.id])
+        return location, False
+
+    if is_write_behind_enabled():
+        try:
+            return _buffer_user_location(user_profile, current_location, latitude_e6, longitude_e6, recorded_at or now, now)
+        except redis.RedisError as e:
+            print(f'⚠️ 위치 버퍼 기록 실패, DB에 바로 저장 (user_id: {user_profile.id}): {str(e)}')
+
+    saved = upsert_user_locations([(user_profile.id, latitude_e6, longitude_e6, recorded_at or now)])
+    if user_profile.id not in saved:
+        return UserLocation.objects.get(user=user_profile), False
+    _count_location_write('written')
+    # WebSocket처럼 같은 프로필 객체를 계속 쓰는 경우 다음 dead-band 비교가 방금 저장한 위치 기준이 되도록 갱신
+    user_profile.location = saved[user_profile.id][0]
+    return saved[user_profile.id]
@@ -1,5 +1,5 @@
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
 from django.utils import timezone
@@ -16,50 +16,39 @@ from decouple import config
 import boto3
 from botocore.exceptions import ClientError
 import socket
-from .models import UserLocation, User, AuthUser
+from config.db_router import use_replica
+from .models import UserLocation, User, AuthUser, to_microdegrees
+from .location_buffer import get_current_location, get_reported_location
+from .location_storage import get_cold_location, restore_cold_location
+from .utils import save_user_location, upsert_user_locations, get_location_write_stats
+from .presence import mark_user_seen
+from .profile_loader import load_request_profile, remember_request_profile
+from .response_cache import cache_user_response
 from .serializers import (
     UserLocationSerializer, UserSerializer, RegisterSerializer, LoginSerializer, 
     EmailVerificationSerializer, IdealTypeProfileSerializer, MatchingConsentSerializer,
-    PasswordResetRequestSerializer, PasswordResetVerifySerializer, PasswordResetSerializer
+    PasswordResetRequestSerializer, PasswordResetVerifySerializer, PasswordResetSerializer,
+    LocationBatchSerializer,
 )
 
 
 def check_profile_and_ideal_type_complete(user_profile):
     """
     프로필과 이상형 프로필이 모두 완성되었는지 확인하는 헬퍼 함수
+    (저장 시 갱신되는 User.profile_complete / ideal_type_complete 사용, 추가 쿼리 없음)
     
     Returns:
         tuple: (profile_complete, ideal_type_complete, all_complete)
     """
-    from .models import IdealTypeProfile
-    
-    # 프로필 완성도 체크
-    profile_fields = ['age', 'gender', 'height', 'mbti', 'personality', 'interests']
-    profile_complete = all(getattr(user_profile, field, None) for field in profile_fields)
-    profile_complete = profile_complete and len(user_profile.personality) > 0 and len(user_profile.interests) > 0
-    
-    # 이상형 프로필 완성도 체크
-    ideal_type_complete = False
-    try:
-        ideal_type = user_profile.ideal_type_profile
-        if ideal_type:
-            # 필수 필드 확인 (MBTI는 선택사항)
-            ideal_fields = ['height_min', 'height_max', 'age_min', 'age_max', 
-                          'preferred_personality', 'preferred_interests']
-            ideal_type_complete = all(getattr(ideal_type, field, None) for field in ideal_fields)
-            # 성격과 관심사는 최소 1개 이상 필수
-            ideal_type_complete = ideal_type_complete and \
-                len(ideal_type.preferred_personality) > 0 and \
-                len(ideal_type.preferred_interests) > 0
-    except Exception:
-        ideal_type_complete = False
-    
+    profile_complete = user_profile.profile_complete
+    ideal_type_complete = user_profile.ideal_type_complete
     all_complete = profile_complete and ideal_type_complete
     
     return profile_complete, ideal_type_complete, all_complete
 
 
 def _get_user_profile_by_user_id(
+    request,
     user_id,
     *,
     auth_user_missing_response,
@@ -70,18 +59,20 @@ def _get_user_profile_by_user_id(
     """
     user_id(AuthUser.id)로 User 프로필 로딩.
     - 호출부의 응답 포맷/상태코드를 유지하기 위해 (profile, error_response, auth_user) 형태로 반환합니다.
+    - 프로필이 있으면 AuthUser/이상형/위치까지 쿼리 1회로 로딩합니다. (load_request_profile)
     """
-    try:
-        auth_user = AuthUser.objects.get(id=user_id)
-    except AuthUser.DoesNotExist:
+    profile = load_request_profile(request, user_id)
+    if profile is not None:
+        return profile, None, profile.user
+
+    # 프로필이 없을 때만 사용자 존재 여부를 확인해 응답을 구분
+    auth_user = AuthUser.objects.filter(id=user_id).first()
+    if auth_user is None:
         payload = auth_user_missing_response(user_id) if callable(auth_user_missing_response) else auth_user_missing_response
         return None, Response(payload, status=auth_user_missing_status), None
 
-    try:
-        return auth_user.profile, None, auth_user
-    except User.DoesNotExist:
-        payload = profile_missing_response(user_id) if callable(profile_missing_response) else profile_missing_response
-        return None, Response(payload, status=profile_missing_status), auth_user
+    payload = profile_missing_response(user_id) if callable(profile_missing_response) else profile_missing_response
+    return None, Response(payload, status=profile_missing_status), auth_user
 
 
 def _get_user_profile_from_request(
@@ -115,6 +106,7 @@ def _get_user_profile_from_request(
             return None, Response(missing_user_id_response, status=missing_user_id_status), None
 
         profile, error_response, _auth_user = _get_user_profile_by_user_id(
+            request,
             user_id,
             auth_user_missing_response=auth_user_missing_response or profile_missing_response,
             profile_missing_response=profile_missing_response,
@@ -124,10 +116,10 @@ def _get_user_profile_from_request(
         return profile, error_response, user_id
 
     # 정상 모드: 인증된 사용자
-    try:
-        return request.user.profile, None, None
-    except User.DoesNotExist:
+    user_profile = load_request_profile(request)
+    if user_profile is None:
         return None, Response(authed_profile_missing_response, status=authed_profile_missing_status), None
+    return user_profile, None, None
 
 
 def _deny_if_email_not_verified(user_profile, *, error_message: str):
@@ -695,6 +687,7 @@ def update_location(request):
                 
                 try:
                     user_profile, error_response, _auth_user = _get_user_profile_by_user_id(
+                        request,
                         user_id,
                         auth_user_missing_response=lambda uid: {
                             'success': False,
@@ -718,9 +711,8 @@ def update_location(request):
                     }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
             else:
                 # 정상 모드: 인증된 사용자 사용
-                try:
-                    user_profile = request.user.profile
-                except User.DoesNotExist:
+                user_profile = load_request_profile(request)
+                if user_profile is None:
                     return Response({
                         'success': False,
                         'error': '프로필이 없습니다. 먼저 프로필을 생성해주세요.'
@@ -754,6 +746,8 @@ def update_location(request):
                 # 기존 위치 정보 반환 (업데이트하지 않음)
                 try:
                     existing_location = user_profile.location
+                    # 위치는 고정이지만 위치를 보내는 동안은 접속 중으로 표시 (heartbeat와 동일)
+                    mark_user_seen(user_profile.id)
                     return Response({
                         'success': True,
                         'message': 'useruser의 위치는 고정되어 있습니다. (업데이트되지 않음)',
@@ -766,14 +760,11 @@ def update_location(request):
                         'error': 'useruser의 위치 정보가 없습니다.'
                     }, status=status.HTTP_404_NOT_FOUND)
             
-            # upsert (있으면 업데이트, 없으면 생성)
-            location, created = UserLocation.objects.update_or_create(
-                user=user_profile,
-                defaults={
-                    'latitude': serializer.validated_data['latitude'],
-                    'longitude': serializer.validated_data['longitude'],
-                    'updated_at': timezone.now(),
-                }
+            # upsert (있으면 업데이트, 없으면 생성) + "user moved" 이벤트 발행
+            location, created = save_user_location(
+                user_profile,
+                serializer.validated_data['latitude'],
+                serializer.validated_data['longitude'],
             )
             
             result = {
@@ -813,8 +804,119 @@ def update_location(request):
     }, status=status.HTTP_400_BAD_REQUEST)
 
 
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated if not settings.DEBUG else AllowAny])  # 개발 환경에서는 인증 우회
+def batch_update_location(request):
+    """
+    배치 위치 업로드 API
+    POST /api/users/location/batch/
+    
+    Request Body:
+        {"fixes": [{"latitude": 37.5665, "longitude": 126.9780, "timestamp": 1735000000000}, ...]}
+        timestamp: 측정 시각 (epoch 밀리초 또는 ISO 8601)
+    
+    오프라인/백그라운드에서 모아둔 위치 중 가장 최근 위치만 저장합니다.
+    이미 저장된 위치보다 오래된 위치는 무시합니다. (INSERT ... ON CONFLICT DO UPDATE 1회)
+    개발 환경(DEBUG=True)에서는 user_id를 request body에 포함하여 인증 없이 테스트 가능
+    """
+    serializer = LocationBatchSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'error': '입력 데이터가 유효하지 않습니다.',
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    user_profile, error_response, _debug_user_id = _get_user_profile_from_request(
+        request,
+        user_id_sources=('data',),
+        missing_user_id_response={'success': False, 'error': '테스트 모드: user_id가 필요합니다.'},
+        profile_missing_response=lambda uid: {
+            'success': False,
+            'error': f'user_id {uid}에 해당하는 프로필이 없습니다. 먼저 프로필을 생성해주세요.',
+        },
+        authed_profile_missing_response={'success': False, 'error': '프로필이 없습니다. 먼저 프로필을 생성해주세요.'},
+    )
+    if error_response:
+        return error_response
+    
+    denied = _deny_if_email_not_verified(
+        user_profile,
+        error_message='이메일 인증이 완료되지 않았습니다. 위치 업데이트를 하려면 먼저 이메일 인증을 완료해주세요.',
+    )
+    if denied:
+        return denied
+    
+    denied = _deny_if_matching_consent_off(
+        user_profile,
+        error_message='매칭 동의가 OFF 상태입니다. 위치 업데이트를 하려면 매칭 동의를 ON으로 설정해주세요.',
+    )
+    if denied:
+        return denied
+    
+    # useruser는 위치 업데이트 제외
+    if user_profile.user.username == 'useruser':
+        return Response({
+            'success': False,
+            'error': 'useruser의 위치는 고정되어 있습니다. (업데이트되지 않음)'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # 기기 시계가 빠른 경우 미래 시각은 현재 시각으로 맞춤
+    now = timezone.now()
+    fixes = serializer.validated_data['fixes']
+    saved = upsert_user_locations([
+        (user_profile.id, to_microdegrees(fix['latitude']), to_microdegrees(fix['longitude']), min(fix['timestamp'], now))
+        for fix in fixes
+    ])
+    
+    if user_profile.id in saved:
+        location, _created = saved[user_profile.id]
+        message = '위치가 업데이트되었습니다.'
+    else:
+        # 저장된 위치가 더 최근이면 아무것도 갱신하지 않음
+        location = UserLocation.objects.get(user=user_profile)
+        message = '저장된 위치가 더 최근이므로 업데이트하지 않았습니다.'
+    
+    print(f'📍 배치 위치 업로드: {user_profile.user.username} ({len(fixes)}건 수신, 저장: {user_profile.id in saved})')
+    
+    return Response({
+        'success': True,
+        'message': message,
+        'received': len(fixes),
+        'accepted': user_profile.id in saved,
+        'data': UserLocationSerializer(location).data,
+        'recorded_at': location.recorded_at.isoformat() if location.recorded_at else None,
+        'updated_at': location.updated_at.isoformat(),
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def location_write_stats(request):
+    """
+    위치 저장/생략 통계 API (관리자 전용)
+    GET /api/users/location/stats/
+    
+    이동 거리가 dead-band(LOCATION_DEADBAND_METERS) 미만이라 DB 쓰기를 생략한 횟수와
+    실제로 저장한 횟수를 반환합니다.
+    """
+    stats = get_location_write_stats()
+    total = stats['written'] + stats['skipped']
+    
+    return Response({
+        'success': True,
+        'written': stats['written'],
+        'skipped': stats['skipped'],
+        'skip_ratio': stats['skipped'] / total if total else 0.0,
+        'deadband_m': settings.LOCATION_DEADBAND_METERS,
+        'max_age_seconds': settings.LOCATION_DEADBAND_MAX_AGE_SECONDS,
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated if not settings.DEBUG else AllowAny])  # 개발 환경에서는 인증 우회
+@cache_user_response('location')
 def get_location(request):
     """
     현재 위치 조회 API
@@ -833,36 +935,46 @@ def get_location(request):
     print("=" * 60)
     
     try:
-        user_profile, error_response, debug_user_id = _get_user_profile_from_request(
-            request,
-            user_id_sources=('query',),
-            missing_user_id_response={
-                'success': False,
-                'error': '테스트 모드: user_id가 필요합니다. (예: /api/users/location/?user_id=1)',
-            },
-            auth_user_missing_response=lambda uid: {
-                'success': False,
-                'error': f'user_id {uid}에 해당하는 프로필이 없습니다.',
-            },
-            profile_missing_response=lambda uid: {
-                'success': False,
-                'error': f'user_id {uid}에 해당하는 프로필이 없습니다.',
-            },
-            authed_profile_missing_response={
-                'success': False,
-                'error': '프로필이 없습니다. 먼저 프로필을 생성해주세요.',
-            },
-        )
-        if debug_user_id is not None:
-            print(f"🔧 디버그 모드: 인증 없음, user_id: {debug_user_id}")
-        if error_response:
-            return error_response
+        # 조회는 읽기 복제본에서 (최근에 위치를 저장한 사용자는 primary)
+        with use_replica(request.user):
+            user_profile, error_response, debug_user_id = _get_user_profile_from_request(
+                request,
+                user_id_sources=('query',),
+                missing_user_id_response={
+                    'success': False,
+                    'error': '테스트 모드: user_id가 필요합니다. (예: /api/users/location/?user_id=1)',
+                },
+                auth_user_missing_response=lambda uid: {
+                    'success': False,
+                    'error': f'user_id {uid}에 해당하는 프로필이 없습니다.',
+                },
+                profile_missing_response=lambda uid: {
+                    'success': False,
+                    'error': f'user_id {uid}에 해당하는 프로필이 없습니다.',
+                },
+                authed_profile_missing_response={
+                    'success': False,
+                    'error': '프로필이 없습니다. 먼저 프로필을 생성해주세요.',
+                },
+            )
+            if debug_user_id is not None:
+                print(f"🔧 디버그 모드: 인증 없음, user_id: {debug_user_id}")
+            if error_response:
+                return error_response
         
-        # 위치 정보 조회
-        try:
-            location = user_profile.location
-            serializer = UserLocationSerializer(location)
+            # 위치 정보 조회 (dead-band로 저장을 생략한 최근 위치 포함)
+            try:
+                location = get_reported_location(user_profile)
+            except UserLocation.DoesNotExist:
+                # archive_locations가 보관(cold)한 위치 (조회만 하고 되돌리지 않음, 다음 위치 업데이트 때 hot으로 복귀)
+                location = get_cold_location(user_profile)
+                if location is None:
+                    return Response({
+                        'success': False,
+                        'error': '위치 정보가 없습니다. 먼저 위치를 업데이트해주세요.'
+                    }, status=status.HTTP_404_NOT_FOUND)
             
+            serializer = UserLocationSerializer(location)
             result = {
                 'success': True,
                 'data': serializer.data,
@@ -878,11 +990,6 @@ def get_location(request):
             print("=" * 60)
             
             return Response(result, status=status.HTTP_200_OK)
-        except UserLocation.DoesNotExist:
-            return Response({
-                'success': False,
-                'error': '위치 정보가 없습니다. 먼저 위치를 업데이트해주세요.'
-            }, status=status.HTTP_404_NOT_FOUND)
     
     except Exception as e:
         return Response({
@@ -893,6 +1000,7 @@ def get_location(request):
 
 @api_view(['GET', 'POST', 'PUT'])
 @permission_classes([IsAuthenticated if not settings.DEBUG else AllowAny])
+@cache_user_response('auth', 'profile')
 def profile_view(request):
     """
     프로필 조회/생성/수정 API
@@ -906,38 +1014,40 @@ def profile_view(request):
     # GET 요청: 프로필 조회
     if request.method == 'GET':
         try:
-            user_profile, error_response, _debug_user_id = _get_user_profile_from_request(
-                request,
-                user_id_sources=('query', 'data'),
-                missing_user_id_response={
-                    'success': False,
-                    'error': '테스트 모드: user_id가 필요합니다. (예: ?user_id=1)',
-                },
-                auth_user_missing_response={
-                    'success': False,
-                    'message': '프로필이 없습니다.',
-                },
-                profile_missing_response={
-                    'success': False,
-                    'message': '프로필이 없습니다.',
-                },
-                authed_profile_missing_response={
-                    'success': False,
-                    'message': '프로필이 없습니다.',
-                },
-            )
-            if error_response:
-                return error_response
+            # 조회는 읽기 복제본에서 (최근에 프로필을 수정한 사용자는 primary)
+            with use_replica(request.user):
+                user_profile, error_response, _debug_user_id = _get_user_profile_from_request(
+                    request,
+                    user_id_sources=('query', 'data'),
+                    missing_user_id_response={
+                        'success': False,
+                        'error': '테스트 모드: user_id가 필요합니다. (예: ?user_id=1)',
+                    },
+                    auth_user_missing_response={
+                        'success': False,
+                        'message': '프로필이 없습니다.',
+                    },
+                    profile_missing_response={
+                        'success': False,
+                        'message': '프로필이 없습니다.',
+                    },
+                    authed_profile_missing_response={
+                        'success': False,
+                        'message': '프로필이 없습니다.',
+                    },
+                )
+                if error_response:
+                    return error_response
             
-            serializer = UserSerializer(user_profile)
-            # email_verified 정보 추가 (딕셔너리로 변환하여 수정 가능하게 만듦)
-            response_data = dict(serializer.data)  # OrderedDict를 일반 dict로 변환
-            response_data['email_verified'] = user_profile.user.email_verified
-            print(f'📧 프로필 조회 - email_verified: {response_data.get("email_verified")}, user: {user_profile.user.username}')
-            return Response({
-                'success': True,
-                'data': response_data
-            }, status=status.HTTP_200_OK)
+                serializer = UserSerializer(user_profile)
+                # email_verified 정보 추가 (딕셔너리로 변환하여 수정 가능하게 만듦)
+                response_data = dict(serializer.data)  # OrderedDict를 일반 dict로 변환
+                response_data['email_verified'] = user_profile.user.email_verified
+                print(f'📧 프로필 조회 - email_verified: {response_data.get("email_verified")}, user: {user_profile.user.username}')
+                return Response({
+                    'success': True,
+                    'data': response_data
+                }, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({
                 'success': False,
@@ -956,19 +1066,18 @@ def profile_view(request):
                         'error': '테스트 모드: user_id가 필요합니다. (예: {"user_id": 1, "age": 25, ...})'
                     }, status=status.HTTP_400_BAD_REQUEST)
                 
-                try:
-                    auth_user = AuthUser.objects.get(id=user_id)
-                    user_profile = auth_user.profile
+                user_profile = load_request_profile(request, user_id)
+                if user_profile is not None:
                     serializer = UserSerializer(user_profile, data=request.data, partial=request.method == 'PUT')
-                except User.DoesNotExist:
+                else:
                     # 프로필이 없으면 생성
                     serializer = UserSerializer(data=request.data)
             else:
                 # 정상 모드: 인증된 사용자 사용
-                try:
-                    user_profile = request.user.profile
+                user_profile = load_request_profile(request)
+                if user_profile is not None:
                     serializer = UserSerializer(user_profile, data=request.data, partial=request.method == 'PUT')
-                except User.DoesNotExist:
+                else:
                     # 프로필이 없으면 생성
                     serializer = UserSerializer(data=request.data)
             
@@ -981,6 +1090,8 @@ def profile_view(request):
                 else:
                     auth_user = request.user
                     user_profile = serializer.save(user=auth_user)
+                # 이후 같은 요청의 로딩은 저장한 프로필을 사용
+                remember_request_profile(request, user_profile)
                 
                 # 이메일 인증 여부 및 프로필 완성도에 따라 service_active 및 matching_consent 설정
                 if not user_profile.user.email_verified:
@@ -1039,6 +1150,7 @@ def update_profile(request):
 
 @api_view(['GET', 'POST', 'PUT'])
 @permission_classes([IsAuthenticated if not settings.DEBUG else AllowAny])
+@cache_user_response('ideal_type')
 def ideal_type_view(request):
     """
     이상형 프로필 조회/생성/수정 API
@@ -1054,42 +1166,44 @@ def ideal_type_view(request):
     # GET 요청: 이상형 프로필 조회
     if request.method == 'GET':
         try:
-            user_profile, error_response, _debug_user_id = _get_user_profile_from_request(
-                request,
-                user_id_sources=('query', 'data'),
-                missing_user_id_response={
-                    'success': False,
-                    'error': '테스트 모드: user_id가 필요합니다. (예: ?user_id=1)',
-                },
-                auth_user_missing_response={
-                    'success': False,
-                    'message': '프로필이 없습니다.',
-                },
-                profile_missing_response={
-                    'success': False,
-                    'message': '프로필이 없습니다.',
-                },
-                authed_profile_missing_response={
-                    'success': False,
-                    'message': '프로필이 없습니다.',
-                },
-            )
-            if error_response:
-                return error_response
+            # 조회는 읽기 복제본에서 (최근에 이상형 프로필을 수정한 사용자는 primary)
+            with use_replica(request.user):
+                user_profile, error_response, _debug_user_id = _get_user_profile_from_request(
+                    request,
+                    user_id_sources=('query', 'data'),
+                    missing_user_id_response={
+                        'success': False,
+                        'error': '테스트 모드: user_id가 필요합니다. (예: ?user_id=1)',
+                    },
+                    auth_user_missing_response={
+                        'success': False,
+                        'message': '프로필이 없습니다.',
+                    },
+                    profile_missing_response={
+                        'success': False,
+                        'message': '프로필이 없습니다.',
+                    },
+                    authed_profile_missing_response={
+                        'success': False,
+                        'message': '프로필이 없습니다.',
+                    },
+                )
+                if error_response:
+                    return error_response
 
-            try:
-                ideal_type = user_profile.ideal_type_profile
-            except IdealTypeProfile.DoesNotExist:
-                return Response({
-                    'success': False,
-                    'message': '이상형 프로필이 없습니다.'
-                }, status=status.HTTP_404_NOT_FOUND)
+                try:
+                    ideal_type = user_profile.ideal_type_profile
+                except IdealTypeProfile.DoesNotExist:
+                    return Response({
+                        'success': False,
+                        'message': '이상형 프로필이 없습니다.'
+                    }, status=status.HTTP_404_NOT_FOUND)
             
-            serializer = IdealTypeProfileSerializer(ideal_type)
-            return Response({
-                'success': True,
-                'data': serializer.data
-            }, status=status.HTTP_200_OK)
+                serializer = IdealTypeProfileSerializer(ideal_type)
+                return Response({
+                    'success': True,
+                    'data': serializer.data
+                }, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({
                 'success': False,
@@ -1108,10 +1222,8 @@ def ideal_type_view(request):
                         'error': '테스트 모드: user_id가 필요합니다. (예: {"user_id": 1, "height_min": 160, ...})'
                     }, status=status.HTTP_400_BAD_REQUEST)
                 
-                try:
-                    auth_user = AuthUser.objects.get(id=user_id)
-                    user_profile = auth_user.profile
-                except User.DoesNotExist:
+                user_profile = load_request_profile(request, user_id)
+                if user_profile is None:
                     return Response({
                         'success': False,
                         'error': '사용자 프로필이 없습니다. 먼저 프로필을 생성해주세요.'
@@ -1125,9 +1237,8 @@ def ideal_type_view(request):
                     serializer = IdealTypeProfileSerializer(data=request.data)
             else:
                 # 정상 모드: 인증된 사용자 사용
-                try:
-                    user_profile = request.user.profile
-                except User.DoesNotExist:
+                user_profile = load_request_profile(request)
+                if user_profile is None:
                     return Response({
                         'success': False,
                         'error': '사용자 프로필이 없습니다. 먼저 프로필을 생성해주세요.'
@@ -1152,12 +1263,10 @@ def ideal_type_view(request):
                 
                 # 개발 모드에서 user_id가 있는 경우
                 if settings.DEBUG and not request.user.is_authenticated and request.data.get('user_id'):
-                    user_id = request.data.get('user_id')
-                    auth_user = AuthUser.objects.get(id=user_id)
-                    user_profile = auth_user.profile
+                    user_profile = load_request_profile(request, request.data.get('user_id'))
                     saved_ideal_type = serializer.save(user=user_profile)
                 else:
-                    user_profile = request.user.profile
+                    user_profile = load_request_profile(request)
                     saved_ideal_type = serializer.save(user=user_profile)
                 
                 # 저장 후 우선순위 데이터 확인
@@ -1220,6 +1329,7 @@ def ideal_type_view(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated if not settings.DEBUG else AllowAny])
+@cache_user_response('profile', 'ideal_type')
 def check_profile_completeness(request):
     """
     프로필 완성도 확인 API
@@ -1403,13 +1513,16 @@ def update_consent(request):
         # ------------------------------------------------------------------
         if not matching_consent:
             from django.db.models import Q
+            from apps.matching.events import publish_match_changes
             from apps.matching.models import Match
 
             deleted_qs = Match.objects.filter(
                 Q(user1=user_profile) | Q(user2=user_profile)
             )
-            deleted_count = deleted_qs.count()
+            deleted_pairs = list(deleted_qs.values_list('id', 'user1_id', 'user2_id'))
+            deleted_count = len(deleted_pairs)
             deleted_qs.delete()
+            publish_match_changes(deleted=deleted_pairs)
             print(f'🗑️ 매칭 동의 OFF: {deleted_count}개의 매칭 삭제됨 ({user_profile.user.username})')
 
         # ------------------------------------------------------------------
@@ -1417,16 +1530,16 @@ def update_consent(request):
         # ------------------------------------------------------------------
         else:
             try:
-                # 위치 확인
-                user_location = user_profile.location
+                # 보관(cold)된 위치가 있으면 user_locations로 되돌린 뒤 위치 확인
+                restore_cold_location(user_profile)
+                user_location = get_current_location(user_profile)
                 from apps.matching.utils import find_matchable_users
+                from apps.matching.events import publish_match_changes
                 from apps.matching.models import Match
                 from django.db.models import Q
                 from django.db import transaction
-                from decimal import Decimal
 
-                latitude = float(user_location.latitude)
-                longitude = float(user_location.longitude)
+                latitude, longitude = user_location.degrees
 
                 # 기존 매칭 삭제 (재생성 전에 삭제하여 양쪽 모두 새 매칭으로 간주되도록)
                 existing_matches = Match.objects.filter(
@@ -1434,9 +1547,11 @@ def update_consent(request):
                 ).select_related('user1', 'user2')
                 
                 deleted_matches_info = []
+                deleted_pairs = []
                 for existing_match in existing_matches:
                     other_user = existing_match.user2 if existing_match.user1 == user_profile else existing_match.user1
                     deleted_matches_info.append(f'{user_profile.user.username} ↔ {other_user.user.username}')
+                    deleted_pairs.append((existing_match.id, existing_match.user1_id, existing_match.user2_id))
                     existing_match.delete()
                 
                 if deleted_matches_info:
@@ -1452,7 +1567,7 @@ def update_consent(request):
                     radius_km=0.01
                 )
 
-                new_matches_count = 0
+                new_matches = []
 
                 for matchable in matchable_users:
                     candidate_user = matchable['user']
@@ -1463,30 +1578,27 @@ def update_consent(request):
 
                     try:
                         with transaction.atomic():
-                            user1_lat = Decimal(str(latitude)).quantize(Decimal('0.000001'))
-                            user1_lon = Decimal(str(longitude)).quantize(Decimal('0.000001'))
-                            user2_lat = Decimal(str(candidate_user.location.latitude)).quantize(Decimal('0.000001'))
-                            user2_lon = Decimal(str(candidate_user.location.longitude)).quantize(Decimal('0.000001'))
-
-                            Match.objects.create(
+                            # Match는 DecimalField로 저장 (마이크로도 → Decimal 변환은 여기서만)
+                            new_match = Match.objects.create(
                                 user1=user_profile,
                                 user2=candidate_user,
-                                user1_latitude=user1_lat,
-                                user1_longitude=user1_lon,
-                                user2_latitude=user2_lat,
-                                user2_longitude=user2_lon,
+                                user1_latitude=user_location.latitude,
+                                user1_longitude=user_location.longitude,
+                                user2_latitude=candidate_user.location.latitude,
+                                user2_longitude=candidate_user.location.longitude,
                                 matched_criteria={
                                     'distance_m': matchable['distance_m'],
                                     'match_score': matchable['match_score'],
                                 }
                             )
-                            new_matches_count += 1
+                            new_matches.append(new_match)
                             print(f'✅ 새 매칭 생성: {user_profile.user.username} ↔ {candidate_user.user.username}')
                     except Exception as e:
                         print(f'⚠️ 매칭 재생성 실패: {str(e)}')
                         continue
 
-                print(f'✅ 매칭 동의 ON: {new_matches_count}개의 매칭 재생성 ({user_profile.user.username})')
+                publish_match_changes(created=new_matches, deleted=deleted_pairs)
+                print(f'✅ 매칭 동의 ON: {len(new_matches)}개의 매칭 재생성 ({user_profile.user.username})')
             except UserLocation.DoesNotExist:
                 print(f'⚠️ 매칭 동의 ON - 위치 정보 없음, 재매칭 건너뜀 ({user_profile.user.username})')
 
@@ -0,0 +1,96 @@
+"""
+프로필 선택 항목 목록 (앱의 src/constants와 동일한 순서)
+
+매칭 후보 읽기 모델(MatchingCandidate)은 성격/관심사 목록을 이 순서의 비트마스크로,
+MBTI를 이 목록의 번호로 저장합니다. 항목을 추가할 때는 기존 항목의 순서를 바꾸지 말고 끝에 추가한 뒤
+python manage.py rebuild_matching_candidates로 읽기 모델을 다시 만들어주세요.
+
+User / IdealTypeProfile의 성격/관심사는 같은 순서의 정수 ID 배열(personality_ids 등, GIN 인덱스)로도 저장되며
+SQL 점수 계산(apps.matching.scoring)이 이 배열을 비교합니다.
+"""
+import json
+import zlib
+
+# src/constants/personality.js
+PERSONALITY_TYPES = ('extrovert', 'introvert', 'humorous', 'serious', 'calm', 'energetic')
+
+# src/constants/interests.js
+INTERESTS = ('sports', 'music', 'movie', 'reading', 'travel', 'cooking', 'game', 'art')
+
+# src/constants/mbti.js
+MBTI_TYPES = (
+    'ISTJ', 'ISFJ', 'INFJ', 'INTJ',
+    'ISTP', 'ISFP', 'INFP', 'INTP',
+    'ESTP', 'ESFP', 'ENFP', 'ENTP',
+    'ESTJ', 'ESFJ', 'ENFJ', 'ENTJ',
+)
+
+_PERSONALITY_BITS = {value: 1 << index for index, value in enumerate(PERSONALITY_TYPES)}
+_INTEREST_BITS = {value: 1 << index for index, value in enumerate(INTERESTS)}
+_MBTI_CODES = {value: index for index, value in enumerate(MBTI_TYPES)}
+_PERSONALITY_IDS = {value: index + 1 for index, value in enumerate(PERSONALITY_TYPES)}
+_INTEREST_IDS = {value: index + 1 for index, value in enumerate(INTERESTS)}
+
+
+def _encode_mask(values, bits):
+    """
+    항목 목록 → (비트마스크, 모든 항목이 목록에 있는지)
+
+    목록에 없는 항목(직접 입력/이전 버전 값)은 비트로 표현할 수 없으므로 False를 반환합니다.
+    """
+    if not isinstance(values, list):
+        return 0, not values
+    mask = 0
+    known = True
+    for value in values:
+        bit = bits.get(value) if isinstance(value, str) else None
+        if bit is None:
+            known = False
+        else:
+            mask |= bit
+    return mask, known
+
+
+def _unknown_id(value):
+    """목록에 없는 항목의 ID (값의 CRC32로 만든 음수, 같은 값은 항상 같은 ID)"""
+    return -(zlib.crc32(json.dumps(value, sort_keys=True, ensure_ascii=False).encode()) & 0x7fffffff) - 1
+
+
+def _encode_ids(values, ids):
+    """
+    항목 목록 → 정수 ID 배열 (중복 제거, 정렬)
+
+    목록에 있는 항목은 1부터의 순번, 목록에 없는 항목(직접 입력/이전 버전 값)은 음수 ID로 표현하므로
+    배열끼리의 교집합 크기가 원래 목록의 set 교집합 크기와 같습니다.
+    """
+    if not isinstance(values, list):
+        return []
+    return sorted({
+        (ids.get(value) if isinstance(value, str) else None) or _unknown_id(value)
+        for value in values
+    })
+
+
+def encode_personality(values):
+    """성격 유형 목록 → (비트마스크, 모든 항목이 목록에 있는지)"""
+    return _encode_mask(values, _PERSONALITY_BITS)
+
+
+def encode_interests(values):
+    """관심사 목록 → (비트마스크, 모든 항목이 목록에 있는지)"""
+    return _encode_mask(values, _INTEREST_BITS)
+
+
+def mbti_code(mbti):
+    """MBTI → 번호 (목록에 없으면 None)"""
+    return _MBTI_CODES.get(mbti)
+
+
+def personality_ids(values):
+    """성격 유형 목록 → 정수 ID 배열"""
+    return _encode_ids(values, _PERSONALITY_IDS)
+
+
+def interest_ids(values):
+    """관심사 목록 → 정수 ID 배열"""
+    return _encode_ids(values, _INTEREST_IDS)
@@ -13,14 +13,19 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 # Django ASGI 애플리케이션 초기화
 django_asgi_app = get_asgi_application()
 
+# Django 설정 이후에 import (모델 로딩 필요)
+from apps.users.middleware import JWTAuthMiddleware  # noqa: E402
+from apps.matching.routing import websocket_urlpatterns as matching_websocket_urlpatterns  # noqa: E402
+
 # ASGI 애플리케이션 설정
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
     "websocket": AuthMiddlewareStack(
-        URLRouter([
-            # WebSocket 라우팅은 여기에 추가
-            # 예: path('ws/', YourConsumer.as_asgi()),
-        ])
+        JWTAuthMiddleware(
+            URLRouter([
+                *matching_websocket_urlpatterns,
+            ])
+        )
     ),
 })
 
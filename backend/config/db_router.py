@@ -0,0 +1,143 @@
+"""
+읽기 복제본(read replica) 라우팅
+
+트래픽 대부분이 읽기(후보 조회, 프로필 조회, 인원 수, 매칭 목록)이므로
+DB_REPLICA_HOSTS에 복제본을 설정하면 use_replica() 블록 안의 읽기 쿼리를 복제본으로 보냅니다.
+- 쓰기와 use_replica() 밖의 읽기는 항상 primary(default)
+- use_replica() 블록 안에서 쓰기가 발생하면 이후 읽기는 primary (같은 요청에서 방금 쓴 값을 읽도록)
+- 쓰기 요청을 보낸 사용자는 pin_primary()로 잠시 primary에 고정 (다음 요청에서 자기 변경을 읽도록)
+- 복제 지연이 DB_REPLICA_MAX_LAG_SECONDS를 넘거나 연결할 수 없는 복제본은 사용하지 않음
+
+로컬에서는 Postgres 두 개(예: 5432 primary, 5433 복제본)로 테스트할 수 있습니다.
+
+    DB_REPLICA_HOSTS=localhost:5433 python manage.py runserver
+"""
+import contextlib
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+REPLICA_PREFIX = 'replica_'
+PRIMARY_PIN_KEY = 'db:primary_pin:{user_id}'
+
+# 복제본 -> (확인 시각, 사용 가능 여부), 프로세스별로 DB_REPLICA_LAG_CHECK_SECONDS 동안 재사용
+_replica_health = {}
+
+# 현재 use_replica() 블록에서 읽기에 사용할 복제본 (없으면 primary)
+_current_replica = ContextVar('current_replica', default=None)
+
+# 복제 지연(초), WAL을 모두 재생했으면 0 (primary에 쓰기가 없어 재생 시각이 오래된 경우를 지연으로 보지 않음)
+REPLICATION_LAG_SQL = '''
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+'''
+
+
+def replica_aliases():
+    """settings.DATABASES에 설정된 복제본 alias 목록"""
+    return [alias for alias in settings.DATABASES if alias.startswith(REPLICA_PREFIX)]
+
+
+def _is_replica_healthy(alias):
+    """복제본에 연결할 수 있고 복제 지연이 허용 범위 안인지 (결과는 잠시 캐시)"""
+    now = time.monotonic()
+    checked = _replica_health.get(alias)
+    if checked and now - checked[0] < settings.DB_REPLICA_LAG_CHECK_SECONDS:
+        return checked[1]
+
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(REPLICATION_LAG_SQL)
+            lag_seconds = float(cursor.fetchone()[0])
+        healthy = lag_seconds <= settings.DB_REPLICA_MAX_LAG_SECONDS
+        if not healthy:
+            print(f'⚠️ 복제본 {alias} 지연 {lag_seconds:.1f}초 → primary 사용')
+    except Exception as e:
+        print(f'⚠️ 복제본 {alias} 확인 실패 → primary 사용: {str(e)}')
+        healthy = False
+
+    _replica_health[alias] = (now, healthy)
+    return healthy
+
+
+def primary_pin_seconds():
+    """
+    쓰기 후 primary에 고정할 시간
+
+    복제본은 최대 DB_REPLICA_MAX_LAG_SECONDS 지연까지 사용하고, 지연은 LAG_CHECK 주기마다 확인하므로 그만큼 고정
+    """
+    return settings.DB_REPLICA_MAX_LAG_SECONDS + settings.DB_REPLICA_LAG_CHECK_SECONDS
+
+
+def pin_primary(user_id):
+    """사용자의 읽기를 잠시 primary로 고정 (쓰기 직후 자기 변경을 복제본에서 못 읽는 문제 방지)"""
+    if not user_id or not replica_aliases():
+        return
+    try:
+        cache.set(PRIMARY_PIN_KEY.format(user_id=user_id), 1, timeout=primary_pin_seconds())
+    except Exception as e:
+        print(f'⚠️ primary 고정 실패 (user_id: {user_id}): {str(e)}')
+
+
+def _is_pinned_to_primary(user_id):
+    try:
+        return bool(cache.get(PRIMARY_PIN_KEY.format(user_id=user_id)))
+    except Exception:
+        # 고정 여부를 알 수 없으면 자기 변경을 놓치지 않도록 primary
+        return True
+
+
+@contextlib.contextmanager
+def use_replica(user=None):
+    """
+    블록 안의 읽기 쿼리를 복제본으로 보냄 (사용 가능한 복제본이 없으면 primary)
+
+    Args:
+        user: 요청한 사용자 (AuthUser, 최근에 쓰기를 했으면 primary 사용)
+    """
+    user_id = getattr(user, 'id', None) if getattr(user, 'is_authenticated', False) else None
+    aliases = replica_aliases()
+    if aliases and not (user_id and _is_pinned_to_primary(user_id)):
+        healthy = [alias for alias in aliases if _is_replica_healthy(alias)]
+        replica = random.choice(healthy) if healthy else None
+    else:
+        replica = None
+
+    token = _current_replica.set(replica)
+    try:
+        yield replica or DEFAULT_DB_ALIAS
+    finally:
+        _current_replica.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """use_replica() 블록 안의 읽기만 복제본으로, 나머지는 primary로 보내는 라우터"""
+
+    def db_for_read(self, model, **hints):
+        return _current_replica.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # 블록 안에서 쓰기를 했으면 이후 읽기는 primary (방금 쓴 값을 읽도록)
+        if _current_replica.get():
+            _current_replica.set(None)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 복제본은 primary와 같은 데이터이므로 복제본에서 읽은 객체를 primary에 쓰는 관계도 허용
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # 복제본은 primary에서 복제되므로 마이그레이션하지 않음
+        if db.startswith(REPLICA_PREFIX):
+            return False
+        return None
@@ -57,6 +57,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.users.middleware.PrimaryPinMiddleware',  # 쓰기 요청을 보낸 사용자의 읽기를 잠시 primary로 고정
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -95,6 +96,21 @@ DATABASES = {
     }
 }
 
+# 읽기 복제본: 쉼표로 구분한 host[:port] (예: 'replica1:5432,replica2:5432'), 비어 있으면 사용하지 않음
+# 이름/계정은 primary와 같고, use_replica() 블록 안의 읽기만 복제본으로 보냄 (config/db_router.py)
+for _index, _host in enumerate(host for host in config('DB_REPLICA_HOSTS', default='').split(',') if host):
+    _replica_host, _, _replica_port = _host.partition(':')
+    DATABASES[f'replica_{_index}'] = {
+        **DATABASES['default'],
+        'HOST': _replica_host,
+        'PORT': _replica_port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['config.db_router.PrimaryReplicaRouter']
+DB_REPLICA_MAX_LAG_SECONDS = config('DB_REPLICA_MAX_LAG_SECONDS', default=2.0, cast=float)  # 이보다 지연된 복제본은 사용하지 않음
+DB_REPLICA_LAG_CHECK_SECONDS = config('DB_REPLICA_LAG_CHECK_SECONDS', default=5, cast=int)  # 복제 지연 확인 주기
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -147,7 +163,7 @@ AUTH_USER_MODEL = 'users.AuthUser'
 # REST Framework 설정
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.CachedJWTAuthentication',  # JWT 인증 (사용자는 스냅샷 캐시에서 조회)
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -203,6 +219,13 @@ CACHES = {
     }
 }
 
+# 인증 사용자 스냅샷 캐시 (프로세스 LRU → Redis, 변경 시 버전으로 무효화)
+AUTH_CACHE_TIMEOUT = config('AUTH_CACHE_TIMEOUT', default=3600, cast=int)  # Redis 스냅샷 보관 시간(초)
+AUTH_CACHE_LOCAL_SIZE = config('AUTH_CACHE_LOCAL_SIZE', default=10000, cast=int)  # 프로세스 LRU 최대 사용자 수
+
+# 프로필/이상형 프로필/위치/완성도 조회 응답 캐시 (데이터 버전별로 저장, ETag로 304 응답)
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=3600, cast=int)  # 응답 보관 시간(초)
+
 # Channels 레이어 설정 (WebSocket용)
 CHANNEL_LAYERS = {
     'default': {
@@ -213,3 +236,65 @@ CHANNEL_LAYERS = {
     },
 }
 
+# 로컬 테스트용: Redis 없이 단일 프로세스 메모리 레이어 사용
+if config('CHANNEL_LAYERS_IN_MEMORY', default=False, cast=bool):
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        },
+    }
+
+
+# 매칭 처리 설정
+# - 'poll': match_check 요청마다 주변 후보를 다시 계산 (기존 방식)
+# - 'incremental': 사용자별로 마지막 후보 목록을 캐시해 두고, 변경된 후보만 다시 계산
+# - 'precomputed': 위치 업데이트 시 발행된 이벤트를 매칭 워커(run_matching_worker)가 처리하고,
+#                  match_check는 미리 계산된 결과만 읽음
+#                  (전체 매칭 스윕(run_matching_sweep)을 함께 돌리면 matchable_count도 스윕 결과를 사용)
+MATCHING_MODE = config('MATCHING_MODE', default='poll')
+MATCHING_RADIUS_KM = config('MATCHING_RADIUS_KM', default=0.01, cast=float)  # 매칭 반경 (기본값 10m, 앱과 동일)
+MATCHING_COUNT_RADIUS_KM = config('MATCHING_COUNT_RADIUS_KM', default=0.05, cast=float)  # 매칭 가능 인원 수 반경 (기본값 50m, 앱과 동일)
+MATCHING_SWEEP_INTERVAL_SECONDS = config('MATCHING_SWEEP_INTERVAL_SECONDS', default=30, cast=int)  # 전체 매칭 스윕(run_matching_sweep) 주기
+MATCHING_LONG_POLL_TIMEOUT_SECONDS = config('MATCHING_LONG_POLL_TIMEOUT_SECONDS', default=25, cast=int)  # 롱폴링 match_check 최대 대기 시간
+MATCHING_CHANGE_RETENTION_DAYS = config('MATCHING_CHANGE_RETENTION_DAYS', default=7, cast=int)  # 매칭 변경 이력(MatchChange) 보관 기간
+MATCHING_INCREMENTAL_FULL_REFRESH_SECONDS = config('MATCHING_INCREMENTAL_FULL_REFRESH_SECONDS', default=300, cast=int)  # 증분 모드 전체 재계산 주기
+# 반경 조회를 매칭 후보 읽기 모델(matching_candidates)에서 할지 (켜기 전에 rebuild_matching_candidates 실행)
+MATCHING_READ_MODEL = config('MATCHING_READ_MODEL', default=False, cast=bool)
+# 점수 계산을 DB에서 할지 (users.personality_ids / interest_ids GIN 인덱스 사용, 50점 이상만 점수 → 거리 순으로 LIMIT)
+MATCHING_SQL_SCORING = config('MATCHING_SQL_SCORING', default=False, cast=bool)
+MATCHING_SQL_LIMIT = config('MATCHING_SQL_LIMIT', default=100, cast=int)  # DB 점수 계산 시 가져올 최대 후보 수
+
+# 위치 업데이트 dead-band: 마지막 저장 위치에서 거의 움직이지 않았고 최근에 저장했다면 DB 쓰기/이벤트 생략
+# 생략하는 동안 매칭은 저장된 위치 기준 → 최대 LOCATION_DEADBAND_METERS의 반경 오차가 최대 LOCATION_DEADBAND_MAX_AGE_SECONDS 동안 생김
+# 생략해도 업데이트 응답/위치 조회 API는 요청한 위치와 현재 시각을 보여줌
+# 기본값은 가장 작은 매칭 반경(MATCHING_RADIUS_KM = 10m)의 1/5 (2m)
+LOCATION_DEADBAND_METERS = config('LOCATION_DEADBAND_METERS', default=MATCHING_RADIUS_KM * 1000 / 5, cast=float)
+LOCATION_DEADBAND_MAX_AGE_SECONDS = config('LOCATION_DEADBAND_MAX_AGE_SECONDS', default=60, cast=int)  # 이 시간이 지나면 움직이지 않아도 저장
+
+# 위치 저장 방식 (direct: 요청마다 DB upsert, write_behind: Redis 버퍼에 기록 후 flush_locations가 일괄 반영)
+LOCATION_WRITE_MODE = config('LOCATION_WRITE_MODE', default='direct')
+LOCATION_FLUSH_INTERVAL_SECONDS = config('LOCATION_FLUSH_INTERVAL_SECONDS', default=5, cast=int)  # flush 주기 (Redis 장애 시 최대 유실 구간)
+LOCATION_FLUSH_BATCH_SIZE = config('LOCATION_FLUSH_BATCH_SIZE', default=1000, cast=int)  # upsert 1회당 사용자 수
+
+# user_locations 저장 방식 (users 마이그레이션 0009 / snapshot_locations --apply-storage 적용 시 반영)
+# UNLOGGED: WAL을 남기지 않음 (DB 비정상 종료 시 비워지므로 snapshot_locations로 복구)
+LOCATION_TABLE_UNLOGGED = config('LOCATION_TABLE_UNLOGGED', default=False, cast=bool)
+LOCATION_TABLE_FILLFACTOR = config('LOCATION_TABLE_FILLFACTOR', default=70, cast=int)  # 페이지 여유 공간을 남겨 HOT 업데이트 유도
+LOCATION_SNAPSHOT_INTERVAL_SECONDS = config('LOCATION_SNAPSHOT_INTERVAL_SECONDS', default=300, cast=int)  # 스냅샷 복사 주기
+
+# 접속 상태(presence): 이 시간 안에 위치 업데이트/heartbeat를 보낸 사용자만 매칭 후보로 사용
+PRESENCE_WINDOW_SECONDS = config('PRESENCE_WINDOW_SECONDS', default=300, cast=int)
+
+# 위치 hot/cold 분리: 이 기간 넘게 위치가 갱신되지 않은 사용자의 위치는 archive_locations가 cold 테이블로 옮김
+LOCATION_COLD_AFTER_DAYS = config('LOCATION_COLD_AFTER_DAYS', default=3, cast=int)
+
+# 매칭 이벤트/결과 저장용 Redis (캐시와 DB 번호를 분리)
+MATCHING_REDIS_URL = config('MATCHING_REDIS_URL', default=f'redis://{REDIS_HOST}:{REDIS_PORT}/2')
+
+# 지역 샤딩: geohash 접두사 → 매칭 워커 그룹(샤드) 매핑 (예: 'wydm:seoul,wydj:seoul,wy7:busan')
+# 비어 있으면 샤딩을 사용하지 않음. 어떤 접두사에도 속하지 않는 위치는 'default' 샤드가 담당
+# MATCHING_MODE=incremental이면 match_check / matchable_count는 샤딩 없이 직접 계산
+MATCHING_SHARD_MAP = dict(
+    item.split(':', 1) for item in config('MATCHING_SHARD_MAP', default='').split(',') if item
+)
+MATCHING_SHARD_RPC_TIMEOUT_SECONDS = config('MATCHING_SHARD_RPC_TIMEOUT_SECONDS', default=2, cast=int)  # 샤드 간 요청 응답 대기 시간 (요청한 샤드 전체 기준)
@@ -0,0 +1,107 @@
+"""
+읽기 복제본 라우팅 테스트 (use_replica, pin_primary, PrimaryReplicaRouter)
+"""
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.test import SimpleTestCase, override_settings
+
+from apps.users.models import AuthUser, User
+from config import db_router
+from config.db_router import PRIMARY_PIN_KEY, PrimaryReplicaRouter, pin_primary, use_replica
+
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PrimaryReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.router = PrimaryReplicaRouter()
+        self.user = AuthUser(id=1, username='tester')
+        # 복제본 1개 (연결 확인은 하지 않음)
+        patches = [
+            mock.patch.object(db_router, 'replica_aliases', return_value=['replica_0']),
+            mock.patch.object(db_router, '_is_replica_healthy', return_value=True),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_reads_outside_block_use_primary(self):
+        self.assertEqual(self.router.db_for_read(User), DEFAULT_DB_ALIAS)
+
+    def test_reads_inside_block_use_replica(self):
+        with use_replica(self.user) as alias:
+            self.assertEqual(alias, 'replica_0')
+            self.assertEqual(self.router.db_for_read(User), 'replica_0')
+        self.assertEqual(self.router.db_for_read(User), DEFAULT_DB_ALIAS)
+
+    def test_writes_always_use_primary(self):
+        with use_replica(self.user):
+            self.assertEqual(self.router.db_for_write(User), DEFAULT_DB_ALIAS)
+
+    def test_reads_after_write_in_block_use_primary(self):
+        with use_replica(self.user):
+            self.router.db_for_write(User)
+            self.assertEqual(self.router.db_for_read(User), DEFAULT_DB_ALIAS)
+        # 다음 블록은 다시 복제본
+        with use_replica(self.user):
+            self.assertEqual(self.router.db_for_read(User), 'replica_0')
+
+    def test_nested_block_restores_outer_replica(self):
+        with use_replica(self.user):
+            with mock.patch.object(db_router, '_is_replica_healthy', return_value=False):
+                with use_replica(self.user):
+                    self.assertEqual(self.router.db_for_read(User), DEFAULT_DB_ALIAS)
+            self.assertEqual(self.router.db_for_read(User), 'replica_0')
+
+    def test_pinned_user_reads_primary(self):
+        pin_primary(self.user.id)
+        self.assertTrue(cache.get(PRIMARY_PIN_KEY.format(user_id=self.user.id)))
+        with use_replica(self.user) as alias:
+            self.assertEqual(alias, DEFAULT_DB_ALIAS)
+            self.assertEqual(self.router.db_for_read(User), DEFAULT_DB_ALIAS)
+
+    def test_pin_is_per_user(self):
+        pin_primary(self.user.id)
+        with use_replica(AuthUser(id=2, username='other')):
+            self.assertEqual(self.router.db_for_read(User), 'replica_0')
+
+    def test_anonymous_user_is_never_pinned(self):
+        with use_replica(AnonymousUser()):
+            self.assertEqual(self.router.db_for_read(User), 'replica_0')
+
+    def test_unhealthy_replica_falls_back_to_primary(self):
+        with mock.patch.object(db_router, '_is_replica_healthy', return_value=False):
+            with use_replica(self.user) as alias:
+                self.assertEqual(alias, DEFAULT_DB_ALIAS)
+                self.assertEqual(self.router.db_for_read(User), DEFAULT_DB_ALIAS)
+
+    def test_unknown_pin_state_uses_primary(self):
+        # 캐시를 읽을 수 없으면 자기 변경을 놓치지 않도록 primary
+        with mock.patch.object(db_router.cache, 'get', side_effect=ConnectionError):
+            with use_replica(self.user) as alias:
+                self.assertEqual(alias, DEFAULT_DB_ALIAS)
+
+    def test_no_replicas_configured(self):
+        with mock.patch.object(db_router, 'replica_aliases', return_value=[]):
+            pin_primary(self.user.id)
+            self.assertIsNone(cache.get(PRIMARY_PIN_KEY.format(user_id=self.user.id)))
+            with use_replica(self.user) as alias:
+                self.assertEqual(alias, DEFAULT_DB_ALIAS)
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica_0', 'users'))
+        self.assertIsNone(self.router.allow_migrate(DEFAULT_DB_ALIAS, 'users'))
+
+    def test_relations_between_primary_and_replica_objects(self):
+        primary_user = AuthUser(id=1)
+        primary_user._state.db = DEFAULT_DB_ALIAS
+        replica_profile = User(id=1)
+        replica_profile._state.db = 'replica_0'
+        self.assertTrue(self.router.allow_relation(primary_user, replica_profile))
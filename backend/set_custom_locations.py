@@ -20,6 +20,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
 from apps.users.models import AuthUser, User, UserLocation
+from apps.users.presence import mark_user_seen
 from django.utils import timezone
 
 # API 기본 URL
@@ -97,6 +98,8 @@ def update_user_location(user_id, latitude, longitude, username=None, use_api=Tr
                     'updated_at': timezone.now(),
                 }
             )
+            # 매칭 후보는 접속 중인 사용자만이므로 접속 상태도 갱신 (PRESENCE_WINDOW_SECONDS 동안 유지)
+            mark_user_seen(user_profile.id)
             
             print(f"✅ {user_name} 위치 업데이트 성공 (직접 DB 업데이트)")
             print(f"   위치: ({latitude}, {longitude})")